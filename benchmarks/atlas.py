@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""Compare loading one glyph atlas with loading a PNG image per letter
+
+For each number of pixels per em, every letter is rendered and cropped
+as for the atlas, then written both as 26 separate PNG images and packed
+into a single atlas image. The report gives the bytes of each, the time
+taken to decode all of them, and the share of the atlas covered by
+glyphs. The images clients load today, images/*.png, are decoded too for
+reference.
+"""
+import os
+import sys
+import glob
+import time
+import string
+import argparse
+from io import BytesIO
+from PIL import Image
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "source"))
+import generate_shapes as shapes
+from atlas import build_atlas, glyph_raster
+
+def png_bytes(coverage):
+    """Return a coverage array encoded as the build writes it"""
+    output = BytesIO()
+    shapes.coverage_image(coverage).save(output, "PNG", optimize=True)
+    return output.getvalue()
+
+def decode_time(images, repeat):
+    """Return the fastest of `repeat` times to decode every PNG in `images`"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for data in images:
+            with Image.open(BytesIO(data)) as image:
+                image.load()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="32,64,128,256", help="comma-separated pixels per em (default: %(default)s)")
+    parser.add_argument("--padding", type=int, default=shapes.ATLAS_PADDING,
+                        help="pixels around each glyph in the atlas (default: %(default)s)")
+    parser.add_argument("--repeat", type=int, default=20,
+                        help="timed decodes of each set, of which the fastest counts (default: %(default)s)")
+    args = parser.parse_args()
+
+    outlines = [shapes.draw_letter_outline(letter) for letter in string.ascii_lowercase]
+    print(f"{'px/em':>6}{'atlas KB':>10}{'PNGs KB':>10}{'atlas ms':>10}{'PNGs ms':>10}{'covered':>9}")
+    for size in [int(size) for size in args.sizes.split(",")]:
+        rasters = [glyph_raster(outline, size, shapes.FONT_SIZE, -shapes.IMAGE_VIEW_BOX[0])[0] for outline in outlines]
+        atlas, _ = build_atlas(rasters, args.padding)
+        atlas_png = png_bytes(atlas)
+        letter_pngs = [png_bytes(raster) for raster in rasters]
+        covered = sum(raster.size for raster in rasters) / atlas.size
+        print(f"{size:>6}{len(atlas_png) / 1024:>10.1f}{sum(map(len, letter_pngs)) / 1024:>10.1f}"
+              f"{decode_time([atlas_png], args.repeat) * 1000:>10.2f}"
+              f"{decode_time(letter_pngs, args.repeat) * 1000:>10.2f}{covered:>9.0%}")
+
+    paths = sorted(glob.glob(os.path.join(shapes.IMAGES_DIR, "*.png")))
+    if paths:
+        images = []
+        for path in paths:
+            with open(path, "rb") as f:
+                images.append(f.read())
+        print(f"\nimages/*.png: {len(images)} files, {sum(map(len, images)) / 1024:.1f} KB, "
+              f"{decode_time(images, args.repeat) * 1000:.2f} ms to decode")
+    print("Times are for decoding every image of the set once; an atlas is also one request instead of 26.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""Compare the direct glyf encoder with compiling glyphs through fontTools
+
+Every letter is compiled both ways, through TTGlyphPen and fontTools'
+Glyph objects and with glyf_encoder, in each drawing mode, and the glyf
+and loca tables are built both ways too. With shared components, each
+glyph the build makes, composite or not, must come out the same when
+fontTools decompiles and compiles it again, and each letter must expand
+to exactly the outline it has without components, so that it renders
+the same. The output must be
+identical; the time each way takes is reported. --check only compares,
+without timing, and exits with an error if anything differs.
+"""
+import os
+import sys
+import time
+import string
+import argparse
+import contextlib
+import numpy as np
+from fontTools.pens.transformPen import TransformPen
+from fontTools.pens.ttGlyphPen import TTGlyphPen
+from fontTools.ttLib import TTFont, newTable
+from fontTools.ttLib.tables._g_l_y_f import Glyph
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "source"))
+import generate_shapes as shapes
+from glyf_encoder import build_glyf_loca, start_on_curve
+from primitives import spline
+from simplify import simplify_contour
+
+# (label, curve tolerance, flatness, simplify tolerance, remove overlaps, share components)
+MODES = [
+    ("polygons", None, None, None, False, False),
+    ("curves", shapes.CURVE_TOLERANCE, None, None, False, False),
+    ("flatness 0.5", None, 0.5, None, False, False),
+    ("simplify 2", None, None, 2.0, False, False),
+    ("overlaps removed", None, None, None, True, False),
+    ("components", None, None, None, False, True),
+    ("curves components", shapes.CURVE_TOLERANCE, None, None, False, True),
+]
+
+def fonttools_compile(outline, simplify_tolerance=None):
+    """Compile an outline the way the font was compiled before glyf_encoder"""
+    pen = TTGlyphPen(glyphSet=None)
+    if simplify_tolerance is None:
+        # Drawing coordinates have y growing downwards from the top of the em
+        outline.draw(TransformPen(pen, (1, 0, 0, -1, 0, shapes.FONT_SIZE)))
+    else:
+        # Simplified in font units, as compile_outline() does
+        for points, on_curve in outline.contours():
+            points = np.column_stack((points[:, 0], shapes.FONT_SIZE - points[:, 1]))
+            spline(pen, *simplify_contour(*start_on_curve(points, on_curve), simplify_tolerance))
+    return pen.glyph().compile(None)
+
+def fonttools_tables(glyph_data):
+    """Return the glyf and loca tables and loca format fontTools builds from glyf records"""
+    font = TTFont()
+    glyph_order = [f"glyph{index}" for index in range(len(glyph_data))]
+    font.setGlyphOrder(glyph_order)
+    font.recalcBBoxes = False
+    for tag in ("head", "maxp", "loca"):
+        font[tag] = newTable(tag)
+    font['glyf'] = newTable('glyf')
+    font['glyf'].glyphs = {glyph_name: Glyph(data) for glyph_name, data in zip(glyph_order, glyph_data)}
+    glyf = font['glyf'].compile(font)
+    return glyf, font['loca'].compile(font), font['head'].indexToLocFormat
+
+def component_font():
+    """Build the letters with shared components, and return the font and its glyf records in glyph order"""
+    with contextlib.redirect_stdout(None):
+        font = shapes.add_letter_glyphs_to_font(shapes.create_empty_font(), share_components=True)
+    return font, shapes.glyph_data_in_order(font)
+
+def fonttools_recompile(font, glyph_name, data):
+    """Return a glyf record as fontTools compiles it again after decompiling it"""
+    glyf = font['glyf']
+    glyph = Glyph(data)
+    glyph.expand(glyf)
+    return glyph.compile(glyf, recalcBBoxes=True)
+
+def expanded_outline(glyf, glyph):
+    """Return a glyph's points, contour ends and on-curve flags, with components expanded"""
+    glyph.expand(glyf)
+    coordinates, ends, flags = glyph.getCoordinates(glyf)
+    return list(coordinates), list(ends), [flag & 1 for flag in flags]
+
+def compare_outlines(label, font):
+    """Print the letters whose composite glyph doesn't expand to the plain outline, and return how many"""
+    glyf = font['glyf']
+    mismatches = 0
+    for letter in string.ascii_lowercase:
+        plain = Glyph(shapes.compile_outline(shapes.draw_letter_outline(letter)))
+        if expanded_outline(glyf, glyf[shapes.glyph_name_for(letter)]) != expanded_outline(None, plain):
+            mismatches += 1
+            print(f"{label}: '{letter}' doesn't expand to its outline without components")
+    return mismatches
+
+def compare(label, expected, encoded, names):
+    """Print what differs between fontTools' glyf records and the encoder's, and return the number of differences"""
+    mismatches = 0
+    for name, old, new in zip(names, expected, encoded):
+        if old != new:
+            mismatches += 1
+            print(f"{label}: '{name}' differs from fontTools")
+    if fonttools_tables(expected) != build_glyf_loca(encoded):
+        mismatches += 1
+        print(f"{label}: glyf and loca tables differ from fontTools")
+    return mismatches
+
+def best_time(function, repeat):
+    """Return the shortest of `repeat` timed calls, in seconds"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20,
+                        help="timed runs of each mode, of which the fastest counts (default: %(default)s)")
+    parser.add_argument("--check", action="store_true",
+                        help="only check the output against fontTools, and exit with an error if it differs")
+    args = parser.parse_args()
+
+    line_style = shapes.drawing_settings()[-1]
+    mismatches = 0
+    if not args.check:
+        print(f"{'':18}{'fontTools (ms)':>16}{'encoder (ms)':>14}{'bytes':>8}")
+    for label, curve_tolerance, flatness, simplify_tolerance, remove_overlaps, components in MODES:
+        shapes.apply_drawing_settings(curve_tolerance, flatness, simplify_tolerance, remove_overlaps, line_style)
+        if components:
+            font, encoded = component_font()
+            names = font.getGlyphOrder()
+            expected = [fonttools_recompile(font, name, data) for name, data in zip(names, encoded)]
+            mismatches += compare(label, expected, encoded, names)
+            mismatches += compare_outlines(label, font)
+            if not args.check:
+                old_time = best_time(lambda: fonttools_tables(expected), args.repeat)
+                new_time = best_time(lambda: build_glyf_loca(encoded), args.repeat)
+                print(f"{label:18}{old_time * 1000:>16.2f}{new_time * 1000:>14.2f}{sum(map(len, encoded)):>8}")
+            continue
+        outlines = [shapes.draw_letter_outline(letter) for letter in string.ascii_lowercase]
+        expected = [fonttools_compile(outline, simplify_tolerance) for outline in outlines]
+        encoded = [shapes.compile_outline(outline, simplify_tolerance) for outline in outlines]
+        mismatches += compare(label, expected, encoded, string.ascii_lowercase)
+        if args.check:
+            continue
+
+        def fonttools_build():
+            fonttools_tables([fonttools_compile(outline, simplify_tolerance) for outline in outlines])
+
+        def encoder_build():
+            build_glyf_loca([shapes.compile_outline(outline, simplify_tolerance) for outline in outlines])
+
+        old_time = best_time(fonttools_build, args.repeat)
+        new_time = best_time(encoder_build, args.repeat)
+        print(f"{label:18}{old_time * 1000:>16.2f}{new_time * 1000:>14.2f}{sum(map(len, encoded)):>8}")
+
+    if mismatches:
+        sys.exit(f"{mismatches} mismatches")
+    print(f"\nAll glyphs and tables match fontTools byte for byte in {len(MODES)} modes")
+
+if __name__ == "__main__":
+    main()
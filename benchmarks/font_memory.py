@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""Compare peak memory of building a large font in memory and streaming it
+
+Fonts of increasing numbers of glyphs are built twice, each in a fresh
+process: once by adding every glyph to a TTFont and saving it, and once
+with FontWriter, which spools each glyph to disk as soon as it is
+compiled. The glyphs are the letters' pictures drawn over and over, each
+compiled anew. The report shows each process's peak resident memory above
+what it used before building, along with the time taken; both ways must
+write the same file.
+"""
+import os
+import sys
+import json
+import time
+import string
+import hashlib
+import argparse
+import resource
+import tempfile
+import contextlib
+import subprocess
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "source"))
+import generate_shapes as shapes
+from font_writer import FontWriter
+from fontTools.ttLib.tables._g_l_y_f import Glyph
+
+MODES = ("ttfont", "stream")
+# Glyphs past the letters are mapped to the Private Use Area while it lasts
+PRIVATE_USE_START = 0xE000
+PRIVATE_USE_COUNT = 0x1900
+
+def glyphs(count):
+    """Yield (glyph name, compiled glyf data, character codes) for `count` glyphs after .notdef"""
+    letters = string.ascii_lowercase
+    for index in range(count):
+        letter = letters[index % len(letters)]
+        unicodes = [PRIVATE_USE_START + index] if index < PRIVATE_USE_COUNT else []
+        yield f"glyph{index}", shapes.compile_letter_glyph(letter), unicodes
+
+def build_ttfont(count, path):
+    """Build the font by adding every glyph to a TTFont, then save it"""
+    font = shapes.create_empty_font()
+    font.setGlyphOrder([".notdef"] + [f"glyph{index}" for index in range(count)])
+    font['glyf']['.notdef'] = Glyph(shapes.notdef_glyph_data())
+    font['hmtx'].metrics['.notdef'] = (shapes.FONT_SIZE, 0)
+    for glyph_name, data, unicodes in glyphs(count):
+        font['glyf'][glyph_name] = Glyph(data)
+        font['hmtx'].metrics[glyph_name] = (shapes.FONT_SIZE, 0)
+        for unicode_value in unicodes:
+            for cmap in font['cmap'].tables:
+                cmap.cmap[unicode_value] = glyph_name
+    shapes.save_font(shapes.encoded_font(font), path)
+
+def build_stream(count, path):
+    """Build the font with FontWriter, spooling each glyph as it is compiled"""
+    with FontWriter(shapes.create_empty_font(), spool_dir=os.path.dirname(path)) as writer:
+        writer.add_glyph(".notdef", shapes.notdef_glyph_data(), shapes.FONT_SIZE)
+        for glyph_name, data, unicodes in glyphs(count):
+            writer.add_glyph(glyph_name, data, shapes.FONT_SIZE, unicodes=unicodes)
+        shapes.write_atomically(path, writer.write)
+
+def peak_rss():
+    """Return this process's peak resident memory in bytes"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+def run_child(mode, count, path):
+    """Build one font in this process and print its measurements as JSON"""
+    build = build_ttfont if mode == "ttfont" else build_stream
+    with contextlib.redirect_stdout(sys.stderr):
+        # Build a small font first so modules loaded on first use don't
+        # count as growth
+        build(len(string.ascii_lowercase), path)
+        before = peak_rss()
+        start = time.perf_counter()
+        build(count, path)
+    seconds = time.perf_counter() - start
+    with open(path, "rb") as f:
+        digest = hashlib.sha256(f.read()).hexdigest()
+    print(json.dumps({"growth": peak_rss() - before, "seconds": seconds,
+                      "size": os.path.getsize(path), "digest": digest}))
+
+def measure(mode, count, directory):
+    """Run a child process building one font and return its measurements"""
+    path = os.path.join(directory, f"{mode}-{count}.ttf")
+    # Give both fonts the same modification time so they can be compared
+    environment = dict(os.environ, SOURCE_DATE_EPOCH=os.environ.get("SOURCE_DATE_EPOCH", "0"))
+    output = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", mode, str(count), path],
+                            check=True, capture_output=True, text=True, env=environment).stdout
+    os.remove(path)
+    return json.loads(output)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--glyphs", default="500,2000,8000",
+                        help="comma-separated glyph counts to build (default: %(default)s)")
+    parser.add_argument("--child", nargs=3, metavar=("MODE", "COUNT", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        mode, count, path = args.child
+        run_child(mode, int(count), path)
+        return
+
+    counts = [int(count) for count in args.glyphs.split(",")]
+    print(f"{'glyphs':>8}{'font (KB)':>12}{'TTFont peak (MB)':>20}{'streamed peak (MB)':>22}"
+          f"{'TTFont (s)':>13}{'streamed (s)':>15}")
+    with tempfile.TemporaryDirectory() as directory:
+        for count in counts:
+            results = {mode: measure(mode, count, directory) for mode in MODES}
+            if results["ttfont"]["digest"] != results["stream"]["digest"]:
+                sys.exit(f"{count} glyphs: the two fonts differ")
+            ttfont, stream = results["ttfont"], results["stream"]
+            print(f"{count:>8}{stream['size'] / 1024:>12.0f}{ttfont['growth'] / 2 ** 20:>20.1f}"
+                  f"{stream['growth'] / 2 ** 20:>22.1f}{ttfont['seconds']:>13.1f}{stream['seconds']:>15.1f}")
+    print("\nPeak memory is measured above each process's use before building.")
+
+if __name__ == "__main__":
+    main()
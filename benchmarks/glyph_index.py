@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""Compare answering a question about a glyph from the sidecar index with reading the font
+
+Each way runs in a fresh interpreter, as a tool asking once would. It
+finds the bounding box and point count of one letter's glyph from the
+JSON index, the binary index, the font through ttf_reader, and the font
+through fontTools, and reports the milliseconds from start to answer.
+The word a letter pictures is only in the index.
+"""
+import os
+import sys
+import json
+import argparse
+import subprocess
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SOURCE_DIR = os.path.join(ROOT, "source")
+sys.path.insert(0, SOURCE_DIR)
+from glyph_index import index_paths
+from text_render import DEFAULT_FONT
+
+# Run in a fresh interpreter, printing the answer and the seconds it took
+QUERIES = {
+    "JSON index": """
+import json
+with open({json_path!r}, encoding="utf-8") as f:
+    entry = json.load(f)["glyphs"][{letter!r}]
+answer = entry["bbox"], entry["points"]
+""",
+    "binary index": """
+from glyph_index import read_binary_index
+entry = read_binary_index({binary_path!r})[1][{letter!r}]
+answer = entry["bbox"], entry["points"]
+""",
+    "ttf_reader": """
+from ttf_reader import FontReader
+with FontReader({font_path!r}) as font:
+    glyph = font.lookup({letter!r})
+    answer = list(glyph.bounds), len(glyph.points)
+""",
+    "fontTools": """
+import logging
+logging.disable(logging.WARNING)
+from fontTools.ttLib import TTFont
+font = TTFont({font_path!r})
+glyf = font["glyf"]
+glyph = glyf[font.getBestCmap()[ord({letter!r})]]
+answer = [glyph.xMin, glyph.yMin, glyph.xMax, glyph.yMax], len(glyph.getCoordinates(glyf)[0])
+""",
+}
+QUERY_SETUP = """
+import time
+start = time.perf_counter()
+"""
+QUERY_REPORT = """
+import json
+print(json.dumps([time.perf_counter() - start, answer]))
+"""
+
+def query(name, paths, letter, repeat):
+    """Return the median seconds a way takes in a fresh interpreter, and its answer"""
+    code = QUERY_SETUP + QUERIES[name].format(letter=letter, **paths) + QUERY_REPORT
+    times = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, "-c", code], cwd=SOURCE_DIR, capture_output=True, text=True,
+                                check=True).stdout
+        seconds, answer = json.loads(output)
+        times.append(seconds)
+    return float(np.median(times)), answer
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--font", default=DEFAULT_FONT, help="font the index was written for (default: %(default)s)")
+    parser.add_argument("--letter", default="c", help="letter to ask about (default: %(default)s)")
+    parser.add_argument("--runs", type=int, default=10,
+                        help="fresh interpreters per way, of which the median counts (default: %(default)s)")
+    args = parser.parse_args()
+    font_path = os.path.abspath(args.font)
+    json_path, binary_path = index_paths(font_path)
+    if not os.path.exists(binary_path):
+        sys.exit(f"{binary_path} does not exist yet; run a build first")
+    paths = {"font_path": font_path, "json_path": json_path, "binary_path": binary_path}
+
+    print(f"{'':>14}{'ms':>8}  answer")
+    answers = set()
+    for name in QUERIES:
+        seconds, answer = query(name, paths, args.letter, args.runs)
+        answers.add(json.dumps(answer))
+        print(f"{name:>14}{seconds * 1000:>8.2f}  bbox {answer[0]}, {answer[1]} points")
+    if len(answers) > 1:
+        sys.exit("The answers differ; the index is out of date with the font")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""Compare the NumPy rasterizer with FreeType rendering the built font
+
+Every letter is rendered at each size twice: from its outline by
+source/rasterizer.py, as the images are made, and by FreeType through
+Pillow from a font built for the purpose, placed to show the same part of
+the em. The report gives the time each takes and how far apart their
+coverage is, on average and at worst, across the image. The font's
+coordinates are rounded to whole units, so the two differ a little along
+the edges, and at small sizes FreeType moves edges onto the pixel grid,
+so the two are only held to agree at larger sizes.
+"""
+import os
+import sys
+import time
+import string
+import argparse
+import tempfile
+import contextlib
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "source"))
+import generate_shapes as shapes
+from rasterizer import render_outline
+
+# The average difference in coverage allowed before the rasterizer counts as
+# wrong, from this size up
+MAX_MEAN_DIFFERENCE = 0.01
+MIN_CHECKED_SIZE = 200
+
+def view_box(size):
+    """Return the images' view box moved so the glyph origin falls on a whole pixel
+
+    Pillow draws text at whole pixels, so both renderings place the glyph
+    there. The origin is on the baseline, y = FONT_SIZE in drawing
+    coordinates, and returned in pixels too.
+    """
+    left, top, width, height = shapes.IMAGE_VIEW_BOX
+    scale = size / max(width, height)
+    origin = np.round(np.array([-left, shapes.FONT_SIZE - top]) * scale)
+    return (-origin[0] / scale, shapes.FONT_SIZE - origin[1] / scale, width, height), tuple(origin.tolist())
+
+def freetype_coverage(font_path, letter, size):
+    """Return FreeType's coverage of a letter, placed as in view_box()"""
+    _, _, width, height = shapes.IMAGE_VIEW_BOX
+    font = ImageFont.truetype(font_path, shapes.FONT_SIZE * size / max(width, height))
+    image = Image.new("L", (size, size))
+    ImageDraw.Draw(image).text(view_box(size)[1], letter, font=font, fill=255, anchor="ls")
+    return np.asarray(image) / 255
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="64,500", help="comma-separated image sizes (default: %(default)s)")
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="timed runs of each size, of which the fastest counts (default: %(default)s)")
+    args = parser.parse_args()
+
+    letters = string.ascii_lowercase
+    outlines = [shapes.draw_letter_outline(letter) for letter in letters]
+    with tempfile.TemporaryDirectory() as directory:
+        font_path = os.path.join(directory, "Phonics.ttf")
+        with contextlib.redirect_stdout(open(os.devnull, "w")):
+            shapes.write_letter_font(font_path, letters)
+
+        failed = False
+        print(f"{'size':>6}{'NumPy (ms)':>12}{'FreeType (ms)':>15}{'mean diff':>11}{'max diff':>10}")
+        for size in [int(size) for size in args.sizes.split(",")]:
+            numpy_time = freetype_time = float("inf")
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                rendered = [render_outline(outline, size, view_box(size)[0]) for outline in outlines]
+                numpy_time = min(numpy_time, time.perf_counter() - start)
+                start = time.perf_counter()
+                expected = [freetype_coverage(font_path, letter, size) for letter in letters]
+                freetype_time = min(freetype_time, time.perf_counter() - start)
+            differences = [np.abs(ours - theirs) for ours, theirs in zip(rendered, expected)]
+            mean = max(difference.mean() for difference in differences)
+            worst = max(difference.max() for difference in differences)
+            failed |= size >= MIN_CHECKED_SIZE and mean > MAX_MEAN_DIFFERENCE
+            print(f"{size:>6}{numpy_time * 1000:>12.1f}{freetype_time * 1000:>15.1f}{mean:>11.4f}{worst:>10.2f}")
+    print("\nTimes are for all 26 letters; differences are the largest over the letters.")
+    if failed:
+        sys.exit(f"The rasterizer differs from FreeType by more than {MAX_MEAN_DIFFERENCE} on average "
+                 f"at {MIN_CHECKED_SIZE} pixels or more")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""Compare glyphs built with and without overlap removal
+
+For each letter this reports the number of contours and points, the size
+of the compiled glyph and how long FreeType (through Pillow) takes to
+render it, first as drawn and then with overlapping contours merged.
+"""
+import os
+import sys
+import time
+import string
+import argparse
+import tempfile
+import contextlib
+from PIL import Image, ImageDraw, ImageFont
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "source"))
+import generate_shapes as shapes
+import stroke
+
+def build(remove_overlaps, path):
+    """Build the font into `path` and return its compiled glyph data by letter"""
+    line_style = stroke.LINE_WIDTH, stroke.LINE_JOIN, stroke.LINE_CAP
+    shapes.apply_drawing_settings(None, None, None, remove_overlaps, line_style)
+    compiled = shapes.build_letter_glyph_data(string.ascii_lowercase)
+    with contextlib.redirect_stdout(open(os.devnull, "w")):
+        font = shapes.add_letter_glyphs_to_font(shapes.create_empty_font())
+    shapes.save_font(shapes.encoded_font(font), path)
+    return compiled
+
+def render_times(path, size, repeat):
+    """Return the average time in seconds to render each letter"""
+    font = ImageFont.truetype(path, size)
+    image = Image.new("L", (size * 2, size * 2))
+    draw = ImageDraw.Draw(image)
+    times = {}
+    for letter in string.ascii_lowercase:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            draw.text((size // 2, size // 2), letter, font=font, fill=255)
+        times[letter] = (time.perf_counter() - start) / repeat
+    return times
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=512, help="rendering size in pixels (default: %(default)s)")
+    parser.add_argument("--repeat", type=int, default=200,
+                        help="renders per glyph when timing (default: %(default)s)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        results = []
+        for remove_overlaps in (False, True):
+            path = os.path.join(directory, f"overlaps-{remove_overlaps}.ttf")
+            start = time.perf_counter()
+            compiled = build(remove_overlaps, path)
+            build_time = time.perf_counter() - start
+            results.append((compiled, render_times(path, args.size, args.repeat), build_time,
+                            os.path.getsize(path)))
+
+    (before, before_times, before_build, before_size), (after, after_times, after_build, after_size) = results
+    print(f"{'':6}{'contours':>14}{'points':>14}{'bytes':>14}{'render (us)':>18}")
+    totals = [0] * 8
+    for letter in string.ascii_lowercase:
+        old = shapes.glyph_data_stats(before[letter])
+        new = shapes.glyph_data_stats(after[letter])
+        row = (old[0], new[0], old[1], new[1], len(before[letter]), len(after[letter]),
+               before_times[letter] * 1e6, after_times[letter] * 1e6)
+        totals = [total + value for total, value in zip(totals, row)]
+        print(f"{letter:6}{row[0]:>6} -> {row[1]:<5}{row[2]:>6} -> {row[3]:<5}{row[4]:>6} -> {row[5]:<5}"
+              f"{row[6]:>8.1f} -> {row[7]:<7.1f}")
+    print(f"{'total':6}{totals[0]:>6} -> {totals[1]:<5}{totals[2]:>6} -> {totals[3]:<5}{totals[4]:>6} -> {totals[5]:<5}"
+          f"{totals[6]:>8.1f} -> {totals[7]:<7.1f}")
+    print(f"\nFont size: {before_size} -> {after_size} bytes")
+    print(f"Glyph build time: {before_build * 1000:.0f} -> {after_build * 1000:.0f} ms")
+
+if __name__ == "__main__":
+    main()
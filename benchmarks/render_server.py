@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""Measure the render server's latency under concurrent clients
+
+A server is started on a free port in a separate process, or an already
+running one is used with --port. Each client thread keeps a connection
+open and sends its share of the requests. Each workload is timed per
+request:
+
+    glyph     letter pictures at a few sizes, so concurrent clients often
+              ask for the same one and share its render
+    burst     every request for the same large picture, all at once
+    render    short texts wrapped to a width
+    svg       letter pictures as SVG, written at startup
+    304       revalidations with If-None-Match, answered without rendering
+
+The report gives requests per second and the median and 99th percentile
+latency of each, and the server's count of renders and shared renders.
+"""
+import os
+import re
+import sys
+import time
+import signal
+import string
+import argparse
+import subprocess
+import http.client
+from urllib.parse import urlencode
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+SOURCE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "source")
+TEXTS = ["sam", "olivia", "the cat sat", "big red dog", "we can play", "jump"]
+GLYPH_SIZES = [64, 128, 256]
+
+def workload_paths(name, requests):
+    """Return the paths requested by a workload"""
+    letters = string.ascii_lowercase
+    if name == "glyph":
+        return [f"/glyph/{letters[index % 13]}.png?size={GLYPH_SIZES[index // 13 % len(GLYPH_SIZES)]}"
+                for index in range(requests)]
+    if name == "burst":
+        return ["/glyph/z.png?size=1000"] * requests
+    if name == "render":
+        return ["/render?" + urlencode({"text": TEXTS[index % len(TEXTS)], "size": 48, "width": 320})
+                for index in range(requests)]
+    return [f"/glyph/{letters[index % len(letters)]}.svg" for index in range(requests)]
+
+def client(port, paths, headers):
+    """Send the requests over one connection and return (latency in seconds, status) of each"""
+    connection = http.client.HTTPConnection("127.0.0.1", port)
+    results = []
+    for path in paths:
+        start = time.perf_counter()
+        connection.request("GET", path, headers=headers.get(path, {}))
+        response = connection.getresponse()
+        response.read()
+        results.append((time.perf_counter() - start, response.status))
+    connection.close()
+    return results
+
+def run(port, clients, paths, revalidate=None):
+    """Send `paths` from `clients` threads and return (requests per second, latencies, status codes)"""
+    headers = {path: {"If-None-Match": etag} for path, etag in (revalidate or {}).items()}
+    shares = [paths[index::clients] for index in range(clients)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(clients) as executor:
+        results = [result for share in executor.map(lambda share: client(port, share, headers), shares)
+                   for result in share]
+    seconds = time.perf_counter() - start
+    return len(paths) / seconds, np.array([latency for latency, _ in results]), {status for _, status in results}
+
+def etags(port, paths):
+    """Return the ETag of each distinct path"""
+    connection = http.client.HTTPConnection("127.0.0.1", port)
+    tags = {}
+    for path in dict.fromkeys(paths):
+        connection.request("HEAD", path)
+        response = connection.getresponse()
+        response.read()
+        tags[path] = response.getheader("ETag")
+    connection.close()
+    return tags
+
+def start_server(workers):
+    """Start a quiet render server in a new process and return it with its port"""
+    command = [sys.executable, "-u", os.path.join(SOURCE_DIR, "render_server.py"), "--port", "0", "--quiet"]
+    if workers:
+        command += ["--workers", str(workers)]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    line = process.stdout.readline()
+    match = re.search(r":(\d+)/", line)
+    if match is None:
+        process.kill()
+        sys.exit(f"The render server didn't start: {line.strip()}")
+    return process, int(match.group(1))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, help="port of a render server already running on this machine")
+    parser.add_argument("--workers", type=int, help="rendering processes of the server started")
+    parser.add_argument("--clients", default="1,8,32",
+                        help="comma-separated numbers of concurrent clients (default: %(default)s)")
+    parser.add_argument("--requests", type=int, default=300,
+                        help="requests per measurement (default: %(default)s)")
+    args = parser.parse_args()
+
+    process = None
+    port = args.port
+    if port is None:
+        process, port = start_server(args.workers)
+    try:
+        print(f"{'workload':>9}{'clients':>9}{'req/s':>9}{'p50 (ms)':>10}{'p99 (ms)':>10}")
+        for clients in [int(count) for count in args.clients.split(",")]:
+            for name in ("glyph", "burst", "render", "svg", "304"):
+                paths = workload_paths("glyph" if name == "304" else name, args.requests)
+                revalidate = etags(port, paths) if name == "304" else None
+                rate, latencies, statuses = run(port, clients, paths, revalidate)
+                if statuses != {304 if name == "304" else 200}:
+                    sys.exit(f"Unexpected responses to {name}: {sorted(statuses)}")
+                p50, p99 = np.percentile(latencies, [50, 99]) * 1000
+                print(f"{name:>9}{clients:>9}{rate:>9.0f}{p50:>10.1f}{p99:>10.1f}")
+    finally:
+        if process is not None:
+            process.send_signal(signal.SIGINT)
+            report = process.communicate(timeout=30)[0].strip()
+            print()
+            print(report)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""Measure how many text images per second render_text() makes
+
+Children's names and sight words are rendered over and over at a few
+sizes, in three ways: by a TextRenderer whose glyph bitmaps are already
+cached, by one with no cache, so every glyph is rasterized again, and by
+Pillow drawing each line of the same layout with ImageFont, which also
+rasterizes every glyph on each call. The report gives images per second
+for each.
+"""
+import os
+import sys
+import time
+import logging
+import argparse
+from PIL import Image, ImageDraw, ImageFont
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "source"))
+from text_render import DEFAULT_FONT, TextRenderer
+
+TEXTS = ["sam", "olivia", "the cat sat on the mat", "jump", "big red dog", "see you at the zoo",
+         "maximilian", "we can play", "look at the kite go up", "a b c d e f g"]
+
+def pillow_render(renderer, fonts, text, size, width):
+    """Render text as render_text() lays it out, by drawing each line with Pillow"""
+    (image_width, image_height), _ = renderer.layout(text, size, width)
+    image = Image.new("RGBA", (image_width, image_height))
+    draw = ImageDraw.Draw(image)
+    scale = size / renderer.units_per_em
+    line_height = (renderer.ascent + renderer.descent + renderer.line_gap) * scale
+    padding = -(-renderer.overhang * size // renderer.units_per_em)
+    for number, line in enumerate(renderer.wrap(text, size, width)):
+        baseline = round(renderer.ascent * scale + number * line_height)
+        draw.text((padding, baseline), line, font=fonts[size], fill=(0, 0, 0, 255), anchor="ls")
+    return image
+
+def images_per_second(render, jobs, repeat):
+    """Return the best rate over `repeat` runs of rendering every (text, size, width) in `jobs`"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for text, size, width in jobs:
+            render(text, size, width)
+        best = min(best, time.perf_counter() - start)
+    return len(jobs) / best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="32,64,128", help="comma-separated pixels per em (default: %(default)s)")
+    parser.add_argument("--width", type=float, default=6,
+                        help="width to wrap to, in ems of the size (default: %(default)s)")
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="timed runs of each way, of which the fastest counts (default: %(default)s)")
+    parser.add_argument("--font", default=DEFAULT_FONT, help="font to render with (default: %(default)s)")
+    args = parser.parse_args()
+
+    # The font's creation date of zero makes fontTools warn as it loads it
+    logging.getLogger("fontTools.ttLib.tables._h_e_a_d").setLevel(logging.ERROR)
+    sizes = [int(size) for size in args.sizes.split(",")]
+    cached = TextRenderer(args.font)
+    uncached = TextRenderer(args.font, cache_size=0)
+    fonts = {size: ImageFont.truetype(args.font, size) for size in sizes}
+    print(f"{'px/em':>6}{'cached':>10}{'no cache':>10}{'Pillow':>10}   (images/s)")
+    for size in sizes:
+        jobs = [(text, size, round(args.width * size)) for text in TEXTS]
+        for text, _, width in jobs:
+            cached.render_text(text, size, width)
+        rates = [images_per_second(cached.render_text, jobs, args.repeat),
+                 images_per_second(uncached.render_text, jobs, args.repeat),
+                 images_per_second(lambda text, size, width: pillow_render(cached, fonts, text, size, width),
+                                   jobs, args.repeat)]
+        print(f"{size:>6}" + "".join(f"{rate:>10.0f}" for rate in rates))
+    print(cached.cache.report())
+
+if __name__ == "__main__":
+    main()
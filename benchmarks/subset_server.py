@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""Measure the subset server's throughput under concurrent clients
+
+A server is started in this process on a free port, and each client
+thread keeps a connection open and sends its share of the requests. Three
+workloads are timed: requests for texts whose subsets are cached, the
+same requests with the cache disabled so every one is subset afresh, and
+revalidations with If-None-Match that are answered 304 Not Modified.
+"""
+import os
+import sys
+import time
+import argparse
+import threading
+import http.client
+from urllib.parse import urlencode
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "source"))
+from subset_server import DEFAULT_FONT, SubsetServer
+
+# Words from the worksheets, a few of which share their letters
+TEXTS = ["cat", "act", "dog", "god", "apple", "ball", "fish", "house", "kite", "lion",
+         "nest", "queen", "snake", "tiger", "yacht", "zebra"]
+
+def start_server(font_path, cache_size):
+    """Start a quiet subset server on a free port in a background thread"""
+    server = SubsetServer(("127.0.0.1", 0), font_path, cache_size, quiet=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def client(port, paths, headers):
+    """Send the requests over one connection and return the status codes"""
+    connection = http.client.HTTPConnection("127.0.0.1", port)
+    statuses = []
+    for path in paths:
+        connection.request("GET", path, headers=headers.get(path, {}))
+        response = connection.getresponse()
+        response.read()
+        statuses.append(response.status)
+    connection.close()
+    return statuses
+
+def run(port, clients, requests, flavor, revalidate=None):
+    """Send `requests` requests from `clients` threads and return (requests per second, status codes)
+
+    `revalidate` maps paths to the ETags to send with If-None-Match.
+    """
+    paths = ["/subset?" + urlencode({"text": TEXTS[index % len(TEXTS)], "format": flavor})
+             for index in range(requests)]
+    headers = {path: {"If-None-Match": etag} for path, etag in (revalidate or {}).items()}
+    shares = [paths[index::clients] for index in range(clients)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(clients) as executor:
+        results = list(executor.map(lambda share: client(port, share, headers), shares))
+    seconds = time.perf_counter() - start
+    return requests / seconds, {status for statuses in results for status in statuses}
+
+def etags(port, flavor):
+    """Return the ETag of each text's subset"""
+    connection = http.client.HTTPConnection("127.0.0.1", port)
+    tags = {}
+    for text in TEXTS:
+        path = "/subset?" + urlencode({"text": text, "format": flavor})
+        connection.request("GET", path)
+        response = connection.getresponse()
+        response.read()
+        tags[path] = response.getheader("ETag")
+    connection.close()
+    return tags
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--font", default=DEFAULT_FONT, help="font file to subset (default: %(default)s)")
+    parser.add_argument("--clients", default="1,4,16",
+                        help="comma-separated numbers of concurrent clients (default: %(default)s)")
+    parser.add_argument("--requests", type=int, default=400,
+                        help="requests per measurement (default: %(default)s)")
+    parser.add_argument("--format", default="woff", help="subset format to request (default: %(default)s)")
+    args = parser.parse_args()
+
+    cached = start_server(args.font, 16 * 1024 * 1024)
+    uncached = start_server(args.font, 0)
+    tags = etags(cached.server_address[1], args.format)
+    print(f"{'clients':>8}{'cached (req/s)':>17}{'uncached (req/s)':>19}{'304 (req/s)':>14}")
+    for clients in [int(count) for count in args.clients.split(",")]:
+        cached_rate, cached_statuses = run(cached.server_address[1], clients, args.requests, args.format)
+        uncached_rate, uncached_statuses = run(uncached.server_address[1], clients, args.requests, args.format)
+        revalidated_rate, revalidated_statuses = run(cached.server_address[1], clients, args.requests,
+                                                     args.format, tags)
+        if cached_statuses | uncached_statuses != {200} or revalidated_statuses != {304}:
+            sys.exit(f"Unexpected responses: {sorted(cached_statuses | uncached_statuses | revalidated_statuses)}")
+        print(f"{clients:>8}{cached_rate:>17.0f}{uncached_rate:>19.0f}{revalidated_rate:>14.0f}")
+    print()
+    print(cached.cache.report())
+    for server in (cached, uncached):
+        server.shutdown()
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""Compare glyph bitmap caches kept by each worker process with one in shared memory
+
+Several worker processes set the same texts with render_text(), as the
+render server's workers do, all starting at once. With their own caches
+each worker rasterizes and stores every glyph at every size; with a
+SharedTileCache a glyph rasterized by one worker is read by the others
+from shared memory. The report gives, for each number of workers, the
+glyphs rasterized in all, the memory the caches hold, the time the first
+round of texts took, which includes warming the cache, and the images
+made per second over the whole run.
+"""
+import os
+import sys
+import time
+import logging
+import argparse
+import multiprocessing
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "source"))
+from text_render import DEFAULT_FONT, TextRenderer
+from tile_cache import TILE_SIZE, SharedTileCache
+
+TEXTS = ["sam", "olivia", "the cat sat on the mat", "jump", "big red dog", "see you at the zoo",
+         "maximilian", "we can play", "look at the kite go up", "quick brown fox"]
+
+def worker(font_path, tiles, sizes, rounds, start, results):
+    """Set every text at every size `rounds` times, and report the counts and when the rounds ended"""
+    logging.getLogger("fontTools.ttLib.tables._h_e_a_d").setLevel(logging.ERROR)
+    renderer = TextRenderer(font_path, cache=tiles)
+    start.wait()
+    for number in range(rounds):
+        for size in sizes:
+            for text in TEXTS:
+                renderer.render_text(text, size, 6 * size)
+        if number == 0:
+            first = time.monotonic()
+    # Bitmaps too large for the shared cache's slots are cached by each worker
+    cache = renderer.cache if tiles is None else renderer.fallback
+    oversized = 0 if tiles is None else tiles.oversized
+    results.put((renderer.rasterized, cache.size, oversized, first, time.monotonic()))
+
+def run(workers, font_path, tiles, sizes, rounds):
+    """Run the workers together and return (rasterizations, cache bytes, bitmaps too large to share,
+    seconds until every worker finished its first round, images per second overall)
+    """
+    start = multiprocessing.Event()
+    results = multiprocessing.Queue()
+    processes = [multiprocessing.Process(target=worker, args=(font_path, tiles, sizes, rounds, start, results))
+                 for _ in range(workers)]
+    for process in processes:
+        process.start()
+    # Give the workers time to load the font before they start together
+    time.sleep(1)
+    began = time.monotonic()
+    start.set()
+    reports = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    misses = sum(report[0] for report in reports)
+    size = sum(report[1] for report in reports) + (0 if tiles is None else tiles.stored()[1])
+    oversized = sum(report[2] for report in reports)
+    images = workers * rounds * len(sizes) * len(TEXTS)
+    return (misses, size, oversized, max(report[3] for report in reports) - began,
+            images / (max(report[4] for report in reports) - began))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", default="1,2,4", help="comma-separated numbers of workers (default: %(default)s)")
+    parser.add_argument("--sizes", default="24,32,48,64", help="comma-separated pixels per em (default: %(default)s)")
+    parser.add_argument("--rounds", type=int, default=5,
+                        help="times each worker sets every text at every size (default: %(default)s)")
+    parser.add_argument("--tile-size", type=int, default=TILE_SIZE,
+                        help="kilobytes per shared cache slot (default: %(default)s)")
+    parser.add_argument("--font", default=DEFAULT_FONT, help="font to set the texts in (default: %(default)s)")
+    args = parser.parse_args()
+    if args.rounds < 1:
+        parser.error("--rounds must be at least 1")
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    print(f"{'workers':>8}{'cache':>9}{'rasterized':>12}{'cache KB':>10}{'first round s':>15}{'images/s':>10}")
+    for workers in [int(count) for count in args.workers.split(",")]:
+        for name in ("each", "shared"):
+            tiles = SharedTileCache.create(tile_size=args.tile_size * 1024) if name == "shared" else None
+            try:
+                misses, size, oversized, first, rate = run(workers, args.font, tiles, sizes, args.rounds)
+            finally:
+                if tiles is not None:
+                    tiles.close()
+            print(f"{workers:>8}{name:>9}{misses:>12}{size / 1024:>10.0f}{first:>15.2f}{rate:>10.0f}")
+            if oversized:
+                print(f"{oversized} bitmaps didn't fit {args.tile_size} KB slots and were cached by each worker; "
+                      "pass a larger --tile-size")
+    print("\nWith each worker caching for itself, rasterizing and memory grow with the number of workers;")
+    print("with the shared cache each glyph is rasterized about once and stored once.")
+
+if __name__ == "__main__":
+    main()
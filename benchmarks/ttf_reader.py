@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""Compare the lazy, memory-mapped font reader with fontTools
+
+Cold start is timed in fresh interpreters. Each one imports the reader,
+opens the font and decodes the glyph of one character, and reports how
+long each step took. The reader must not have imported NumPy by then.
+Per-lookup latency is timed in this process: a lookup maps a character
+to its glyph and returns the glyph's points.
+With fontTools that is getBestCmap(), done once, and
+Glyph.getCoordinates(). Both keep the glyphs they have decoded, so the
+first lookup of each glyph, which decodes it, is timed apart from
+repeated ones. Both must give the same points for every character.
+"""
+import os
+import sys
+import json
+import time
+import string
+import logging
+import argparse
+import subprocess
+import numpy as np
+
+SOURCE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "source")
+sys.path.insert(0, SOURCE_DIR)
+from text_render import DEFAULT_FONT
+
+# Run in a fresh interpreter: import, open and look up one character,
+# printing the seconds each took and whether NumPy was imported as JSON
+COLD_START_SETUP = """
+import time
+start = time.perf_counter()
+"""
+COLD_START = {
+    "reader": """
+from ttf_reader import FontReader
+imported = time.perf_counter()
+font = FontReader({path!r})
+opened = time.perf_counter()
+font.lookup("a")
+""",
+    "fontTools": """
+from fontTools.ttLib import TTFont
+imported = time.perf_counter()
+font = TTFont({path!r})
+opened = time.perf_counter()
+glyf = font["glyf"]
+glyf[font.getBestCmap()[ord("a")]].getCoordinates(glyf)
+""",
+}
+COLD_START_REPORT = """
+done = time.perf_counter()
+import sys
+import json
+print(json.dumps([[imported - start, opened - imported, done - opened], "numpy" in sys.modules]))
+"""
+
+def cold_start(name, path, repeat):
+    """Return the median (import, open, first lookup) seconds of a way over fresh interpreters, and if it imported NumPy"""
+    code = COLD_START_SETUP + COLD_START[name].format(path=path) + COLD_START_REPORT
+    runs = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, "-c", code], cwd=SOURCE_DIR, capture_output=True, text=True,
+                                check=True).stdout
+        steps, imported_numpy = json.loads(output)
+        runs.append(steps)
+    return np.median(np.array(runs), axis=0), imported_numpy
+
+def lookup_time(open_font, characters, repeat, first):
+    """Return the fastest seconds per lookup over `repeat` runs through the characters
+
+    `open_font` returns a lookup function for a newly opened font. With
+    `first`, each run opens the font again, so every lookup decodes its
+    glyph; otherwise one font is warmed up and looked up in again.
+    """
+    lookup = open_font()
+    for character in characters:
+        lookup(character)
+    best = float("inf")
+    for _ in range(repeat):
+        if first:
+            lookup = open_font()
+        start = time.perf_counter()
+        for character in characters:
+            lookup(character)
+        best = min(best, time.perf_counter() - start)
+    return best / len(characters)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--font", default=DEFAULT_FONT, help="font to read (default: %(default)s)")
+    parser.add_argument("--cold-runs", type=int, default=10,
+                        help="fresh interpreters per way, of which the median counts (default: %(default)s)")
+    parser.add_argument("--repeat", type=int, default=200,
+                        help="timed runs through the alphabet, of which the fastest counts (default: %(default)s)")
+    args = parser.parse_args()
+    path = os.path.abspath(args.font)
+
+    print(f"{'cold start':>10}{'import ms':>11}{'open ms':>9}{'lookup ms':>11}{'total ms':>10}")
+    for name in COLD_START:
+        steps, imported_numpy = cold_start(name, path, args.cold_runs)
+        steps *= 1000
+        print(f"{name:>10}" + "".join(f"{step:>{width}.2f}" for step, width in zip(steps, (11, 9, 11)))
+              + f"{steps.sum():>10.2f}")
+        if name == "reader" and imported_numpy:
+            sys.exit("The reader imported NumPy to look up a glyph")
+
+    from ttf_reader import FontReader
+    from fontTools.ttLib import TTFont
+    logging.getLogger("fontTools.ttLib.tables._h_e_a_d").setLevel(logging.ERROR)
+    characters = string.ascii_lowercase
+
+    def open_reader():
+        return FontReader(path).lookup
+
+    def open_font_tools():
+        font = TTFont(path)
+        cmap = font.getBestCmap()
+        # Loading the table only splits it into glyph records
+        glyf = font["glyf"]
+        return lambda character: glyf[cmap[ord(character)]].getCoordinates(glyf)
+
+    reader_lookup = open_reader()
+    font_tools_lookup = open_font_tools()
+    for character in characters:
+        points, on_curve, ends = reader_lookup(character).arrays()
+        coordinates, end_points, flags = font_tools_lookup(character)
+        if not (np.array_equal(points, np.array(coordinates).reshape(-1, 2))
+                and np.array_equal(ends, np.array(end_points) + 1)
+                and np.array_equal(on_curve, np.array(flags) & 1 != 0)):
+            sys.exit(f"The reader decoded '{character}' differently from fontTools")
+
+    print(f"\n{'µs/lookup':>10}{'first':>9}{'repeat':>9}")
+    for name, open_font in (("reader", open_reader), ("fontTools", open_font_tools)):
+        first = lookup_time(open_font, characters, args.repeat, first=True)
+        repeat = lookup_time(open_font, characters, args.repeat, first=False)
+        print(f"{name:>10}{first * 1e6:>9.1f}{repeat * 1e6:>9.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""A segment pen that applies an affine transform to whole contours at once"""
+import numpy as np
+from fontTools.misc.transform import Identity, Transform
+
+class AffinePen:
+    """A pen wrapper that transforms everything drawn through it
+
+    It implements the whole fontTools segment pen protocol (moveTo, lineTo,
+    qCurveTo, curveTo, closePath, endPath and addComponent). Points are
+    collected until the contour ends and then transformed together with
+    one matrix product, rather than one Python call per point.
+
+    The transform is anything accepted by fontTools' Transform, such as a
+    (xx, xy, yx, yy, dx, dy) tuple, so flips, changes of units per em and
+    offsets can be composed into a single pen:
+
+        Transform().translate(0, upm).scale(upm / 1000, -upm / 1000)
+    """
+    def __init__(self, pen, transform=Identity):
+        self.pen = pen
+        self.transform = Transform(*transform)
+        xx, xy, yx, yy, dx, dy = self.transform
+        self._matrix = np.array([[xx, xy], [yx, yy]], dtype=np.float64)
+        self._offset = np.array([dx, dy], dtype=np.float64)
+        # Pending segments of the current contour as (method name, number of points)
+        self._segments = []
+        self._points = []
+
+    def transform_points(self, points):
+        """Return an (n, 2) array of points with the transform applied"""
+        return np.asarray(points, dtype=np.float64).reshape(-1, 2) @ self._matrix + self._offset
+
+    def _add(self, name, points):
+        self._segments.append((name, len(points)))
+        self._points.extend(points)
+
+    def _flush(self):
+        """Transform the pending contour and replay it into the wrapped pen"""
+        if not self._segments:
+            return
+        # qCurveTo may end with None for a contour made only of off-curve points
+        known = [pt for pt in self._points if pt is not None]
+        transformed = iter(self.transform_points(known).tolist())
+        points = [None if pt is None else tuple(next(transformed)) for pt in self._points]
+
+        start = 0
+        for name, count in self._segments:
+            getattr(self.pen, name)(*points[start:start + count])
+            start += count
+        self._segments = []
+        self._points = []
+
+    def moveTo(self, pt):
+        self._flush()
+        self._add("moveTo", [pt])
+
+    def lineTo(self, pt):
+        self._add("lineTo", [pt])
+
+    def qCurveTo(self, *points):
+        self._add("qCurveTo", points)
+
+    def curveTo(self, *points):
+        self._add("curveTo", points)
+
+    def closePath(self):
+        self._flush()
+        self.pen.closePath()
+
+    def endPath(self):
+        self._flush()
+        self.pen.endPath()
+
+    def addComponent(self, glyphName, transformation):
+        self._flush()
+        self.pen.addComponent(glyphName, self.transform.transform(transformation))
+
+    def polyline(self, points, close=True):
+        """Draw a whole polygon given as an (n, 2) array in one call"""
+        self._flush()
+        points = self.transform_points(points)
+        if hasattr(self.pen, "polyline"):
+            self.pen.polyline(points, close)
+            return
+        points = points.tolist()
+        self.pen.moveTo(tuple(points[0]))
+        for point in points[1:]:
+            self.pen.lineTo(tuple(point))
+        if close:
+            self.pen.closePath()
+        else:
+            self.pen.endPath()
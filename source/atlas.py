@@ -0,0 +1,128 @@
+"""Packing glyph rasters into a single texture atlas
+
+Clients that draw the pictures themselves would otherwise load one image
+per letter. Instead each glyph is rasterized at a chosen number of pixels
+per em, cropped to the pixels it covers, and packed with the others into
+one image by a skyline packer: the packed area's top edge is kept as a
+list of horizontal segments, and each glyph, tallest first, goes where it
+would sit lowest. The index records where each glyph is in the atlas, in
+pixels and as texture coordinates, along with the metrics needed to place
+it on a baseline.
+"""
+import math
+import numpy as np
+from rasterizer import render_outline
+
+def glyph_raster(outline, pixels_per_em, units_per_em, margin):
+    """Rasterize an outline and crop it to the pixels it covers
+
+    The outline is in drawing coordinates, with the em square from (0, 0)
+    to (units_per_em, units_per_em) and its baseline along the bottom, and
+    may reach `margin` units outside it. Returns the cropped coverage and
+    the position of its top left corner relative to the glyph origin, in
+    pixels, with y growing upwards like the font's.
+    """
+    scale = pixels_per_em / units_per_em
+    # Whole pixels of margin keep the origin on a pixel corner
+    margin_pixels = math.ceil(margin * scale)
+    size = pixels_per_em + 2 * margin_pixels
+    coverage = render_outline(outline, size, (-margin_pixels / scale, -margin_pixels / scale,
+                                              size / scale, size / scale))
+    rows = np.flatnonzero(coverage.any(axis=1))
+    columns = np.flatnonzero(coverage.any(axis=0))
+    if not len(rows):
+        return np.zeros((0, 0)), 0, 0
+    cropped = coverage[rows[0]:rows[-1] + 1, columns[0]:columns[-1] + 1]
+    return cropped, int(columns[0]) - margin_pixels, margin_pixels + pixels_per_em - int(rows[0])
+
+def atlas_width(sizes, padding):
+    """Return a power of two width that fits the widest rectangle and should give a roughly square atlas"""
+    area = sum((width + padding) * (height + padding) for width, height in sizes)
+    widest = max((width for width, _ in sizes), default=0) + 2 * padding
+    return 1 << max(math.ceil(math.log2(max(math.sqrt(area), widest, 1))), 0)
+
+def skyline_pack(sizes, width, padding=0):
+    """Place (width, height) rectangles in an area `width` wide, and return their positions and the height used
+
+    Positions are the top left corners, in the order of `sizes`, with at
+    least `padding` pixels between rectangles and around the edges.
+    Rectangles of no area aren't placed and get (0, 0).
+    """
+    # Segments of the top edge of the packed area, left to right, as
+    # (x, y, width); each rectangle takes its padding on the right and below
+    skyline = [(padding, padding, width - padding)]
+    positions = [(0, 0)] * len(sizes)
+    height = padding
+    order = sorted(range(len(sizes)), key=lambda index: (-sizes[index][1], -sizes[index][0]))
+    for index in order:
+        rect_width, rect_height = sizes[index]
+        if rect_width == 0 or rect_height == 0:
+            continue
+        needed = rect_width + padding
+        best = None
+        for start, (x, _, _) in enumerate(skyline):
+            if x + needed > width:
+                break
+            # The rectangle rests on the highest segment under it
+            y, end = 0, start
+            while skyline[end][0] < x + needed:
+                y = max(y, skyline[end][1])
+                end += 1
+                if end == len(skyline):
+                    break
+            if best is None or (y, x) < best[:2]:
+                best = (y, x, start, end)
+        if best is None:
+            raise ValueError(f"a rectangle {rect_width} wide doesn't fit an atlas {width} wide")
+        y, x, start, end = best
+        positions[index] = (x, y)
+        height = max(height, y + rect_height + padding)
+
+        # The rectangle's top replaces the segments it covers; the last of
+        # them may stick out beyond it
+        last_x, last_y, last_width = skyline[end - 1]
+        replaced = [(x, y + rect_height + padding, needed)]
+        if last_x + last_width > x + needed:
+            replaced.append((x + needed, last_y, last_x + last_width - x - needed))
+        skyline[start:end] = replaced
+        # Join neighbouring segments at the same height
+        merged = [skyline[0]]
+        for segment in skyline[1:]:
+            if segment[1] == merged[-1][1]:
+                merged[-1] = (merged[-1][0], merged[-1][1], merged[-1][2] + segment[2])
+            else:
+                merged.append(segment)
+        skyline = merged
+    return positions, height
+
+def build_atlas(rasters, padding=2):
+    """Pack cropped glyph coverages into one array
+
+    Returns the atlas coverage and the (x, y) position of each raster in
+    it, in the order given.
+    """
+    sizes = [(raster.shape[1], raster.shape[0]) for raster in rasters]
+    width = atlas_width(sizes, padding)
+    positions, height = skyline_pack(sizes, width, padding)
+    atlas = np.zeros((height, width))
+    for raster, (x, y) in zip(rasters, positions):
+        atlas[y:y + raster.shape[0], x:x + raster.shape[1]] = raster
+    return atlas, positions
+
+def atlas_index(image_name, atlas_shape, pixels_per_em, glyphs):
+    """Return the index of an atlas as a dictionary ready for JSON
+
+    `glyphs` holds (character, raster shape, atlas position, left, top,
+    advance) for each glyph, with the metrics in pixels as returned by
+    glyph_raster() and `advance` the distance to the next glyph's origin.
+    """
+    height, width = atlas_shape
+    entries = {}
+    for character, (rows, columns), (x, y), left, top, advance in glyphs:
+        entries[character] = {
+            "x": x, "y": y, "width": columns, "height": rows,
+            "uv": [x / width, y / height, (x + columns) / width, (y + rows) / height],
+            "left": left, "top": top, "advance": advance,
+        }
+    return {"image": image_name, "width": width, "height": height, "pixels_per_em": pixels_per_em,
+            "glyphs": entries}
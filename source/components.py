@@ -0,0 +1,173 @@
+"""Sharing repeated contours between glyphs as TrueType components
+
+Many glyphs repeat a shape: the seeds of the watermelon, a pair of eyes,
+the same face circle in several animals. Once glyphs are compiled their
+contours are in integer font units, so two contours are the same shape
+if one is an exact translation of the other. deduplicate() fingerprints
+every contour up to translation, moves each shape that is used often
+enough to pay for itself into a hidden base glyph, and turns the glyphs
+using it into composite glyphs that place the base glyph with an offset.
+
+A composite glyph can't hold contours of its own, so a glyph's remaining
+contours move into one more base glyph named after it. A glyph is only
+converted when that makes it smaller.
+
+A composite glyph expands to exactly the outline it replaces: the same
+contours, from the same start points, in the same order. FreeType's
+anti-aliasing of overlapping contours changes with either, so shapes
+only match from the start point they were drawn from, and a glyph is
+only converted if its remaining contours are consecutive, so the base
+glyph holding them can go where they were.
+"""
+import struct
+from array import array
+from collections import Counter
+import numpy as np
+from fontTools.ttLib.tables._g_l_y_f import Glyph, GlyphComponent, GlyphCoordinates
+from fontTools.ttLib.tables import ttProgram
+
+# Names of the shared base glyphs are this followed by a number
+BASE_GLYPH_PREFIX = "component."
+# Suffix of the base glyph holding the contours a glyph doesn't share
+OUTLINE_SUFFIX = ".outline"
+# Bytes each extra glyph costs besides its contours: the glyf header, the
+# instruction length, and its loca and hmtx entries
+GLYPH_OVERHEAD = 10 + 2 + 4 + 4
+
+def glyph_contours(data):
+    """Return the contours of compiled simple glyph data as (points, on_curve) pairs"""
+    glyph = Glyph(data)
+    glyph.expand(None)
+    points = np.array(glyph.coordinates, dtype=np.int64).reshape(-1, 2)
+    on_curve = np.array(glyph.flags, dtype=np.uint8) & 1
+    starts = [0] + [end + 1 for end in glyph.endPtsOfContours[:-1]]
+    return [(points[start:end + 1], on_curve[start:end + 1])
+            for start, end in zip(starts, glyph.endPtsOfContours)]
+
+class Shape:
+    """A contour moved so its start point is at the origin
+
+    `offset` is where the start point was in the glyph.
+    """
+    __slots__ = ("points", "on_curve", "offset", "key")
+
+    def __init__(self, points, on_curve):
+        self.offset = tuple(points[0].tolist())
+        self.points = points - points[0]
+        self.on_curve = on_curve
+        self.key = self.points.tobytes() + self.on_curve.tobytes()
+
+    def size(self):
+        """Return the bytes this contour takes in a simple glyph, roughly"""
+        deltas = np.diff(self.points, axis=0, prepend=self.points[:1])
+        # Each coordinate takes 0, 1 or 2 bytes; each point a flag byte and
+        # each contour an end point index
+        return 2 + len(self.points) + int(np.minimum(np.abs(deltas) // 256 + (deltas != 0), 2).sum())
+
+def simple_glyph(contours):
+    """Return a simple glyph of (points, on_curve) contours"""
+    glyph = Glyph()
+    glyph.numberOfContours = len(contours)
+    glyph.coordinates = GlyphCoordinates(np.vstack([points for points, _ in contours]).tolist())
+    glyph.flags = array("B", np.concatenate([on_curve for _, on_curve in contours]).tolist())
+    glyph.endPtsOfContours = (np.cumsum([len(points) for points, _ in contours]) - 1).tolist()
+    glyph.program = ttProgram.Program()
+    glyph.program.fromBytecode(b"")
+    glyph.recalcBounds(None)
+    return glyph
+
+def composite_glyph(components):
+    """Return a composite glyph placing (glyph name, x, y) components"""
+    glyph = Glyph()
+    glyph.numberOfContours = -1
+    glyph.components = []
+    for name, x, y in components:
+        component = GlyphComponent()
+        component.glyphName = name
+        component.x, component.y = x, y
+        component.flags = 0
+        glyph.components.append(component)
+    glyph.xMin = glyph.yMin = glyph.xMax = glyph.yMax = 0
+    return glyph
+
+def component_size(x, y):
+    """Return the bytes a component reference with offset (x, y) takes"""
+    # Flags and glyph index, then the offsets as bytes or words
+    return 4 + (2 if -128 <= x <= 127 and -128 <= y <= 127 else 4)
+
+def keeps_order(glyph_shapes, shared):
+    """Return whether a glyph's contours that aren't shared are consecutive
+
+    They go into one base glyph, so only then can the composite glyph
+    place its components in the order of the contours they replace.
+    """
+    rest = [index for index, shape in enumerate(glyph_shapes) if shape.key not in shared]
+    return not rest or rest[-1] - rest[0] + 1 == len(rest)
+
+def deduplicate(glyphs):
+    """Share repeated contours of compiled glyphs through component glyphs
+
+    `glyphs` maps glyph names to compiled glyf data. Returns a dictionary
+    mapping the same names, in the same order, followed by the names of
+    any new base glyphs, to fontTools Glyph objects. Glyphs that don't
+    gain from it are returned unchanged.
+    """
+    shapes = {}
+    for name, data in glyphs.items():
+        if data and struct.unpack(">h", data[:2])[0] > 0:
+            shapes[name] = [Shape(points, on_curve) for points, on_curve in glyph_contours(data)]
+
+    def plan(shared):
+        """Return the glyphs worth converting with the given shared shapes"""
+        converted = {}
+        for name, glyph_shapes in shapes.items():
+            used = [shape for shape in glyph_shapes if shape.key in shared]
+            if not used or not keeps_order(glyph_shapes, shared):
+                continue
+            rest = [shape for shape in glyph_shapes if shape.key not in shared]
+            size = 10 + sum(component_size(*shape.offset) for shape in used)
+            if rest:
+                size += GLYPH_OVERHEAD + component_size(0, 0) + sum(shape.size() for shape in rest)
+            if size < 12 + sum(shape.size() for shape in glyph_shapes):
+                converted[name] = used
+        return converted
+
+    def worth_sharing(uses, sizes):
+        # Stored once in a glyph of its own, plus a reference with word
+        # offsets, as most are, for each use
+        return {key for key, count in uses.items()
+                if count > 1 and sizes[key] + GLYPH_OVERHEAD + 8 * count < sizes[key] * count}
+
+    sizes = {shape.key: shape.size() for glyph_shapes in shapes.values() for shape in glyph_shapes}
+    shared = worth_sharing(Counter(shape.key for glyph_shapes in shapes.values() for shape in glyph_shapes),
+                           sizes)
+    # Glyphs that don't convert don't use the shared shapes, which can make
+    # other shapes no longer worth sharing; repeat until nothing changes
+    while True:
+        converted = plan(shared)
+        uses = Counter(shape.key for used in converted.values() for shape in used)
+        still_shared = worth_sharing(uses, sizes)
+        if still_shared == shared:
+            break
+        shared = still_shared
+
+    result = {name: Glyph(data) for name, data in glyphs.items()}
+    bases = {}
+    for name, used in converted.items():
+        components = []
+        rest = [shape for shape in shapes[name] if shape.key not in shared]
+        for shape in shapes[name]:
+            if shape.key not in shared:
+                # The base glyph of the remaining contours goes where the
+                # first of them was
+                if shape is rest[0]:
+                    result[name + OUTLINE_SUFFIX] = simple_glyph([(shape.points + shape.offset, shape.on_curve)
+                                                                  for shape in rest])
+                    components.append((name + OUTLINE_SUFFIX, 0, 0))
+                continue
+            if shape.key not in bases:
+                bases[shape.key] = f"{BASE_GLYPH_PREFIX}{len(bases) + 1}"
+                result[bases[shape.key]] = simple_glyph([(shape.points, shape.on_curve)])
+            components.append((bases[shape.key], *shape.offset))
+        result[name] = composite_glyph(components)
+    return result
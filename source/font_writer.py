@@ -0,0 +1,286 @@
+"""Streaming TrueType font writer for large glyph sets
+
+Saving a TTFont needs every glyph in memory at once, as glyph objects in
+its glyf table. FontWriter takes compiled glyf records one at a time
+instead and spools them to a temporary file, keeping only each glyph's
+name, record length, metrics and character codes, and running totals of
+the head, hhea, maxp and OS/2 values that depend on the glyphs. write() then
+compiles the small tables with fontTools, copies the spooled records into
+the glyf table in chunks, and fills in the table directory and checksums.
+Memory use hardly grows with the number of glyphs.
+
+Tables are laid out the way fontTools lays them out, so for the same
+glyphs the file is byte-identical to saving the whole font with fontTools.
+"""
+import math
+import struct
+import tempfile
+from array import array
+import numpy as np
+from fontTools.ttLib import getSearchRange
+from fontTools.ttLib.sfnt import calcChecksum
+from fontTools.ttLib.ttFont import sortedTagList
+from glyf_encoder import encode_loca, glyf_locations, glyph_data_stats
+
+SFNT_VERSION = b"\0\1\0\0"
+SFNT_HEADER = struct.Struct(">4sHHHH")
+TABLE_RECORD = struct.Struct(">4sLLL")
+# The checksum of the whole font, checkSumAdjustment included, adds up to this
+CHECKSUM_MAGIC = 0xB1B0AFBA
+# Where checkSumAdjustment is in the head table
+CHECKSUM_ADJUSTMENT_OFFSET = 8
+# Bytes of glyf data copied from the spool at a time
+COPY_CHUNK_SIZE = 1 << 16
+# Tables written from the glyph data rather than compiled from the template font
+GLYPH_TABLES = ("glyf", "loca", "hmtx")
+
+class GlyphStats:
+    """Running totals of the head, hhea, maxp and OS/2 values that depend on the glyphs
+
+    They are read from each glyph's glyf header as it is added, so the
+    font needn't be parsed again once it is complete. The head, hhea and
+    maxp values come out the same as fontTools' recalculation when saving
+    a font.
+    """
+    def __init__(self):
+        self.num_glyphs = 0
+        self.max_points = self.max_contours = 0
+        self.max_composite_points = self.max_composite_contours = 0
+        self.max_component_elements = self.max_component_depth = 0
+        self.bounds = None
+        self.advance_width_max = 0
+        # Of the glyphs with an advance, for OS/2 xAvgCharWidth
+        self.advance_total = self.advance_count = 0
+        self.min_left_side_bearing = self.min_right_side_bearing = self.x_max_extent = None
+        self.all_x_min_are_lsb = True
+
+    def add(self, data, advance, lsb=None, composite=None):
+        """Count a glyph's compiled glyf data and horizontal metrics, and return its left side bearing
+
+        Without an `lsb` the left side bearing is the glyph's xMin, where
+        TrueType expects it. `composite` gives the (points, contours,
+        component elements, component depth) of a composite glyph, which
+        depend on the glyphs it uses and can't be read from its own data.
+        """
+        self.num_glyphs += 1
+        self.advance_width_max = max(self.advance_width_max, advance)
+        if advance > 0:
+            self.advance_total += advance
+            self.advance_count += 1
+        num_contours, num_points, x_min, y_min, x_max, y_max = glyph_data_stats(data)
+        if lsb is None:
+            lsb = x_min
+        if num_contours == 0:
+            return lsb
+        if num_contours > 0:
+            self.max_points = max(self.max_points, num_points)
+            self.max_contours = max(self.max_contours, num_contours)
+        elif composite is not None:
+            points, contours, elements, depth = composite
+            self.max_composite_points = max(self.max_composite_points, points)
+            self.max_composite_contours = max(self.max_composite_contours, contours)
+            self.max_component_elements = max(self.max_component_elements, elements)
+            self.max_component_depth = max(self.max_component_depth, depth)
+        if self.bounds is None:
+            self.bounds = [x_min, y_min, x_max, y_max]
+        else:
+            self.bounds = [min(self.bounds[0], x_min), min(self.bounds[1], y_min),
+                           max(self.bounds[2], x_max), max(self.bounds[3], y_max)]
+
+        if lsb != x_min:
+            self.all_x_min_are_lsb = False
+        width = x_max - x_min
+        if self.min_left_side_bearing is None:
+            self.min_left_side_bearing = lsb
+            self.min_right_side_bearing = advance - lsb - width
+            self.x_max_extent = lsb + width
+        else:
+            self.min_left_side_bearing = min(self.min_left_side_bearing, lsb)
+            self.min_right_side_bearing = min(self.min_right_side_bearing, advance - lsb - width)
+            self.x_max_extent = max(self.x_max_extent, lsb + width)
+        return lsb
+
+    def apply(self, font):
+        """Store the totals in the font's head, hhea, maxp and OS/2 tables"""
+        maxp = font['maxp']
+        maxp.numGlyphs = self.num_glyphs
+        maxp.maxPoints = self.max_points
+        maxp.maxContours = self.max_contours
+        maxp.maxCompositePoints = self.max_composite_points
+        maxp.maxCompositeContours = self.max_composite_contours
+        maxp.maxComponentElements = self.max_component_elements
+        maxp.maxComponentDepth = self.max_component_depth
+
+        head = font['head']
+        head.xMin, head.yMin, head.xMax, head.yMax = self.bounds or (0, 0, 0, 0)
+        if self.all_x_min_are_lsb:
+            head.flags |= 0x2
+
+        hhea = font['hhea']
+        hhea.advanceWidthMax = self.advance_width_max
+        if self.min_left_side_bearing is None:
+            hhea.minLeftSideBearing = hhea.minRightSideBearing = hhea.xMaxExtent = 0
+        else:
+            hhea.minLeftSideBearing = self.min_left_side_bearing
+            hhea.minRightSideBearing = self.min_right_side_bearing
+            hhea.xMaxExtent = self.x_max_extent
+
+        if 'OS/2' in font:
+            os2 = font['OS/2']
+            # Rounded half up, like fontTools' otRound
+            os2.xAvgCharWidth = math.floor(self.advance_total / self.advance_count + 0.5) if self.advance_count else 0
+            # Windows clips glyphs to these, so they cover every glyph as well
+            # as the line
+            os2.usWinAscent = max(hhea.ascent, head.yMax)
+            os2.usWinDescent = max(-hhea.descent, -head.yMin)
+
+class RunningChecksum:
+    """The checksum of a table written in pieces of any length"""
+    def __init__(self):
+        self.value = 0
+        self._pending = b""
+
+    def update(self, data):
+        data = self._pending + bytes(data)
+        whole = len(data) - len(data) % 4
+        words = np.frombuffer(data, dtype=">u4", count=whole // 4)
+        self.value = (self.value + int(words.sum(dtype=np.uint64))) & 0xFFFFFFFF
+        self._pending = data[whole:]
+
+    def result(self):
+        """Return the checksum, with the data padded to whole words"""
+        return (self.value + calcChecksum(self._pending)) & 0xFFFFFFFF
+
+def encode_hmtx(advances, lsbs):
+    """Return the hmtx table for the given advance widths and left side bearings, and its number of long metrics
+
+    Glyphs at the end with the same advance as the last long metric only
+    store their left side bearing, as fontTools compiles it.
+    """
+    advances = np.asarray(advances, dtype=np.int64)
+    lsbs = np.asarray(lsbs, dtype=np.int64)
+    differ = np.flatnonzero(advances[:-1] != advances[-1])
+    count = int(differ[-1]) + 2 if len(differ) else 1
+    long_metrics = np.column_stack((advances[:count], lsbs[:count] & 0xFFFF)).astype(">u2")
+    return long_metrics.tobytes() + lsbs[count:].astype(">i2").tobytes(), count
+
+class FontWriter:
+    """Write a TrueType font from compiled glyf records added one at a time
+
+    `font` is a TTFont holding every table but the glyphs, such as one
+    from create_empty_font(); its glyf, loca and hmtx tables are written
+    from the glyphs added, its cmap subtables get their character codes,
+    and its head, hhea, maxp and OS/2 tables the values worked out from
+    them.
+    Use it as a context manager, or call close(), to remove the spool.
+    """
+    def __init__(self, font, spool_dir=None):
+        self.font = font
+        self.stats = GlyphStats()
+        self._spool = tempfile.TemporaryFile(dir=spool_dir)
+        self._glyph_order = []
+        self._lengths = array("I")
+        self._advances = array("H")
+        self._lsbs = array("h")
+        self._mapping = {}
+
+    def __len__(self):
+        return len(self._glyph_order)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Remove the spooled glyph data"""
+        self._spool.close()
+
+    def add_glyph(self, glyph_name, data, advance, lsb=None, unicodes=(), composite=None):
+        """Spool a glyph's compiled glyf data and record its metrics and character codes
+
+        Glyphs are written in the order they are added. `lsb` and
+        `composite` are as for GlyphStats.add().
+        """
+        self._spool.write(data)
+        self._glyph_order.append(glyph_name)
+        self._lengths.append(len(data))
+        self._advances.append(advance)
+        self._lsbs.append(self.stats.add(data, advance, lsb, composite))
+        for unicode_value in unicodes:
+            self._mapping[unicode_value] = glyph_name
+
+    def _write_glyf(self, file, padded):
+        """Copy the spooled glyf records into `file`, and return the table's length and checksum"""
+        self._spool.flush()
+        self._spool.seek(0)
+        checksum = RunningChecksum()
+        length = 0
+        chunk = bytearray()
+        for record_length, pad in zip(self._lengths, padded.tolist()):
+            chunk += self._spool.read(record_length)
+            if pad:
+                chunk += b"\0"
+            if len(chunk) >= COPY_CHUNK_SIZE:
+                file.write(chunk)
+                checksum.update(chunk)
+                length += len(chunk)
+                chunk = bytearray()
+        if length + len(chunk) == 0:
+            # A glyf table with no data at all is given a zero byte, as fontTools does
+            chunk = bytearray(b"\0")
+        file.write(chunk)
+        checksum.update(chunk)
+        return length + len(chunk), checksum.result()
+
+    def write(self, file):
+        """Write the font to a seekable binary file"""
+        font = self.font
+        font.recalcBBoxes = False
+        font.setGlyphOrder(self._glyph_order)
+        for subtable in font['cmap'].tables:
+            subtable.cmap.update(self._mapping)
+        self.stats.apply(font)
+
+        padded, locations = glyf_locations(np.frombuffer(self._lengths, dtype=np.uint32))
+        tables = {}
+        tables['loca'], font['head'].indexToLocFormat = encode_loca(locations)
+        tables['hmtx'], font['hhea'].numberOfHMetrics = encode_hmtx(self._advances, self._lsbs)
+        for tag in font.keys():
+            if tag != 'GlyphOrder' and tag not in GLYPH_TABLES:
+                tables[tag] = font[tag].compile(font)
+        tags = sortedTagList(list(tables) + ['glyf'])
+
+        # Tables follow the header and the table directory, each starting
+        # on a four byte boundary
+        start = file.tell()
+        file.seek(start + SFNT_HEADER.size + TABLE_RECORD.size * len(tags))
+        records = {}
+        for tag in tags:
+            offset = file.tell()
+            if tag == 'glyf':
+                length, checksum = self._write_glyf(file, padded)
+            else:
+                data = tables[tag]
+                if tag == 'head':
+                    # The checksum adjustment isn't known yet and doesn't count
+                    checksum = calcChecksum(data[:CHECKSUM_ADJUSTMENT_OFFSET] + b"\0\0\0\0"
+                                            + data[CHECKSUM_ADJUSTMENT_OFFSET + 4:])
+                else:
+                    checksum = calcChecksum(data)
+                length = len(data)
+                file.write(data)
+            file.write(b"\0" * (-length % 4))
+            records[tag] = (checksum, offset, length)
+        end = file.tell()
+
+        directory = SFNT_HEADER.pack(SFNT_VERSION, len(tags), *getSearchRange(len(tags), 16))
+        for tag in sorted(records):
+            directory += TABLE_RECORD.pack(tag.encode("latin-1"), *records[tag])
+        file.seek(start)
+        file.write(directory)
+        total = (sum(checksum for checksum, _, _ in records.values()) + calcChecksum(directory)) & 0xFFFFFFFF
+        file.seek(records['head'][1] + CHECKSUM_ADJUSTMENT_OFFSET)
+        file.write(struct.pack(">L", (CHECKSUM_MAGIC - total) & 0xFFFFFFFF))
+        file.seek(end)
@@ -1,43 +1,70 @@
 #!/usr/bin/env python3
 import os
+import json
 import string
 import math
-from PIL import Image, ImageDraw, ImageFont
+import argparse
+import tempfile
+import time
+from itertools import repeat
+from concurrent.futures import ProcessPoolExecutor
+from PIL import Image
 from fontTools.ttLib import TTFont, newTable
-from fontTools.pens.ttGlyphPen import TTGlyphPen
+from fontTools.ttLib.tables._g_l_y_f import Glyph
+from fontTools.ttLib.tables.DefaultTable import DefaultTable
 from fontTools.ttLib.tables import _c_m_a_p
 from fontTools.ttLib.tables.O_S_2f_2 import Panose
-
-class FlippedPen:
-    """A pen wrapper that flips y-coordinates vertically"""
-    def __init__(self, pen, font_size=1000):
-        self.pen = pen
-        self.font_size = font_size
-    
-    def flip_y(self, y):
-        """Flip y-coordinate around the center of the font"""
-        return self.font_size - y
-    
-    def moveTo(self, pt):
-        x, y = pt
-        self.pen.moveTo((x, self.flip_y(y)))
-    
-    def lineTo(self, pt):
-        x, y = pt
-        self.pen.lineTo((x, self.flip_y(y)))
-    
-    def closePath(self):
-        self.pen.closePath()
-    
-    def glyph(self):
-        return self.pen.glyph()
+from fontTools.misc.transform import Transform
+import numpy as np
+import affine_pen
+from affine_pen import AffinePen
+from glyph_cache import GlyphCache, fingerprint
+import glyph_outline
+from glyph_outline import GlyphRecord, Outline, OutlinePen
+import primitives
+import simplify
+from simplify import simplify_contour
+import union
+from union import union_outline
+import components
+from components import deduplicate
+from primitives import (Arc, circle, circle_points, contour, ellipse, half_disc,
+                        half_disc_points, rect)
+import stroke
+from stroke import line, ribbon
+import glyf_encoder
+from glyf_encoder import build_glyf_loca, encode_glyph, glyph_data_stats, start_on_curve
+from font_writer import FontWriter, GlyphStats
+from web_fonts import font_face_paths, size_report, update_font_face, write_web_fonts
+from rasterizer import render_outline
+from svg_export import SVG_PRECISION, svg_document
+from atlas import atlas_index, build_atlas, glyph_raster
+from glyph_index import write_glyph_index
 
 # Configuration
 FONT_NAME = "Phonics"
 OUTPUT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 IMAGES_DIR = os.path.join(OUTPUT_DIR, "images")
+SVG_DIR = os.path.join(OUTPUT_DIR, "svg")
+ATLAS_DIR = os.path.join(OUTPUT_DIR, "atlas")
 OUTPUT_FILE = os.path.join(OUTPUT_DIR, f"{FONT_NAME}.ttf")
+DEMO_FILE = os.path.join(OUTPUT_DIR, f"{FONT_NAME}Demo.html")
 FONT_SIZE = 1000  # Units per em
+GLYPH_CACHE_DIR = os.path.join(OUTPUT_DIR, ".glyph_cache")
+GLYPH_CACHE_SIZE = 64  # Megabytes
+# Part of every glyph cache key; bump it when a change to the build alters
+# glyphs in a way the key doesn't see
+GLYPH_CACHE_VERSION = 1
+CURVE_TOLERANCE = 1.0  # Font units, used with --curves
+SIMPLIFY_TOLERANCE = None  # Font units, set by --simplify
+REMOVE_OVERLAPS = False  # Set by --remove-overlaps
+# Drawing coordinates shown in the images: the em square with room around
+# it for pictures that reach outside it
+IMAGE_VIEW_BOX = (-250, -250, 1500, 1500)
+IMAGE_COLOR = (0, 0, 0)
+IMAGE_SIZES = "500"  # Pixels, set by --images
+SVG_SIZE = 500  # Pixels
+ATLAS_PADDING = 2  # Pixels between glyphs in the atlas, set by --atlas-padding
 
 # Ensure directories exist
 os.makedirs(IMAGES_DIR, exist_ok=True)
@@ -56,10 +83,11 @@ def create_empty_font():
     font['head'].unitsPerEm = FONT_SIZE
     font['head'].created = 0
     font['head'].modified = 0
+    # The bounding box is filled in from the glyphs by finalize_font()
     font['head'].xMin = 0
     font['head'].yMin = 0
-    font['head'].xMax = FONT_SIZE
-    font['head'].yMax = FONT_SIZE
+    font['head'].xMax = 0
+    font['head'].yMax = 0
     font['head'].macStyle = 0
     font['head'].lowestRecPPEM = 8
     font['head'].fontDirectionHint = 2
@@ -72,10 +100,10 @@ def create_empty_font():
     font['hhea'].ascent = int(FONT_SIZE * 0.8)
     font['hhea'].descent = int(FONT_SIZE * -0.2)
     font['hhea'].lineGap = 0
-    font['hhea'].advanceWidthMax = FONT_SIZE
+    font['hhea'].advanceWidthMax = 0  # Filled in from the glyphs
     font['hhea'].minLeftSideBearing = 0
     font['hhea'].minRightSideBearing = 0
-    font['hhea'].xMaxExtent = FONT_SIZE
+    font['hhea'].xMaxExtent = 0
     font['hhea'].caretSlopeRise = 1
     font['hhea'].caretSlopeRun = 0
     font['hhea'].caretOffset = 0
@@ -94,8 +122,8 @@ def create_empty_font():
     font['maxp'] = newTable('maxp')
     font['maxp'].tableVersion = 0x00010000
     font['maxp'].numGlyphs = 0
-    font['maxp'].maxPoints = 500  # Set reasonable defaults
-    font['maxp'].maxContours = 50
+    font['maxp'].maxPoints = 0  # Filled in from the glyphs
+    font['maxp'].maxContours = 0
     font['maxp'].maxCompositePoints = 0
     font['maxp'].maxCompositeContours = 0
     font['maxp'].maxZones = 2
@@ -127,7 +155,7 @@ def create_empty_font():
     # Create OS/2 table
     font['OS/2'] = newTable('OS/2')
     font['OS/2'].version = 4
-    font['OS/2'].xAvgCharWidth = 500
+    font['OS/2'].xAvgCharWidth = 0  # Filled in from the glyphs
     font['OS/2'].usWeightClass = 400
     font['OS/2'].usWidthClass = 5
     font['OS/2'].fsType = 0
@@ -146,6 +174,7 @@ def create_empty_font():
     font['OS/2'].sTypoAscender = font['hhea'].ascent
     font['OS/2'].sTypoDescender = font['hhea'].descent
     font['OS/2'].sTypoLineGap = font['hhea'].lineGap
+    # Raised to cover glyphs drawn outside the line by finalize_font()
     font['OS/2'].usWinAscent = font['hhea'].ascent
     font['OS/2'].usWinDescent = -font['hhea'].descent
     
@@ -227,18 +256,11 @@ def draw_apple(pen):
     radius = 400
     cx, cy = 500, 500
     
-    # Main apple body (circle)
-    pen.moveTo((cx, cy - radius))
-    
-    # Create a circle approximation using line segments
+    # Main apple body (circle), starting from the top, then around the
+    # circle from its second segment back to angle 0
     segments = 24
-    for i in range(1, segments + 1):
-        angle = 2 * math.pi * i / segments
-        x = cx + radius * math.cos(angle)
-        y = cy + radius * math.sin(angle)
-        pen.lineTo((x, y))
-    
-    pen.closePath()
+    step = 2 * math.pi / segments
+    contour(pen, [(cx, cy - radius)], Arc(cx, cy, radius, radius, step, 2 * math.pi - step, segments - 1))
     
     # Stem
     stem_width = 50
@@ -263,37 +285,22 @@ def draw_ball(pen):
     cx, cy = 500, 500
     
     # Main ball (circle)
-    pen.moveTo((cx + radius, cy))
     
     # Create a circle approximation using line segments
     segments = 24
-    for i in range(1, segments + 1):
-        angle = 2 * math.pi * i / segments
-        x = cx + radius * math.cos(angle)
-        y = cy + radius * math.sin(angle)
-        pen.lineTo((x, y))
-    
-    pen.closePath()
+    circle(pen, cx, cy, radius, segments)
     
     # Horizontal curve line
-    pen.moveTo((cx - radius/2, cy))
-    pen.lineTo((cx + radius/2, cy))
-    pen.closePath()
+    line(pen, [(cx - radius/2, cy), (cx + radius/2, cy)])
     
     # Vertical curve line
-    pen.moveTo((cx, cy - radius/2))
-    pen.lineTo((cx, cy + radius/2))
-    pen.closePath()
+    line(pen, [(cx, cy - radius/2), (cx, cy + radius/2)])
     
     # Diagonal line 1
-    pen.moveTo((cx - radius/3, cy - radius/3))
-    pen.lineTo((cx + radius/3, cy + radius/3))
-    pen.closePath()
+    line(pen, [(cx - radius/3, cy - radius/3), (cx + radius/3, cy + radius/3)])
     
     # Diagonal line 2
-    pen.moveTo((cx - radius/3, cy + radius/3))
-    pen.lineTo((cx + radius/3, cy - radius/3))
-    pen.closePath()
+    line(pen, [(cx - radius/3, cy + radius/3), (cx + radius/3, cy - radius/3)])
 
 def draw_cat(pen):
     """Draw a cat shape for 'c'"""
@@ -302,14 +309,8 @@ def draw_cat(pen):
     cx, cy = 500, 500
     
     # Cat face (circle)
-    pen.moveTo((cx + radius, cy))
     segments = 24
-    for i in range(1, segments + 1):
-        angle = 2 * math.pi * i / segments
-        x = cx + radius * math.cos(angle)
-        y = cy + radius * math.sin(angle)
-        pen.lineTo((x, y))
-    pen.closePath()
+    circle(pen, cx, cy, radius, segments)
     
     # Left ear (triangle)
     ear_size = 200
@@ -326,18 +327,10 @@ def draw_cat(pen):
     
     # Left eye
     eye_size = 80
-    pen.moveTo((cx - radius/3, cy - radius/5))
-    pen.lineTo((cx - radius/3 - eye_size, cy - radius/5))
-    pen.lineTo((cx - radius/3 - eye_size, cy - radius/5 - eye_size))
-    pen.lineTo((cx - radius/3, cy - radius/5 - eye_size))
-    pen.closePath()
+    rect(pen, cx - radius/3, cy - radius/5, cx - radius/3 - eye_size, cy - radius/5 - eye_size)
     
     # Right eye
-    pen.moveTo((cx + radius/3, cy - radius/5))
-    pen.lineTo((cx + radius/3 + eye_size, cy - radius/5))
-    pen.lineTo((cx + radius/3 + eye_size, cy - radius/5 - eye_size))
-    pen.lineTo((cx + radius/3, cy - radius/5 - eye_size))
-    pen.closePath()
+    rect(pen, cx + radius/3, cy - radius/5, cx + radius/3 + eye_size, cy - radius/5 - eye_size)
     
     # Nose (triangle)
     nose_size = 60
@@ -348,13 +341,11 @@ def draw_cat(pen):
     
     # Mouth (simplified whiskers)
     whisker_length = 150
-    pen.moveTo((cx - nose_size, cy + radius/5 + nose_size))
-    pen.lineTo((cx - nose_size - whisker_length, cy + radius/5 + 1.5*nose_size))
-    pen.closePath()
+    line(pen, [(cx - nose_size, cy + radius/5 + nose_size),
+               (cx - nose_size - whisker_length, cy + radius/5 + 1.5*nose_size)])
     
-    pen.moveTo((cx + nose_size, cy + radius/5 + nose_size))
-    pen.lineTo((cx + nose_size + whisker_length, cy + radius/5 + 1.5*nose_size))
-    pen.closePath()
+    line(pen, [(cx + nose_size, cy + radius/5 + nose_size),
+               (cx + nose_size + whisker_length, cy + radius/5 + 1.5*nose_size)])
 
 def draw_dog(pen):
     """Draw a dog shape for 'd'"""
@@ -363,14 +354,8 @@ def draw_dog(pen):
     cx, cy = 500, 500
     
     # Dog face (circle)
-    pen.moveTo((cx + radius, cy))
     segments = 24
-    for i in range(1, segments + 1):
-        angle = 2 * math.pi * i / segments
-        x = cx + radius * math.cos(angle)
-        y = cy + radius * math.sin(angle)
-        pen.lineTo((x, y))
-    pen.closePath()
+    circle(pen, cx, cy, radius, segments)
     
     # Left ear (floppy)
     ear_width = 200
@@ -392,32 +377,16 @@ def draw_dog(pen):
     
     # Left eye (oval)
     eye_radius = 60
-    pen.moveTo((cx - radius/3 + eye_radius, cy - radius/4))
     segments = 16
-    for i in range(1, segments + 1):
-        angle = 2 * math.pi * i / segments
-        x = cx - radius/3 + eye_radius * math.cos(angle)
-        y = cy - radius/4 + eye_radius * math.sin(angle)
-        pen.lineTo((x, y))
-    pen.closePath()
+    circle(pen, cx - radius/3, cy - radius/4, eye_radius, segments)
     
     # Right eye (oval)
-    pen.moveTo((cx + radius/3 + eye_radius, cy - radius/4))
-    for i in range(1, segments + 1):
-        angle = 2 * math.pi * i / segments
-        x = cx + radius/3 + eye_radius * math.cos(angle)
-        y = cy - radius/4 + eye_radius * math.sin(angle)
-        pen.lineTo((x, y))
-    pen.closePath()
+    circle(pen, cx + radius/3, cy - radius/4, eye_radius, segments)
     
     # Nose (rounded rectangle)
     nose_width = 150
     nose_height = 100
-    pen.moveTo((cx - nose_width/2, cy + radius/4))
-    pen.lineTo((cx + nose_width/2, cy + radius/4))
-    pen.lineTo((cx + nose_width/2, cy + radius/4 + nose_height))
-    pen.lineTo((cx - nose_width/2, cy + radius/4 + nose_height))
-    pen.closePath()
+    rect(pen, cx - nose_width/2, cy + radius/4, cx + nose_width/2, cy + radius/4 + nose_height)
 
 def draw_elephant(pen):
     """Draw an elephant shape for 'e'"""
@@ -426,56 +395,26 @@ def draw_elephant(pen):
     cx, cy = 500, 500
     
     # Elephant head (circle)
-    pen.moveTo((cx + head_radius, cy))
     segments = 24
-    for i in range(1, segments + 1):
-        angle = 2 * math.pi * i / segments
-        x = cx + head_radius * math.cos(angle)
-        y = cy + head_radius * math.sin(angle)
-        pen.lineTo((x, y))
-    pen.closePath()
+    circle(pen, cx, cy, head_radius, segments)
     
     # Left ear (large semicircle)
     ear_radius = 250
-    pen.moveTo((cx - head_radius, cy))
-    for i in range(0, 13):  # Half circle
-        angle = math.pi * i / 12
-        x = cx - head_radius + ear_radius * math.cos(angle + math.pi/2)
-        y = cy + ear_radius * math.sin(angle + math.pi/2)
-        pen.lineTo((x, y))
-    pen.closePath()
+    half_disc(pen, cx - head_radius, cy, ear_radius, ear_radius, 12, start=math.pi/2)
     
     # Right ear (large semicircle)
-    pen.moveTo((cx + head_radius, cy))
-    for i in range(0, 13):  # Half circle
-        angle = math.pi * i / 12
-        x = cx + head_radius + ear_radius * math.cos(angle - math.pi/2)
-        y = cy + ear_radius * math.sin(angle - math.pi/2)
-        pen.lineTo((x, y))
-    pen.closePath()
+    half_disc(pen, cx + head_radius, cy, ear_radius, ear_radius, 12, start=-math.pi/2)
     
     # Trunk
     trunk_width = 100
     trunk_length = 450
-    pen.moveTo((cx - trunk_width/2, cy + head_radius/2))
-    pen.lineTo((cx + trunk_width/2, cy + head_radius/2))
-    pen.lineTo((cx + trunk_width/2, cy + head_radius + trunk_length))
-    pen.lineTo((cx - trunk_width/2, cy + head_radius + trunk_length))
-    pen.closePath()
+    rect(pen, cx - trunk_width/2, cy + head_radius/2, cx + trunk_width/2, cy + head_radius + trunk_length)
     
     # Eyes
     eye_size = 50
-    pen.moveTo((cx - head_radius/3, cy - head_radius/3))
-    pen.lineTo((cx - head_radius/3 + eye_size, cy - head_radius/3))
-    pen.lineTo((cx - head_radius/3 + eye_size, cy - head_radius/3 + eye_size))
-    pen.lineTo((cx - head_radius/3, cy - head_radius/3 + eye_size))
-    pen.closePath()
+    rect(pen, cx - head_radius/3, cy - head_radius/3, cx - head_radius/3 + eye_size, cy - head_radius/3 + eye_size)
     
-    pen.moveTo((cx + head_radius/3, cy - head_radius/3))
-    pen.lineTo((cx + head_radius/3 + eye_size, cy - head_radius/3))
-    pen.lineTo((cx + head_radius/3 + eye_size, cy - head_radius/3 + eye_size))
-    pen.lineTo((cx + head_radius/3, cy - head_radius/3 + eye_size))
-    pen.closePath()
+    rect(pen, cx + head_radius/3, cy - head_radius/3, cx + head_radius/3 + eye_size, cy - head_radius/3 + eye_size)
 
 def draw_fish(pen):
     """Draw a fish shape for 'f'"""
@@ -485,14 +424,8 @@ def draw_fish(pen):
     cx, cy = 450, 500
     
     # Fish body (oval)
-    pen.moveTo((cx + body_width/2, cy))
     segments = 24
-    for i in range(1, segments + 1):
-        angle = 2 * math.pi * i / segments
-        x = cx + body_width/2 * math.cos(angle)
-        y = cy + body_height/2 * math.sin(angle)
-        pen.lineTo((x, y))
-    pen.closePath()
+    ellipse(pen, cx, cy, body_width/2, body_height/2, segments)
     
     # Tail fin (triangle)
     tail_size = 200
@@ -504,11 +437,7 @@ def draw_fish(pen):
     
     # Eye
     eye_size = 40
-    pen.moveTo((cx - body_width/4, cy - body_height/4))
-    pen.lineTo((cx - body_width/4 + eye_size, cy - body_height/4))
-    pen.lineTo((cx - body_width/4 + eye_size, cy - body_height/4 + eye_size))
-    pen.lineTo((cx - body_width/4, cy - body_height/4 + eye_size))
-    pen.closePath()
+    rect(pen, cx - body_width/4, cy - body_height/4, cx - body_width/4 + eye_size, cy - body_height/4 + eye_size)
     
     # Dorsal fin
     fin_width = 100
@@ -527,21 +456,11 @@ def draw_giraffe(pen):
     neck_length = 400
     
     # Giraffe head (oval)
-    pen.moveTo((cx + head_size/2, cy - neck_length))
     segments = 16
-    for i in range(1, segments + 1):
-        angle = 2 * math.pi * i / segments
-        x = cx + head_size/2 * math.cos(angle)
-        y = cy - neck_length + head_size/1.5 * math.sin(angle)
-        pen.lineTo((x, y))
-    pen.closePath()
+    ellipse(pen, cx, cy - neck_length, head_size/2, head_size/1.5, segments)
     
     # Neck
-    pen.moveTo((cx - neck_width/2, cy))
-    pen.lineTo((cx + neck_width/2, cy))
-    pen.lineTo((cx + neck_width/2, cy - neck_length + head_size/2))
-    pen.lineTo((cx - neck_width/2, cy - neck_length + head_size/2))
-    pen.closePath()
+    rect(pen, cx - neck_width/2, cy, cx + neck_width/2, cy - neck_length + head_size/2)
     
     # Ears
     ear_size = 40
@@ -557,24 +476,14 @@ def draw_giraffe(pen):
     
     # Eye
     eye_size = 20
-    pen.moveTo((cx - head_size/4, cy - neck_length - head_size/4))
-    pen.lineTo((cx - head_size/4 + eye_size, cy - neck_length - head_size/4))
-    pen.lineTo((cx - head_size/4 + eye_size, cy - neck_length - head_size/4 + eye_size))
-    pen.lineTo((cx - head_size/4, cy - neck_length - head_size/4 + eye_size))
-    pen.closePath()
+    rect(pen, cx - head_size/4, cy - neck_length - head_size/4, cx - head_size/4 + eye_size, cy - neck_length - head_size/4 + eye_size)
     
     # Giraffe spots (several circles)
     spot_size = 50
     for i in range(5):
         x = cx - neck_width/4 + (i % 2) * neck_width/2
         y = cy - i * neck_length/5 - neck_length/10
-        pen.moveTo((x + spot_size/2, y))
-        for j in range(1, 9):
-            angle = 2 * math.pi * j / 8
-            px = x + spot_size/2 * math.cos(angle)
-            py = y + spot_size/2 * math.sin(angle)
-            pen.lineTo((px, py))
-        pen.closePath()
+        circle(pen, x, y, spot_size/2, 8)
 
 def draw_house(pen):
     """Draw a house shape for 'h'"""
@@ -585,11 +494,7 @@ def draw_house(pen):
     roof_height = 250
     
     # House body (square)
-    pen.moveTo((cx - house_width/2, cy))
-    pen.lineTo((cx + house_width/2, cy))
-    pen.lineTo((cx + house_width/2, cy + house_height))
-    pen.lineTo((cx - house_width/2, cy + house_height))
-    pen.closePath()
+    rect(pen, cx - house_width/2, cy, cx + house_width/2, cy + house_height)
     
     # Roof (triangle)
     pen.moveTo((cx - house_width/2, cy))
@@ -600,26 +505,14 @@ def draw_house(pen):
     # Door
     door_width = 150
     door_height = 250
-    pen.moveTo((cx - door_width/2, cy + house_height))
-    pen.lineTo((cx + door_width/2, cy + house_height))
-    pen.lineTo((cx + door_width/2, cy + house_height - door_height))
-    pen.lineTo((cx - door_width/2, cy + house_height - door_height))
-    pen.closePath()
+    rect(pen, cx - door_width/2, cy + house_height, cx + door_width/2, cy + house_height - door_height)
     
     # Window (left)
     window_size = 120
-    pen.moveTo((cx - house_width/4 - window_size/2, cy + house_height/3))
-    pen.lineTo((cx - house_width/4 + window_size/2, cy + house_height/3))
-    pen.lineTo((cx - house_width/4 + window_size/2, cy + house_height/3 + window_size))
-    pen.lineTo((cx - house_width/4 - window_size/2, cy + house_height/3 + window_size))
-    pen.closePath()
+    rect(pen, cx - house_width/4 - window_size/2, cy + house_height/3, cx - house_width/4 + window_size/2, cy + house_height/3 + window_size)
     
     # Window (right)
-    pen.moveTo((cx + house_width/4 - window_size/2, cy + house_height/3))
-    pen.lineTo((cx + house_width/4 + window_size/2, cy + house_height/3))
-    pen.lineTo((cx + house_width/4 + window_size/2, cy + house_height/3 + window_size))
-    pen.lineTo((cx + house_width/4 - window_size/2, cy + house_height/3 + window_size))
-    pen.closePath()
+    rect(pen, cx + house_width/4 - window_size/2, cy + house_height/3, cx + house_width/4 + window_size/2, cy + house_height/3 + window_size)
 
 def draw_igloo(pen):
     """Draw an igloo shape for 'i'"""
@@ -631,35 +524,26 @@ def draw_igloo(pen):
     entrance_height = 150
     
     # Main dome (half circle)
-    pen.moveTo((cx - width/2, cy))
-    for i in range(0, 13):  # Half circle
-        angle = math.pi * i / 12
-        x = cx + width/2 * math.cos(angle + math.pi)
-        y = cy + height * math.sin(angle + math.pi)
-        pen.lineTo((x, y))
-    pen.closePath()
+    half_disc(pen, cx, cy, width/2, height, 12)
     
-    # Snow blocks (horizontal lines)
+    # Snow blocks (horizontal lines across the dome, stopping short of its
+    # edge and of the entrance)
     block_height = 50
-    for y_pos in range(int(cy), int(cy - height), -int(block_height)):
-        pen.moveTo((cx - width/2, y_pos))
-        pen.lineTo((cx + width/2, y_pos))
-        pen.closePath()
+    margin = 20
+    for y_pos in range(int(cy - block_height), int(cy - height), -int(block_height)):
+        half_width = width/2 * math.sqrt(1 - ((cy - y_pos) / height)**2) - margin
+        if cy - y_pos <= entrance_height:
+            line(pen, [(cx - half_width, y_pos), (cx - entrance_width/2 - margin, y_pos)])
+            line(pen, [(cx + entrance_width/2 + margin, y_pos), (cx + half_width, y_pos)])
+        else:
+            line(pen, [(cx - half_width, y_pos), (cx + half_width, y_pos)])
     
     # Entrance cutout
-    pen.moveTo((cx - entrance_width/2, cy))
-    pen.lineTo((cx + entrance_width/2, cy))
-    pen.lineTo((cx + entrance_width/2, cy - entrance_height))
-    pen.lineTo((cx - entrance_width/2, cy - entrance_height))
-    pen.closePath()
+    rect(pen, cx - entrance_width/2, cy, cx + entrance_width/2, cy - entrance_height)
     
     # Dot above (typical for letter 'i')
     dot_size = 80
-    pen.moveTo((cx - dot_size/2, cy - height - 100))
-    pen.lineTo((cx + dot_size/2, cy - height - 100))
-    pen.lineTo((cx + dot_size/2, cy - height - 100 - dot_size))
-    pen.lineTo((cx - dot_size/2, cy - height - 100 - dot_size))
-    pen.closePath()
+    rect(pen, cx - dot_size/2, cy - height - 100, cx + dot_size/2, cy - height - 100 - dot_size)
 
 def draw_jellyfish(pen):
     """Draw a jellyfish shape for 'j'"""
@@ -670,13 +554,7 @@ def draw_jellyfish(pen):
     tentacle_length = 400
     
     # Bell (half-circle)
-    pen.moveTo((cx - bell_width/2, cy))
-    for i in range(0, 13):  # Half circle
-        angle = math.pi * i / 12
-        x = cx + bell_width/2 * math.cos(angle + math.pi)
-        y = cy + bell_height * math.sin(angle + math.pi)
-        pen.lineTo((x, y))
-    pen.closePath()
+    half_disc(pen, cx, cy, bell_width/2, bell_height, 12)
     
     # Tentacles (multiple lines)
     num_tentacles = 7
@@ -702,11 +580,7 @@ def draw_jellyfish(pen):
     
     # Dot above (typical for letter 'j')
     dot_size = 80
-    pen.moveTo((cx - dot_size/2, cy - bell_height - 100))
-    pen.lineTo((cx + dot_size/2, cy - bell_height - 100))
-    pen.lineTo((cx + dot_size/2, cy - bell_height - 100 - dot_size))
-    pen.lineTo((cx - dot_size/2, cy - bell_height - 100 - dot_size))
-    pen.closePath()
+    rect(pen, cx - dot_size/2, cy - bell_height - 100, cx + dot_size/2, cy - bell_height - 100 - dot_size)
 
 def draw_kite(pen):
     """Draw a kite shape for 'k'"""
@@ -724,32 +598,26 @@ def draw_kite(pen):
     pen.closePath()
     
     # Kite cross-spars
-    pen.moveTo((cx - kite_width/2, cy))
-    pen.lineTo((cx + kite_width/2, cy))
-    pen.closePath()
+    line(pen, [(cx - kite_width/2, cy), (cx + kite_width/2, cy)])
     
-    pen.moveTo((cx, cy - kite_height/2))
-    pen.lineTo((cx, cy + kite_height/2))
-    pen.closePath()
+    line(pen, [(cx, cy - kite_height/2), (cx, cy + kite_height/2)])
     
     # Kite tail (zigzag)
     tail_segments = 3
     segment_length = tail_length / tail_segments
     zig_width = 50
     
-    pen.moveTo((cx, cy + kite_height/2))
+    tail = [(cx, cy + kite_height/2)]
     for i in range(1, tail_segments + 1):
         # Zigzag left and right
         x_offset = zig_width * (-1 if i % 2 == 0 else 1)
         y_pos = cy + kite_height/2 + i * segment_length
-        pen.lineTo((cx + x_offset, y_pos))
-    
-    pen.closePath()
+        tail.append((cx + x_offset, y_pos))
+    line(pen, tail)
     
     # Kite string
-    pen.moveTo((cx, cy - kite_height/2))
-    pen.lineTo((cx - kite_width/2 - 100, cy + kite_height/2 + tail_length))
-    pen.closePath()
+    line(pen, [(cx, cy - kite_height/2),
+               (cx - kite_width/2 - 100, cy + kite_height/2 + tail_length)])
 
 def draw_lion(pen):
     """Draw a lion shape for 'l'"""
@@ -759,41 +627,21 @@ def draw_lion(pen):
     mane_size = 150
     
     # Lion head (circle)
-    pen.moveTo((cx + head_radius, cy))
     segments = 24
-    for i in range(1, segments + 1):
-        angle = 2 * math.pi * i / segments
-        x = cx + head_radius * math.cos(angle)
-        y = cy + head_radius * math.sin(angle)
-        pen.lineTo((x, y))
-    pen.closePath()
+    circle(pen, cx, cy, head_radius, segments)
     
     # Mane (spiky circle around head)
     mane_spikes = 16
-    for i in range(mane_spikes):
-        angle = 2 * math.pi * i / mane_spikes
-        inner_x = cx + head_radius * math.cos(angle)
-        inner_y = cy + head_radius * math.sin(angle)
-        outer_x = cx + (head_radius + mane_size) * math.cos(angle)
-        outer_y = cy + (head_radius + mane_size) * math.sin(angle)
-        
-        pen.moveTo((inner_x, inner_y))
-        pen.lineTo((outer_x, outer_y))
-        pen.closePath()
+    inner = circle_points(cx, cy, head_radius, mane_spikes).tolist()
+    outer = circle_points(cx, cy, head_radius + mane_size, mane_spikes).tolist()
+    for inner_point, outer_point in zip(inner, outer):
+        line(pen, [tuple(inner_point), tuple(outer_point)])
     
     # Eyes
     eye_size = 60
-    pen.moveTo((cx - head_radius/3, cy - head_radius/5))
-    pen.lineTo((cx - head_radius/3 - eye_size, cy - head_radius/5))
-    pen.lineTo((cx - head_radius/3 - eye_size, cy - head_radius/5 - eye_size))
-    pen.lineTo((cx - head_radius/3, cy - head_radius/5 - eye_size))
-    pen.closePath()
+    rect(pen, cx - head_radius/3, cy - head_radius/5, cx - head_radius/3 - eye_size, cy - head_radius/5 - eye_size)
     
-    pen.moveTo((cx + head_radius/3, cy - head_radius/5))
-    pen.lineTo((cx + head_radius/3 + eye_size, cy - head_radius/5))
-    pen.lineTo((cx + head_radius/3 + eye_size, cy - head_radius/5 - eye_size))
-    pen.lineTo((cx + head_radius/3, cy - head_radius/5 - eye_size))
-    pen.closePath()
+    rect(pen, cx + head_radius/3, cy - head_radius/5, cx + head_radius/3 + eye_size, cy - head_radius/5 - eye_size)
     
     # Nose (triangle)
     nose_size = 50
@@ -816,61 +664,31 @@ def draw_monkey(pen):
     ear_size = 150
     
     # Monkey head (circle)
-    pen.moveTo((cx + head_radius, cy))
     segments = 24
-    for i in range(1, segments + 1):
-        angle = 2 * math.pi * i / segments
-        x = cx + head_radius * math.cos(angle)
-        y = cy + head_radius * math.sin(angle)
-        pen.lineTo((x, y))
-    pen.closePath()
+    circle(pen, cx, cy, head_radius, segments)
     
     # Left ear (circle)
     ear_cx = cx - head_radius * 0.7
     ear_cy = cy - head_radius * 0.7
-    pen.moveTo((ear_cx + ear_size, ear_cy))
-    for i in range(1, segments + 1):
-        angle = 2 * math.pi * i / segments
-        x = ear_cx + ear_size * math.cos(angle)
-        y = ear_cy + ear_size * math.sin(angle)
-        pen.lineTo((x, y))
-    pen.closePath()
+    circle(pen, ear_cx, ear_cy, ear_size, segments)
     
     # Right ear (circle)
     ear_cx = cx + head_radius * 0.7
     ear_cy = cy - head_radius * 0.7
-    pen.moveTo((ear_cx + ear_size, ear_cy))
-    for i in range(1, segments + 1):
-        angle = 2 * math.pi * i / segments
-        x = ear_cx + ear_size * math.cos(angle)
-        y = ear_cy + ear_size * math.sin(angle)
-        pen.lineTo((x, y))
-    pen.closePath()
+    circle(pen, ear_cx, ear_cy, ear_size, segments)
     
     # Eyes
     eye_size = 60
-    pen.moveTo((cx - head_radius/3, cy - head_radius/5))
-    pen.lineTo((cx - head_radius/3 - eye_size, cy - head_radius/5))
-    pen.lineTo((cx - head_radius/3 - eye_size, cy - head_radius/5 - eye_size))
-    pen.lineTo((cx - head_radius/3, cy - head_radius/5 - eye_size))
-    pen.closePath()
+    rect(pen, cx - head_radius/3, cy - head_radius/5, cx - head_radius/3 - eye_size, cy - head_radius/5 - eye_size)
     
-    pen.moveTo((cx + head_radius/3, cy - head_radius/5))
-    pen.lineTo((cx + head_radius/3 + eye_size, cy - head_radius/5))
-    pen.lineTo((cx + head_radius/3 + eye_size, cy - head_radius/5 - eye_size))
-    pen.lineTo((cx + head_radius/3, cy - head_radius/5 - eye_size))
-    pen.closePath()
+    rect(pen, cx + head_radius/3, cy - head_radius/5, cx + head_radius/3 + eye_size, cy - head_radius/5 - eye_size)
     
     # Nose (oval)
     nose_width = 100
     nose_height = 70
-    pen.moveTo((cx, cy + head_radius/5))
-    for i in range(1, segments + 1):
-        angle = 2 * math.pi * i / segments
-        x = cx + nose_width/2 * math.cos(angle)
-        y = cy + head_radius/5 + nose_height/2 * math.sin(angle)
-        pen.lineTo((x, y))
-    pen.closePath()
+    step = 2 * math.pi / segments
+    contour(pen, [(cx, cy + head_radius/5)],
+            Arc(cx, cy + head_radius/5, nose_width/2, nose_height/2, step, 2 * math.pi - step, segments - 1))
     
     # Mouth (curved line)
     mouth_width = 200
@@ -887,21 +705,16 @@ def draw_nest(pen):
     nest_height = 200
     
     # Nest base (half-ellipse)
-    pen.moveTo((cx - nest_width/2, cy))
     segments = 12
-    for i in range(0, segments + 1):
-        angle = math.pi * i / segments
-        x = cx + nest_width/2 * math.cos(angle + math.pi)
-        y = cy + nest_height * math.sin(angle + math.pi)
-        pen.lineTo((x, y))
-    pen.closePath()
+    half_disc(pen, cx, cy, nest_width/2, nest_height, segments)
     
     # Nest texture (twigs)
     num_twigs = 20
     twig_length = 80
     
+    # Twigs start just inside the rim of the bowl and point into it
     for i in range(num_twigs):
-        angle = math.pi * (i / num_twigs + 0.5)
+        angle = math.pi * (i + 0.5) / num_twigs
         start_x = cx + (nest_width/2 - 20) * math.cos(angle + math.pi)
         start_y = cy + (nest_height - 20) * math.sin(angle + math.pi)
         
@@ -910,9 +723,7 @@ def draw_nest(pen):
         end_x = start_x + twig_length * math.cos(end_angle)
         end_y = start_y + twig_length * math.sin(end_angle)
         
-        pen.moveTo((start_x, start_y))
-        pen.lineTo((end_x, end_y))
-        pen.closePath()
+        line(pen, [(start_x, start_y), (end_x, end_y)])
     
     # Eggs in nest (3 small ovals)
     egg_size = 70
@@ -923,14 +734,8 @@ def draw_nest(pen):
     ]
     
     for egg_cx, egg_cy in egg_positions:
-        pen.moveTo((egg_cx + egg_size/2, egg_cy))
         segments = 16
-        for i in range(1, segments + 1):
-            angle = 2 * math.pi * i / segments
-            x = egg_cx + egg_size/2 * math.cos(angle)
-            y = egg_cy + egg_size/1.5 * math.sin(angle)
-            pen.lineTo((x, y))
-        pen.closePath()
+        ellipse(pen, egg_cx, egg_cy, egg_size/2, egg_size/1.5, segments)
 
 def draw_octopus(pen):
     """Draw an octopus shape for 'o'"""
@@ -940,32 +745,18 @@ def draw_octopus(pen):
     tentacle_length = 400
     
     # Octopus head (circle)
-    pen.moveTo((cx + head_radius, cy))
     segments = 24
-    for i in range(1, segments + 1):
-        angle = 2 * math.pi * i / segments
-        x = cx + head_radius * math.cos(angle)
-        y = cy + head_radius * math.sin(angle)
-        pen.lineTo((x, y))
-    pen.closePath()
+    circle(pen, cx, cy, head_radius, segments)
     
     # Eyes
     eye_size = 60
     eye_distance = 100
     
     # Left eye
-    pen.moveTo((cx - eye_distance/2, cy - head_radius/4))
-    pen.lineTo((cx - eye_distance/2 - eye_size, cy - head_radius/4))
-    pen.lineTo((cx - eye_distance/2 - eye_size, cy - head_radius/4 - eye_size))
-    pen.lineTo((cx - eye_distance/2, cy - head_radius/4 - eye_size))
-    pen.closePath()
+    rect(pen, cx - eye_distance/2, cy - head_radius/4, cx - eye_distance/2 - eye_size, cy - head_radius/4 - eye_size)
     
     # Right eye
-    pen.moveTo((cx + eye_distance/2, cy - head_radius/4))
-    pen.lineTo((cx + eye_distance/2 + eye_size, cy - head_radius/4))
-    pen.lineTo((cx + eye_distance/2 + eye_size, cy - head_radius/4 - eye_size))
-    pen.lineTo((cx + eye_distance/2, cy - head_radius/4 - eye_size))
-    pen.closePath()
+    rect(pen, cx + eye_distance/2, cy - head_radius/4, cx + eye_distance/2 + eye_size, cy - head_radius/4 - eye_size)
     
     # Tentacles (8 wavy lines)
     num_tentacles = 8
@@ -1004,59 +795,32 @@ def draw_penguin(pen):
     body_height = 500
     head_size = 200
     
-    # Body (oval)
-    pen.moveTo((cx, cy - body_height/2))
+    # Body (oval), starting from the top
     segments = 24
-    for i in range(1, segments + 1):
-        angle = 2 * math.pi * i / segments
-        x = cx + body_width/2 * math.cos(angle)
-        y = cy + body_height/2 * math.sin(angle)
-        pen.lineTo((x, y))
-    pen.closePath()
+    step = 2 * math.pi / segments
+    contour(pen, [(cx, cy - body_height/2)],
+            Arc(cx, cy, body_width/2, body_height/2, step, 2 * math.pi - step, segments - 1))
     
     # White belly (partial oval)
     belly_width = body_width * 0.7
     belly_height = body_height * 0.6
-    pen.moveTo((cx - belly_width/2, cy))
-    pen.lineTo((cx + belly_width/2, cy))
-    
-    for i in range(1, segments//2 + 1):
-        angle = math.pi * i / (segments//2)
-        x = cx + belly_width/2 * math.cos(angle)
-        y = cy + belly_height/2 * math.sin(angle)
-        pen.lineTo((x, y))
-    
-    pen.closePath()
+    half_disc(pen, cx, cy, belly_width/2, belly_height/2, segments//2, start=0)
     
     # Head (circle on top of body)
     head_cx = cx
     head_cy = cy - body_height/2 - head_size/2
     
-    pen.moveTo((head_cx + head_size/2, head_cy))
-    for i in range(1, segments + 1):
-        angle = 2 * math.pi * i / segments
-        x = head_cx + head_size/2 * math.cos(angle)
-        y = head_cy + head_size/2 * math.sin(angle)
-        pen.lineTo((x, y))
-    pen.closePath()
+    circle(pen, head_cx, head_cy, head_size/2, segments)
     
     # Eyes
     eye_size = 30
     eye_distance = 70
     
     # Left eye
-    pen.moveTo((head_cx - eye_distance/2, head_cy - head_size/6))
-    pen.lineTo((head_cx - eye_distance/2 - eye_size, head_cy - head_size/6))
-    pen.lineTo((head_cx - eye_distance/2 - eye_size, head_cy - head_size/6 - eye_size))
-    pen.lineTo((head_cx - eye_distance/2, head_cy - head_size/6 - eye_size))
-    pen.closePath()
+    rect(pen, head_cx - eye_distance/2, head_cy - head_size/6, head_cx - eye_distance/2 - eye_size, head_cy - head_size/6 - eye_size)
     
     # Right eye
-    pen.moveTo((head_cx + eye_distance/2, head_cy - head_size/6))
-    pen.lineTo((head_cx + eye_distance/2 + eye_size, head_cy - head_size/6))
-    pen.lineTo((head_cx + eye_distance/2 + eye_size, head_cy - head_size/6 - eye_size))
-    pen.lineTo((head_cx + eye_distance/2, head_cy - head_size/6 - eye_size))
-    pen.closePath()
+    rect(pen, head_cx + eye_distance/2, head_cy - head_size/6, head_cx + eye_distance/2 + eye_size, head_cy - head_size/6 - eye_size)
     
     # Beak (triangle)
     beak_size = 50
@@ -1090,11 +854,7 @@ def draw_queen(pen):
     face_radius = 250
     
     # Crown base (rectangle)
-    pen.moveTo((cx - crown_width/2, cy - crown_height))
-    pen.lineTo((cx + crown_width/2, cy - crown_height))
-    pen.lineTo((cx + crown_width/2, cy))
-    pen.lineTo((cx - crown_width/2, cy))
-    pen.closePath()
+    rect(pen, cx - crown_width/2, cy - crown_height, cx + crown_width/2, cy)
     
     # Crown points (triangles)
     num_points = 5
@@ -1108,33 +868,21 @@ def draw_queen(pen):
         pen.lineTo((point_x + crown_width/num_points/2, cy - crown_height - point_height))
         pen.closePath()
     
-    # Face (circle)
-    pen.moveTo((cx + face_radius, cy + face_radius))
+    # Face (circle), starting from the corner below and right of it
     segments = 24
-    for i in range(1, segments + 1):
-        angle = 2 * math.pi * i / segments
-        x = cx + face_radius * math.cos(angle)
-        y = cy + face_radius * math.sin(angle)
-        pen.lineTo((x, y))
-    pen.closePath()
+    step = 2 * math.pi / segments
+    contour(pen, [(cx + face_radius, cy + face_radius)],
+            Arc(cx, cy, face_radius, face_radius, step, 2 * math.pi - step, segments - 1))
     
     # Eyes
     eye_size = 60
     eye_distance = 120
     
     # Left eye
-    pen.moveTo((cx - eye_distance/2, cy + face_radius/3))
-    pen.lineTo((cx - eye_distance/2 - eye_size, cy + face_radius/3))
-    pen.lineTo((cx - eye_distance/2 - eye_size, cy + face_radius/3 - eye_size))
-    pen.lineTo((cx - eye_distance/2, cy + face_radius/3 - eye_size))
-    pen.closePath()
+    rect(pen, cx - eye_distance/2, cy + face_radius/3, cx - eye_distance/2 - eye_size, cy + face_radius/3 - eye_size)
     
     # Right eye
-    pen.moveTo((cx + eye_distance/2, cy + face_radius/3))
-    pen.lineTo((cx + eye_distance/2 + eye_size, cy + face_radius/3))
-    pen.lineTo((cx + eye_distance/2 + eye_size, cy + face_radius/3 - eye_size))
-    pen.lineTo((cx + eye_distance/2, cy + face_radius/3 - eye_size))
-    pen.closePath()
+    rect(pen, cx + eye_distance/2, cy + face_radius/3, cx + eye_distance/2 + eye_size, cy + face_radius/3 - eye_size)
     
     # Smile (curved line)
     smile_width = 200
@@ -1152,14 +900,8 @@ def draw_rabbit(pen):
     ear_height = 400
     
     # Rabbit head (circle)
-    pen.moveTo((cx + head_radius, cy))
     segments = 24
-    for i in range(1, segments + 1):
-        angle = 2 * math.pi * i / segments
-        x = cx + head_radius * math.cos(angle)
-        y = cy + head_radius * math.sin(angle)
-        pen.lineTo((x, y))
-    pen.closePath()
+    circle(pen, cx, cy, head_radius, segments)
     
     # Left ear
     pen.moveTo((cx - head_radius/3, cy - head_radius/2))
@@ -1180,54 +922,30 @@ def draw_rabbit(pen):
     eye_distance = 120
     
     # Left eye
-    pen.moveTo((cx - eye_distance/2, cy - head_radius/5))
-    pen.lineTo((cx - eye_distance/2 - eye_size, cy - head_radius/5))
-    pen.lineTo((cx - eye_distance/2 - eye_size, cy - head_radius/5 - eye_size))
-    pen.lineTo((cx - eye_distance/2, cy - head_radius/5 - eye_size))
-    pen.closePath()
+    rect(pen, cx - eye_distance/2, cy - head_radius/5, cx - eye_distance/2 - eye_size, cy - head_radius/5 - eye_size)
     
     # Right eye
-    pen.moveTo((cx + eye_distance/2, cy - head_radius/5))
-    pen.lineTo((cx + eye_distance/2 + eye_size, cy - head_radius/5))
-    pen.lineTo((cx + eye_distance/2 + eye_size, cy - head_radius/5 - eye_size))
-    pen.lineTo((cx + eye_distance/2, cy - head_radius/5 - eye_size))
-    pen.closePath()
+    rect(pen, cx + eye_distance/2, cy - head_radius/5, cx + eye_distance/2 + eye_size, cy - head_radius/5 - eye_size)
     
     # Nose (small circle)
     nose_size = 40
-    pen.moveTo((cx + nose_size, cy))
-    for i in range(1, segments + 1):
-        angle = 2 * math.pi * i / segments
-        x = cx + nose_size * math.cos(angle)
-        y = cy + nose_size * math.sin(angle)
-        pen.lineTo((x, y))
-    pen.closePath()
+    circle(pen, cx, cy, nose_size, segments)
     
     # Mouth (three lines forming whiskers)
     whisker_length = 120
     
     # Middle line
-    pen.moveTo((cx, cy + nose_size))
-    pen.lineTo((cx, cy + nose_size + 40))
-    pen.closePath()
+    line(pen, [(cx, cy + nose_size), (cx, cy + nose_size + 40)])
     
     # Left whiskers
-    pen.moveTo((cx - nose_size, cy + nose_size/2))
-    pen.lineTo((cx - nose_size - whisker_length, cy + nose_size/2 - 20))
-    pen.closePath()
+    line(pen, [(cx - nose_size, cy + nose_size/2), (cx - nose_size - whisker_length, cy + nose_size/2 - 20)])
     
-    pen.moveTo((cx - nose_size, cy + nose_size/2))
-    pen.lineTo((cx - nose_size - whisker_length, cy + nose_size/2 + 20))
-    pen.closePath()
+    line(pen, [(cx - nose_size, cy + nose_size/2), (cx - nose_size - whisker_length, cy + nose_size/2 + 20)])
     
     # Right whiskers
-    pen.moveTo((cx + nose_size, cy + nose_size/2))
-    pen.lineTo((cx + nose_size + whisker_length, cy + nose_size/2 - 20))
-    pen.closePath()
+    line(pen, [(cx + nose_size, cy + nose_size/2), (cx + nose_size + whisker_length, cy + nose_size/2 - 20)])
     
-    pen.moveTo((cx + nose_size, cy + nose_size/2))
-    pen.lineTo((cx + nose_size + whisker_length, cy + nose_size/2 + 20))
-    pen.closePath()
+    line(pen, [(cx + nose_size, cy + nose_size/2), (cx + nose_size + whisker_length, cy + nose_size/2 + 20)])
 
 def draw_snake(pen):
     """Draw a snake shape for 's'"""
@@ -1237,71 +955,33 @@ def draw_snake(pen):
     length_factor = 800
     head_size = 180
     
-    # S-curve shape
-    points = []
+    # S-curve shape (parametric equation and its derivative, evaluated for
+    # all parameters at once)
+    def s_curve(t):
+        return np.column_stack((cx + (length_factor/3) * np.sin(2 * np.pi * t),
+                                cy + (length_factor/2) * (t - 0.5)))
+    
+    def s_curve_tangent(t):
+        return np.column_stack(((length_factor/3) * 2 * np.pi * np.cos(2 * np.pi * t),
+                                np.full(len(t), length_factor/2)))
+    
     num_points = 50
+    points = s_curve(np.arange(num_points + 1) / num_points)
     
-    for i in range(num_points + 1):
-        t = i / num_points
-        # Parametric equation for S-curve
-        x = cx + (length_factor/3) * math.sin(2 * math.pi * t)
-        y = cy + (length_factor/2) * (t - 0.5)
-        points.append((x, y))
-    
-    # Main snake body
-    for i in range(len(points) - 1):
-        # Create rectangle segment between consecutive points
-        x1, y1 = points[i]
-        x2, y2 = points[i+1]
-        
-        # Direction vector between points
-        dx, dy = x2 - x1, y2 - y1
-        length = math.sqrt(dx*dx + dy*dy)
-        
-        # Normalized perpendicular vector
-        if length > 0:
-            nx, ny = -dy/length, dx/length
-        else:
-            nx, ny = 0, 1
-            
-        # Create rectangle corners
-        half_width = snake_width/2
-        
-        # Use perpendicular vector to create width
-        corner1 = (x1 + nx * half_width, y1 + ny * half_width)
-        corner2 = (x1 - nx * half_width, y1 - ny * half_width)
-        corner3 = (x2 - nx * half_width, y2 - ny * half_width)
-        corner4 = (x2 + nx * half_width, y2 + ny * half_width)
-        
-        # Draw segment
-        pen.moveTo(corner1)
-        pen.lineTo(corner2)
-        pen.lineTo(corner3)
-        pen.lineTo(corner4)
-        pen.closePath()
+    # Main snake body: one outline around a band along the S-curve. y
+    # advances everywhere along the curve, so no piece of it has zero length.
+    ribbon(pen, s_curve, s_curve_tangent, snake_width, num_points)
     
     # Snake head
-    head_x, head_y = points[0]
+    head_x, head_y = points[0].tolist()
     
     # Approximating the angle of the head based on first segments
-    dx = points[2][0] - points[0][0]
-    dy = points[2][1] - points[0][1]
+    dx, dy = (points[2] - points[0]).tolist()
     head_angle = math.atan2(dy, dx)
     
     # Draw head (oval oriented in the direction of travel)
-    pen.moveTo((head_x + head_size/2 * math.cos(head_angle), 
-               head_y + head_size/2 * math.sin(head_angle)))
-    
     segments = 24
-    for i in range(1, segments + 1):
-        angle = 2 * math.pi * i / segments
-        # Rotate the ellipse to match snake direction
-        x = head_x + (head_size/2 * math.cos(angle) * math.cos(head_angle) - 
-                     head_size/3 * math.sin(angle) * math.sin(head_angle))
-        y = head_y + (head_size/2 * math.cos(angle) * math.sin(head_angle) + 
-                     head_size/3 * math.sin(angle) * math.cos(head_angle))
-        pen.lineTo((x, y))
-    pen.closePath()
+    ellipse(pen, head_x, head_y, head_size/2, head_size/3, segments, rotation=head_angle)
     
     # Eyes
     eye_size = 20
@@ -1312,26 +992,14 @@ def draw_snake(pen):
     eye_x = head_x + eye_offset * math.cos(head_angle) + eye_offset * math.cos(eye_angle)
     eye_y = head_y + eye_offset * math.sin(head_angle) + eye_offset * math.sin(eye_angle)
     
-    pen.moveTo((eye_x + eye_size, eye_y))
-    for i in range(1, segments + 1):
-        angle = 2 * math.pi * i / segments
-        x = eye_x + eye_size * math.cos(angle)
-        y = eye_y + eye_size * math.sin(angle)
-        pen.lineTo((x, y))
-    pen.closePath()
+    circle(pen, eye_x, eye_y, eye_size, segments)
     
     # Right eye (relative to head direction)
     eye_angle = head_angle - math.pi/4
     eye_x = head_x + eye_offset * math.cos(head_angle) + eye_offset * math.cos(eye_angle)
     eye_y = head_y + eye_offset * math.sin(head_angle) + eye_offset * math.sin(eye_angle)
     
-    pen.moveTo((eye_x + eye_size, eye_y))
-    for i in range(1, segments + 1):
-        angle = 2 * math.pi * i / segments
-        x = eye_x + eye_size * math.cos(angle)
-        y = eye_y + eye_size * math.sin(angle)
-        pen.lineTo((x, y))
-    pen.closePath()
+    circle(pen, eye_x, eye_y, eye_size, segments)
 
 def draw_tiger(pen):
     """Draw a tiger shape for 't'"""
@@ -1341,14 +1009,8 @@ def draw_tiger(pen):
     ear_size = 100
     
     # Tiger head (circle)
-    pen.moveTo((cx + head_radius, cy))
     segments = 24
-    for i in range(1, segments + 1):
-        angle = 2 * math.pi * i / segments
-        x = cx + head_radius * math.cos(angle)
-        y = cy + head_radius * math.sin(angle)
-        pen.lineTo((x, y))
-    pen.closePath()
+    circle(pen, cx, cy, head_radius, segments)
     
     # Left ear (triangle)
     pen.moveTo((cx - head_radius/2, cy - head_radius/2))
@@ -1367,18 +1029,10 @@ def draw_tiger(pen):
     eye_distance = 150
     
     # Left eye
-    pen.moveTo((cx - eye_distance/2, cy - head_radius/5))
-    pen.lineTo((cx - eye_distance/2 - eye_size, cy - head_radius/5))
-    pen.lineTo((cx - eye_distance/2 - eye_size, cy - head_radius/5 - eye_size))
-    pen.lineTo((cx - eye_distance/2, cy - head_radius/5 - eye_size))
-    pen.closePath()
+    rect(pen, cx - eye_distance/2, cy - head_radius/5, cx - eye_distance/2 - eye_size, cy - head_radius/5 - eye_size)
     
     # Right eye
-    pen.moveTo((cx + eye_distance/2, cy - head_radius/5))
-    pen.lineTo((cx + eye_distance/2 + eye_size, cy - head_radius/5))
-    pen.lineTo((cx + eye_distance/2 + eye_size, cy - head_radius/5 - eye_size))
-    pen.lineTo((cx + eye_distance/2, cy - head_radius/5 - eye_size))
-    pen.closePath()
+    rect(pen, cx + eye_distance/2, cy - head_radius/5, cx + eye_distance/2 + eye_size, cy - head_radius/5 - eye_size)
     
     # Nose (triangle)
     nose_size = 40
@@ -1427,20 +1081,10 @@ def draw_umbrella(pen):
     handle_width = 30
     
     # Umbrella canopy (half circle)
-    pen.moveTo((cx - radius, cy))
-    for i in range(0, 13):  # Half circle
-        angle = math.pi * i / 12
-        x = cx + radius * math.cos(angle + math.pi)
-        y = cy + radius * math.sin(angle + math.pi)
-        pen.lineTo((x, y))
-    pen.closePath()
+    half_disc(pen, cx, cy, radius, radius, 12)
     
     # Handle
-    pen.moveTo((cx - handle_width/2, cy))
-    pen.lineTo((cx + handle_width/2, cy))
-    pen.lineTo((cx + handle_width/2, cy + handle_length))
-    pen.lineTo((cx - handle_width/2, cy + handle_length))
-    pen.closePath()
+    rect(pen, cx - handle_width/2, cy, cx + handle_width/2, cy + handle_length)
     
     # J-hook handle end
     hook_size = 100
@@ -1453,11 +1097,8 @@ def draw_umbrella(pen):
     pen.closePath()
     
     # Umbrella ribs
-    for i in range(5):
-        angle = math.pi * i / 4
-        pen.moveTo((cx, cy))
-        pen.lineTo((cx + radius * math.cos(angle + math.pi), cy + radius * math.sin(angle + math.pi)))
-        pen.closePath()
+    for rib_end in half_disc_points(cx, cy, radius, radius, 4).tolist():
+        line(pen, [(cx, cy), tuple(rib_end)])
 
 def draw_violin(pen):
     """Draw a violin shape for 'v'"""
@@ -1473,46 +1114,27 @@ def draw_violin(pen):
     bottom_radius = body_width/2.2
     waist_width = body_width * 0.7
     
-    # Upper bout
-    pen.moveTo((cx - top_radius, cy - body_height/4))
-    pen.lineTo((cx - waist_width/2, cy))
-    pen.lineTo((cx - bottom_radius, cy + body_height/4))
-    
-    # Bottom bout curve
     segments = 12
-    for i in range(0, segments + 1):
-        angle = math.pi * i / segments - math.pi/2
-        x = cx + bottom_radius * math.cos(angle)
-        y = cy + body_height/4 + bottom_radius * math.sin(angle)
-        pen.lineTo((x, y))
-    
-    # Upper right side
-    pen.lineTo((cx + waist_width/2, cy))
-    pen.lineTo((cx + top_radius, cy - body_height/4))
-    
-    # Top bout curve
-    for i in range(0, segments + 1):
-        angle = math.pi * i / segments + math.pi/2
-        x = cx + top_radius * math.cos(angle)
-        y = cy - body_height/4 + top_radius * math.sin(angle)
-        pen.lineTo((x, y))
-    
-    pen.closePath()
+    contour(pen,
+        # Upper bout
+        [(cx - top_radius, cy - body_height/4),
+         (cx - waist_width/2, cy),
+         (cx - bottom_radius, cy + body_height/4)],
+        # Bottom bout curve
+        Arc(cx, cy + body_height/4, bottom_radius, bottom_radius, -math.pi/2, math.pi, segments),
+        # Upper right side
+        [(cx + waist_width/2, cy),
+         (cx + top_radius, cy - body_height/4)],
+        # Top bout curve
+        Arc(cx, cy - body_height/4, top_radius, top_radius, math.pi/2, math.pi, segments),
+    )
     
     # Neck
-    pen.moveTo((cx - neck_width/2, cy - body_height/4 - top_radius))
-    pen.lineTo((cx + neck_width/2, cy - body_height/4 - top_radius))
-    pen.lineTo((cx + neck_width/2, cy - body_height/4 - top_radius - neck_length))
-    pen.lineTo((cx - neck_width/2, cy - body_height/4 - top_radius - neck_length))
-    pen.closePath()
+    rect(pen, cx - neck_width/2, cy - body_height/4 - top_radius, cx + neck_width/2, cy - body_height/4 - top_radius - neck_length)
     
     # Scroll (simplified)
     scroll_size = 70
-    pen.moveTo((cx - scroll_size/2, cy - body_height/4 - top_radius - neck_length))
-    pen.lineTo((cx + scroll_size/2, cy - body_height/4 - top_radius - neck_length))
-    pen.lineTo((cx + scroll_size/2, cy - body_height/4 - top_radius - neck_length - scroll_size))
-    pen.lineTo((cx - scroll_size/2, cy - body_height/4 - top_radius - neck_length - scroll_size))
-    pen.closePath()
+    rect(pen, cx - scroll_size/2, cy - body_height/4 - top_radius - neck_length, cx + scroll_size/2, cy - body_height/4 - top_radius - neck_length - scroll_size)
     
     # F-holes (simplified)
     f_hole_width = 20
@@ -1520,18 +1142,10 @@ def draw_violin(pen):
     f_hole_distance = 100
     
     # Left f-hole
-    pen.moveTo((cx - f_hole_distance/2, cy))
-    pen.lineTo((cx - f_hole_distance/2 - f_hole_width, cy))
-    pen.lineTo((cx - f_hole_distance/2 - f_hole_width, cy + f_hole_height))
-    pen.lineTo((cx - f_hole_distance/2, cy + f_hole_height))
-    pen.closePath()
+    rect(pen, cx - f_hole_distance/2, cy, cx - f_hole_distance/2 - f_hole_width, cy + f_hole_height)
     
     # Right f-hole
-    pen.moveTo((cx + f_hole_distance/2, cy))
-    pen.lineTo((cx + f_hole_distance/2 + f_hole_width, cy))
-    pen.lineTo((cx + f_hole_distance/2 + f_hole_width, cy + f_hole_height))
-    pen.lineTo((cx + f_hole_distance/2, cy + f_hole_height))
-    pen.closePath()
+    rect(pen, cx + f_hole_distance/2, cy, cx + f_hole_distance/2 + f_hole_width, cy + f_hole_height)
     
     # Bow (curved line)
     bow_length = 700
@@ -1552,29 +1166,12 @@ def draw_watermelon(pen):
     rind_thickness = 50
     
     # Main watermelon shape (half circle)
-    pen.moveTo((cx - radius, cy))
-    
-    # Draw the curved part
     segments = 12
-    for i in range(0, segments + 1):
-        angle = math.pi * i / segments
-        x = cx + radius * math.cos(angle + math.pi)
-        y = cy + radius * math.sin(angle + math.pi)
-        pen.lineTo((x, y))
-    
-    pen.closePath()
+    half_disc(pen, cx, cy, radius, radius, segments)
     
     # Rind (inner half circle)
     inner_radius = radius - rind_thickness
-    pen.moveTo((cx - inner_radius, cy))
-    
-    for i in range(0, segments + 1):
-        angle = math.pi * i / segments
-        x = cx + inner_radius * math.cos(angle + math.pi)
-        y = cy + inner_radius * math.sin(angle + math.pi)
-        pen.lineTo((x, y))
-        
-    pen.closePath()
+    half_disc(pen, cx, cy, inner_radius, inner_radius, segments)
     
     # Seeds (scattered oval shapes)
     seed_count = 12
@@ -1595,13 +1192,7 @@ def draw_watermelon(pen):
         seed_y = cy + grid_y * inner_radius/2 + offset_y
         
         # Draw seed (oval)
-        pen.moveTo((seed_x + seed_width/2, seed_y))
-        for j in range(1, segments + 1):
-            angle = 2 * math.pi * j / segments
-            x = seed_x + seed_width/2 * math.cos(angle)
-            y = seed_y + seed_height/2 * math.sin(angle)
-            pen.lineTo((x, y))
-        pen.closePath()
+        ellipse(pen, seed_x, seed_y, seed_width/2, seed_height/2, segments)
 
 def draw_xylophone(pen):
     """Draw a xylophone shape for 'x'"""
@@ -1623,11 +1214,7 @@ def draw_xylophone(pen):
         # Each bar gets progressively shorter
         current_width = bar_width * (num_bars - i) / num_bars
         
-        pen.moveTo((cx - current_width/2, y_pos))
-        pen.lineTo((cx + current_width/2, y_pos))
-        pen.lineTo((cx + current_width/2, y_pos + bar_height))
-        pen.lineTo((cx - current_width/2, y_pos + bar_height))
-        pen.closePath()
+        rect(pen, cx - current_width/2, y_pos, cx + current_width/2, y_pos + bar_height)
     
     # Draw mallets (crossed to make an 'X' shape)
     mallet_length = width * 0.7
@@ -1639,18 +1226,14 @@ def draw_xylophone(pen):
     dx = math.cos(angle) * mallet_length/2
     dy = math.sin(angle) * mallet_length/2
     
-    pen.moveTo((cx - dx, cy - dy))
-    pen.lineTo((cx + dx, cy + dy))
-    pen.closePath()
+    line(pen, [(cx - dx, cy - dy), (cx + dx, cy + dy)], mallet_width)
     
     # Second mallet (diagonal top-right to bottom-left)
     angle = -math.pi/4
     dx = math.cos(angle) * mallet_length/2
     dy = math.sin(angle) * mallet_length/2
     
-    pen.moveTo((cx + dx, cy - dy))
-    pen.lineTo((cx - dx, cy + dy))
-    pen.closePath()
+    line(pen, [(cx + dx, cy - dy), (cx - dx, cy + dy)], mallet_width)
     
     # Mallet heads (circles at the ends)
     head_positions = [
@@ -1661,14 +1244,8 @@ def draw_xylophone(pen):
     ]
     
     for head_x, head_y in head_positions:
-        pen.moveTo((head_x + mallet_head/2, head_y))
         segments = 16
-        for i in range(1, segments + 1):
-            angle = 2 * math.pi * i / segments
-            x = head_x + mallet_head/2 * math.cos(angle)
-            y = head_y + mallet_head/2 * math.sin(angle)
-            pen.lineTo((x, y))
-        pen.closePath()
+        circle(pen, head_x, head_y, mallet_head/2, segments)
 
 def draw_yacht(pen):
     """Draw a yacht shape for 'y'"""
@@ -1688,11 +1265,7 @@ def draw_yacht(pen):
     
     # Mast (vertical pole)
     mast_width = 20
-    pen.moveTo((cx - mast_width/2, cy))
-    pen.lineTo((cx + mast_width/2, cy))
-    pen.lineTo((cx + mast_width/2, cy - mast_height))
-    pen.lineTo((cx - mast_width/2, cy - mast_height))
-    pen.closePath()
+    rect(pen, cx - mast_width/2, cy, cx + mast_width/2, cy - mast_height)
     
     # Main sail (triangle)
     pen.moveTo((cx, cy - mast_height))
@@ -1732,33 +1305,18 @@ def draw_zebra(pen):
     head_size = 200
     leg_length = 300
     
-    # Body (oval)
-    pen.moveTo((cx - body_length/2, cy))
+    # Body (oval), starting from the front
     segments = 24
-    for i in range(1, segments + 1):
-        angle = 2 * math.pi * i / segments
-        x = cx + body_length/2 * math.cos(angle)
-        y = cy + body_height/2 * math.sin(angle)
-        pen.lineTo((x, y))
-    pen.closePath()
+    step = 2 * math.pi / segments
+    contour(pen, [(cx - body_length/2, cy)],
+            Arc(cx, cy, body_length/2, body_height/2, step, 2 * math.pi - step, segments - 1))
     
     # Head (oval at front of body)
     head_angle = -math.pi/6  # Slightly angled down
     head_cx = cx - body_length/2 - head_size/3
     head_cy = cy - body_height/4
     
-    pen.moveTo((head_cx + head_size/2 * math.cos(head_angle), 
-               head_cy + head_size/2 * math.sin(head_angle)))
-    
-    for i in range(1, segments + 1):
-        angle = 2 * math.pi * i / segments
-        # Rotate and stretch the ellipse
-        x = head_cx + (head_size/2 * math.cos(angle) * math.cos(head_angle) - 
-                     head_size/3 * math.sin(angle) * math.sin(head_angle))
-        y = head_cy + (head_size/2 * math.cos(angle) * math.sin(head_angle) + 
-                     head_size/3 * math.sin(angle) * math.cos(head_angle))
-        pen.lineTo((x, y))
-    pen.closePath()
+    ellipse(pen, head_cx, head_cy, head_size/2, head_size/3, segments, rotation=head_angle)
     
     # Ears (triangles)
     ear_size = 60
@@ -1781,11 +1339,7 @@ def draw_zebra(pen):
     ]
     
     for leg_x, leg_y in leg_positions:
-        pen.moveTo((leg_x - leg_width/2, leg_y))
-        pen.lineTo((leg_x + leg_width/2, leg_y))
-        pen.lineTo((leg_x + leg_width/2, leg_y + leg_length))
-        pen.lineTo((leg_x - leg_width/2, leg_y + leg_length))
-        pen.closePath()
+        rect(pen, leg_x - leg_width/2, leg_y, leg_x + leg_width/2, leg_y + leg_length)
     
     # Tail (thin rectangle with tuft)
     tail_width = 20
@@ -1802,13 +1356,7 @@ def draw_zebra(pen):
     tuft_cx = cx + body_length/2
     tuft_cy = cy + tail_length
     
-    pen.moveTo((tuft_cx + tuft_size/2, tuft_cy))
-    for i in range(1, segments//2 + 1):
-        angle = 2 * math.pi * i / segments
-        x = tuft_cx + tuft_size/2 * math.cos(angle)
-        y = tuft_cy + tuft_size/2 * math.sin(angle)
-        pen.lineTo((x, y))
-    pen.closePath()
+    half_disc(pen, tuft_cx, tuft_cy, tuft_size/2, tuft_size/2, segments//2, start=0)
     
     # Zebra stripes (several rectangles across body)
     num_stripes = 12
@@ -1817,237 +1365,731 @@ def draw_zebra(pen):
     for i in range(num_stripes):
         stripe_x = cx - body_length/2 + body_length * i / num_stripes
         
-        pen.moveTo((stripe_x, cy - body_height/2))
-        pen.lineTo((stripe_x + stripe_width, cy - body_height/2))
-        pen.lineTo((stripe_x + stripe_width, cy + body_height/2))
-        pen.lineTo((stripe_x, cy + body_height/2))
-        pen.closePath()
+        rect(pen, stripe_x, cy - body_height/2, stripe_x + stripe_width, cy + body_height/2)
 
-def add_letter_glyphs_to_font(font):
-    """Add glyphs to the font for each letter with shapes representing words"""
-    # Dictionary mapping letters to drawing functions
-    letter_shapes = {
-        'a': draw_apple,
-        'b': draw_ball,
-        'c': draw_cat,
-        'd': draw_dog,
-        'e': draw_elephant,
-        'f': draw_fish,
-        'g': draw_giraffe,
-        'h': draw_house,
-        'i': draw_igloo,
-        'j': draw_jellyfish,
-        'k': draw_kite,
-        'l': draw_lion,
-        'm': draw_monkey,
-        'n': draw_nest,
-        'o': draw_octopus,
-        'p': draw_penguin,
-        'q': draw_queen,
-        'r': draw_rabbit,
-        's': draw_snake,
-        't': draw_tiger,
-        'u': draw_umbrella,
-        'v': draw_violin,
-        'w': draw_watermelon,
-        'x': draw_xylophone,
-        'y': draw_yacht,
-        'z': draw_zebra,
-    }
+# Dictionary mapping letters to drawing functions
+LETTER_SHAPES = {
+    'a': draw_apple,
+    'b': draw_ball,
+    'c': draw_cat,
+    'd': draw_dog,
+    'e': draw_elephant,
+    'f': draw_fish,
+    'g': draw_giraffe,
+    'h': draw_house,
+    'i': draw_igloo,
+    'j': draw_jellyfish,
+    'k': draw_kite,
+    'l': draw_lion,
+    'm': draw_monkey,
+    'n': draw_nest,
+    'o': draw_octopus,
+    'p': draw_penguin,
+    'q': draw_queen,
+    'r': draw_rabbit,
+    's': draw_snake,
+    't': draw_tiger,
+    'u': draw_umbrella,
+    'v': draw_violin,
+    'w': draw_watermelon,
+    'x': draw_xylophone,
+    'y': draw_yacht,
+    'z': draw_zebra,
+}
+
+# The word each letter's shape pictures
+LETTER_WORDS = {
+    'a': 'apple',
+    'b': 'ball',
+    'c': 'cat',
+    'd': 'dog',
+    'e': 'elephant',
+    'f': 'fish',
+    'g': 'giraffe',
+    'h': 'house',
+    'i': 'igloo',
+    'j': 'jellyfish',
+    'k': 'kite',
+    'l': 'lion',
+    'm': 'monkey',
+    'n': 'nest',
+    'o': 'octopus',
+    'p': 'penguin',
+    'q': 'queen',
+    'r': 'rabbit',
+    's': 'snake',
+    't': 'tiger',
+    'u': 'umbrella',
+    'v': 'violin',
+    'w': 'watermelon',
+    'x': 'xylophone',
+    'y': 'yacht',
+    'z': 'zebra',
+}
+
+def glyph_name_for(letter):
+    """Return the glyph name used for a letter"""
+    return f"uni{ord(letter):04X}"
+
+def draw_generic_shape(pen, letter):
+    """Draw a simple generic shape for letters without a specific shape"""
+    center_x, center_y = FONT_SIZE/2, FONT_SIZE/2
+    radius = FONT_SIZE * 0.4
+    
+    # Create a basic shape (circle with the letter inside)
+    segments = 24
+    circle(pen, center_x, center_y, radius, segments)
+    
+    # Add letter identifier (simple approximation)
+    letter_lines = []
+    
+    if letter == 'i':
+        # i - vertical line with dot
+        letter_lines = [
+            [(center_x, center_y - radius/2), (center_x, center_y + radius/2)],
+            [(center_x - radius/5, center_y - radius*0.8), (center_x + radius/5, center_y - radius*0.8)]
+        ]
+    elif letter == 'j':
+        # j - hook with dot
+        letter_lines = [
+            [(center_x, center_y - radius/2), (center_x, center_y + radius/2)],
+            [(center_x, center_y + radius/2), (center_x - radius/3, center_y + radius/2 + radius/3)],
+            [(center_x - radius/5, center_y - radius*0.8), (center_x + radius/5, center_y - radius*0.8)]
+        ]
+    elif letter == 'k':
+        # k - vertical with two diagonals
+        letter_lines = [
+            [(center_x - radius/3, center_y - radius/2), (center_x - radius/3, center_y + radius/2)],
+            [(center_x - radius/3, center_y), (center_x + radius/3, center_y - radius/2)],
+            [(center_x - radius/3, center_y), (center_x + radius/3, center_y + radius/2)]
+        ]
+    elif letter == 'l':
+        # l - vertical line
+        letter_lines = [
+            [(center_x, center_y - radius/2), (center_x, center_y + radius/2)]
+        ]
+    elif letter == 'm':
+        # m - simplified m
+        letter_lines = [
+            [(center_x - radius/2, center_y + radius/2), (center_x - radius/2, center_y - radius/2)],
+            [(center_x - radius/2, center_y - radius/2), (center_x, center_y + radius/4)],
+            [(center_x, center_y + radius/4), (center_x + radius/2, center_y - radius/2)],
+            [(center_x + radius/2, center_y - radius/2), (center_x + radius/2, center_y + radius/2)]
+        ]
+    elif letter == 'n':
+        # n - simplified n
+        letter_lines = [
+            [(center_x - radius/3, center_y + radius/2), (center_x - radius/3, center_y - radius/2)],
+            [(center_x - radius/3, center_y - radius/2), (center_x + radius/3, center_y + radius/2)],
+            [(center_x + radius/3, center_y + radius/2), (center_x + radius/3, center_y - radius/2)]
+        ]
+    elif letter == 'o':
+        # o - inner circle
+        inner_radius = radius * 0.6
+        circle(pen, center_x, center_y, inner_radius, segments)
+    elif letter == 'p':
+        # p - simplified p
+        letter_lines = [
+            [(center_x - radius/3, center_y + radius/2), (center_x - radius/3, center_y - radius/2)],
+            [(center_x - radius/3, center_y - radius/2), (center_x + radius/3, center_y - radius/2)],
+            [(center_x + radius/3, center_y - radius/2), (center_x + radius/3, center_y)],
+            [(center_x + radius/3, center_y), (center_x - radius/3, center_y)]
+        ]
+    elif letter == 'q':
+        # q - circle with tail
+        inner_radius = radius * 0.5
+        circle(pen, center_x, center_y, inner_radius, segments)
+        
+        # Tail
+        line(pen, [(center_x + inner_radius*0.7, center_y + inner_radius*0.7),
+                   (center_x + radius/2, center_y + radius/2)])
+    elif letter == 'r':
+        # r - simplified r
+        letter_lines = [
+            [(center_x - radius/3, center_y + radius/2), (center_x - radius/3, center_y - radius/2)],
+            [(center_x - radius/3, center_y - radius/3), (center_x, center_y - radius/2)],
+            [(center_x, center_y - radius/2), (center_x + radius/3, center_y - radius/3)]
+        ]
+    elif letter == 's':
+        # s - simplified s
+        letter_lines = [
+            [(center_x + radius/3, center_y - radius/2), (center_x - radius/3, center_y - radius/2)],
+            [(center_x - radius/3, center_y - radius/2), (center_x - radius/3, center_y)],
+            [(center_x - radius/3, center_y), (center_x + radius/3, center_y)],
+            [(center_x + radius/3, center_y), (center_x + radius/3, center_y + radius/2)],
+            [(center_x + radius/3, center_y + radius/2), (center_x - radius/3, center_y + radius/2)]
+        ]
+    elif letter == 't':
+        # t - simplified t
+        letter_lines = [
+            [(center_x, center_y - radius/2), (center_x, center_y + radius/2)],
+            [(center_x - radius/3, center_y - radius/4), (center_x + radius/3, center_y - radius/4)]
+        ]
+    elif letter == 'v':
+        # v - simplified v
+        letter_lines = [
+            [(center_x - radius/3, center_y - radius/2), (center_x, center_y + radius/2)],
+            [(center_x, center_y + radius/2), (center_x + radius/3, center_y - radius/2)]
+        ]
+    elif letter == 'w':
+        # w - simplified w
+        letter_lines = [
+            [(center_x - radius/2, center_y - radius/2), (center_x - radius/4, center_y + radius/2)],
+            [(center_x - radius/4, center_y + radius/2), (center_x, center_y - radius/4)],
+            [(center_x, center_y - radius/4), (center_x + radius/4, center_y + radius/2)],
+            [(center_x + radius/4, center_y + radius/2), (center_x + radius/2, center_y - radius/2)]
+        ]
+    elif letter == 'x':
+        # x - simplified x
+        letter_lines = [
+            [(center_x - radius/3, center_y - radius/2), (center_x + radius/3, center_y + radius/2)],
+            [(center_x - radius/3, center_y + radius/2), (center_x + radius/3, center_y - radius/2)]
+        ]
+    elif letter == 'y':
+        # y - simplified y
+        letter_lines = [
+            [(center_x - radius/3, center_y - radius/2), (center_x, center_y)],
+            [(center_x, center_y), (center_x + radius/3, center_y - radius/2)],
+            [(center_x, center_y), (center_x, center_y + radius/2)]
+        ]
+    elif letter == 'z':
+        # z - simplified z
+        letter_lines = [
+            [(center_x - radius/3, center_y - radius/2), (center_x + radius/3, center_y - radius/2)],
+            [(center_x + radius/3, center_y - radius/2), (center_x - radius/3, center_y + radius/2)],
+            [(center_x - radius/3, center_y + radius/2), (center_x + radius/3, center_y + radius/2)]
+        ]
+    
+    # Draw letter lines, joining each one to the last where it carries on from it
+    strokes = []
+    for start, end in letter_lines:
+        if strokes and strokes[-1][-1] == start:
+            strokes[-1].append(end)
+        else:
+            strokes.append([start, end])
+    for points in strokes:
+        line(pen, points)
+
+def draw_letter_outline(letter):
+    """Run the drawing code for a letter once and return its Outline
+
+    The outline is in drawing coordinates, with y growing downwards. With
+    overlap removal on, overlapping contours are merged into one outline.
+    """
+    pen = OutlinePen()
+    
+    if letter in LETTER_SHAPES:
+        # Use a specific drawing function for this letter
+        LETTER_SHAPES[letter](pen)
+    else:
+        draw_generic_shape(pen, letter)
+    
+    outline = pen.outline()
+    if REMOVE_OVERLAPS:
+        outline = union_outline(outline)
+    return outline
+
+def drawing_settings():
+    """Return the settings that change how glyphs are drawn and compiled"""
+    return (primitives.CURVE_TOLERANCE, primitives.FLATNESS, SIMPLIFY_TOLERANCE, REMOVE_OVERLAPS,
+            (stroke.LINE_WIDTH, stroke.LINE_JOIN, stroke.LINE_CAP))
+
+def apply_drawing_settings(curve_tolerance, flatness, simplify_tolerance, remove_overlaps, line_style):
+    """Set how glyphs are drawn and compiled in this process
+
+    `line_style` is the (width, join, cap) of the lines drawn by line().
+    """
+    global SIMPLIFY_TOLERANCE, REMOVE_OVERLAPS
+    primitives.set_curve_tolerance(curve_tolerance)
+    primitives.set_flatness(flatness)
+    stroke.set_line_style(*line_style)
+    SIMPLIFY_TOLERANCE = simplify_tolerance
+    REMOVE_OVERLAPS = remove_overlaps
+
+def _process_pool(jobs):
+    # Workers may start from a fresh interpreter, so pass on the settings
+    return ProcessPoolExecutor(max_workers=jobs, initializer=apply_drawing_settings,
+                               initargs=drawing_settings())
+
+def draw_letter_record(letter):
+    """Return a GlyphRecord holding the outline and metrics of a letter"""
+    return GlyphRecord(letter, glyph_name_for(letter), FONT_SIZE, draw_letter_outline(letter))
+
+def _draw_letter_outline_data(letter):
+    # Outlines cross process boundaries in their compact binary form
+    return draw_letter_outline(letter).to_bytes()
+
+def draw_letter_records(letters, jobs=1):
+    """Return GlyphRecords for the given letters, in order
+
+    With more than one job the drawing code runs in a process pool and the
+    outlines are sent back serialized.
+    """
+    if jobs <= 1:
+        return [draw_letter_record(letter) for letter in letters]
+    
+    with _process_pool(jobs) as executor:
+        outlines = executor.map(_draw_letter_outline_data, letters)
+        return [GlyphRecord(letter, glyph_name_for(letter), FONT_SIZE, Outline.from_bytes(data))
+                for letter, data in zip(letters, outlines)]
+
+def coverage_image(coverage):
+    """Return an RGBA image in IMAGE_COLOR on a transparent background, opaque where `coverage` is 1"""
+    pixels = np.empty(coverage.shape + (4,), dtype=np.uint8)
+    pixels[..., :3] = IMAGE_COLOR
+    pixels[..., 3] = np.rint(coverage * 255)
+    return Image.fromarray(pixels, "RGBA")
+
+def letter_image(outline, size):
+    """Return a size x size RGBA image of an outline in IMAGE_COLOR on a transparent background"""
+    return coverage_image(render_outline(outline, size, IMAGE_VIEW_BOX))
+
+def letter_image_path(letter, size, sizes):
+    """Return where the image of a letter at one of `sizes` is written
+
+    The first size goes straight into the images directory, and any others
+    into a subdirectory named after the size.
+    """
+    if size == sizes[0]:
+        return os.path.join(IMAGES_DIR, f"{letter}.png")
+    return os.path.join(IMAGES_DIR, str(size), f"{letter}.png")
+
+def write_letter_pictures(letter, sizes, svg_precision=None):
+    """Draw a letter once and write its image at each size and its SVG file, returning the paths
+
+    No SVG file is written without an `svg_precision`.
+    """
+    outline = draw_letter_outline(letter)
+    paths = []
+    for size in sizes:
+        path = letter_image_path(letter, size, sizes)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        image = letter_image(outline, size)
+        write_atomically(path, lambda f: image.save(f, "PNG"))
+        paths.append(path)
+    if svg_precision is not None:
+        path = os.path.join(SVG_DIR, f"{letter}.svg")
+        document = svg_document(outline, IMAGE_VIEW_BOX, SVG_SIZE, IMAGE_COLOR, svg_precision)
+        write_atomically(path, lambda f: f.write(document.encode("utf-8")))
+        paths.append(path)
+    return paths
+
+def render_letter_pictures(letters, sizes, svg_precision=None, jobs=1):
+    """Write the images and SVG files of the given letters from their outlines, and return the paths
+
+    With more than one job the letters are spread across a process pool.
+    """
+    if jobs <= 1:
+        results = [write_letter_pictures(letter, sizes, svg_precision) for letter in letters]
+    else:
+        with _process_pool(jobs) as executor:
+            results = list(executor.map(write_letter_pictures, letters, repeat(sizes), repeat(svg_precision)))
+    return [path for paths in results for path in paths]
+
+def regenerate_pictures(letters, sizes, svg_precision=None, jobs=1):
+    """Write the images and SVG files of the given letters and report how long it took"""
+    start = time.perf_counter()
+    render_letter_pictures(letters, sizes, svg_precision, jobs)
+    written = []
+    if sizes:
+        written.append(f"{len(letters) * len(sizes)} images at {', '.join(f'{size}px' for size in sizes)}")
+    if svg_precision is not None:
+        written.append(f"{len(letters)} SVG files")
+    print(f"Rendered {' and '.join(written)} in {time.perf_counter() - start:.2f} s")
+
+def atlas_paths(pixels_per_em):
+    """Return the paths of the atlas image and its index at a number of pixels per em"""
+    base = os.path.join(ATLAS_DIR, f"{FONT_NAME}-{pixels_per_em}")
+    return f"{base}.png", f"{base}.json"
+
+def write_atlas(pixels_per_em, padding=ATLAS_PADDING, jobs=1):
+    """Pack every letter, rendered at `pixels_per_em`, into one atlas image with a JSON index, and return the paths
+
+    Each glyph is cropped to the pixels it covers, with `padding` pixels
+    around it. The index gives, by character, the glyph's rectangle in the
+    atlas, its texture coordinates, and its offset from the origin and
+    advance in pixels.
+    """
+    start = time.perf_counter()
+    records = draw_letter_records(string.ascii_lowercase, jobs)
+    # The outlines stay within the images' margin around the em square
+    rasters = [glyph_raster(record.outline, pixels_per_em, FONT_SIZE, -IMAGE_VIEW_BOX[0]) for record in records]
+    coverage, positions = build_atlas([raster for raster, _, _ in rasters], padding)
+    
+    image_path, index_path = atlas_paths(pixels_per_em)
+    glyphs = [(record.letter, raster.shape, position, left, top, record.advance * pixels_per_em / FONT_SIZE)
+              for record, (raster, left, top), position in zip(records, rasters, positions)]
+    index = atlas_index(os.path.basename(image_path), coverage.shape, pixels_per_em, glyphs)
+    os.makedirs(ATLAS_DIR, exist_ok=True)
+    image = coverage_image(coverage)
+    write_atomically(image_path, lambda f: image.save(f, "PNG", optimize=True))
+    write_atomically(index_path, lambda f: f.write((json.dumps(index, indent=1) + "\n").encode("utf-8")))
+    
+    used = sum(raster.size for raster, _, _ in rasters)
+    print(f"Packed {len(records)} glyphs at {pixels_per_em}px per em into a {coverage.shape[1]}x{coverage.shape[0]} "
+          f"atlas, {100 * used / coverage.size:.0f}% covered by glyphs, in {time.perf_counter() - start:.2f} s")
+    print(f"Atlas saved to {image_path} with its index in {index_path}")
+    return image_path, index_path
+
+def font_units_transform(units_per_em=FONT_SIZE):
+    """Return the transform from drawing coordinates to the font units of an em of `units_per_em`
+
+    Drawing coordinates have y growing downwards from the top of an em of
+    FONT_SIZE; font units grow upwards from the baseline at its bottom.
+    """
+    scale = units_per_em / FONT_SIZE
+    return Transform().translate(0, units_per_em).scale(scale, -scale)
+
+def compile_outline(outline, simplify_tolerance=None):
+    """Compile an outline in drawing coordinates to glyf data
+
+    The outline is replayed through an AffinePen into font units. With a
+    simplify tolerance, redundant points are then removed from each
+    contour.
+    """
+    pen = OutlinePen()
+    outline.draw(AffinePen(pen, font_units_transform()))
+    contours = []
+    for points, on_curve in pen.outline().contours():
+        if simplify_tolerance is not None:
+            points, on_curve = simplify_contour(*start_on_curve(points, on_curve), simplify_tolerance)
+        contours.append((points, on_curve))
+    return encode_glyph(contours)
+
+def compile_letter_glyph(letter):
+    """Draw the glyph for a letter and return its compiled glyf data
+
+    This runs in worker processes when building with several jobs, so it
+    only returns plain bytes that can be sent back to the main process.
+    """
+    return compile_outline(draw_letter_outline(letter), SIMPLIFY_TOLERANCE)
+
+def glyph_cache_key(letter):
+    """Return the glyph cache key for a letter
+
+    The key covers everything the compiled glyph depends on: the code of the
+    drawing function and the helpers and constants of this module it uses,
+    the geometry primitives and their constants, the settings from
+    drawing_settings() and the code they switch on, the functions here
+    that turn the drawing into glyf data, and the glyf encoder.
+    GLYPH_CACHE_VERSION covers anything else.
+    """
+    if letter in LETTER_SHAPES:
+        drawing = (LETTER_SHAPES[letter],)
+    else:
+        drawing = (draw_generic_shape, letter)
+    return fingerprint(GLYPH_CACHE_VERSION, FONT_SIZE, glyf_encoder, primitives, simplify, stroke, union,
+                       glyph_outline, affine_pen, drawing_settings(), draw_letter_outline, compile_outline,
+                       *drawing)
+
+def point_count_report(letters):
+    """Return lines comparing each glyph's points with the segment counts in its drawing code
+
+    The glyphs are drawn once with the fixed segment counts and once with
+    the current settings.
+    """
+    settings = drawing_settings()
+    apply_drawing_settings(None, None, SIMPLIFY_TOLERANCE, REMOVE_OVERLAPS, settings[-1])
+    try:
+        before = [len(draw_letter_outline(letter).points) for letter in letters]
+    finally:
+        apply_drawing_settings(*settings)
+    after = [len(draw_letter_outline(letter).points) for letter in letters]
+    
+    lines = []
+    for letter, old, new in zip(letters, before, after):
+        lines.append(f"{letter}: {old} -> {new} points ({100 * (new - old) / old:+.0f}%)")
+    total_before, total_after = sum(before), sum(after)
+    lines.append(f"Total: {total_before} -> {total_after} points "
+                 f"({100 * (total_after - total_before) / total_before:+.0f}%)")
+    return lines
+
+def simplify_report(letters):
+    """Return lines showing the points and bytes simplification saves in each glyph"""
+    lines = []
+    totals = [0, 0, 0, 0]
+    for letter in letters:
+        outline = draw_letter_outline(letter)
+        before = compile_outline(outline)
+        after = compile_outline(outline, SIMPLIFY_TOLERANCE)
+        counts = (glyph_data_stats(before)[1], glyph_data_stats(after)[1], len(before), len(after))
+        totals = [total + count for total, count in zip(totals, counts)]
+        lines.append(_simplify_line(f"{letter}:", *counts))
+    lines.append(_simplify_line("Total:", *totals))
+    return lines
+
+def _simplify_line(label, points_before, points_after, bytes_before, bytes_after):
+    saved_points = 100 * (points_before - points_after) / points_before if points_before else 0
+    saved_bytes = 100 * (bytes_before - bytes_after) / bytes_before if bytes_before else 0
+    return (f"{label} {points_before} -> {points_after} points ({saved_points:.0f}% saved), "
+            f"{bytes_before} -> {bytes_after} bytes ({saved_bytes:.0f}% saved)")
+
+def component_report(font, letters):
+    """Return lines comparing each glyph's size before and after sharing components
+
+    A glyph's size after includes the base glyph holding the contours it
+    doesn't share; the shared base glyphs are totalled separately.
+    """
+    glyf = font['glyf']
+    compiled = build_letter_glyph_data(letters)
+    
+    def size(glyph_name):
+        return len(glyf[glyph_name].compile(glyf)) if glyph_name in glyf else 0
+    
+    lines = []
+    total_before = total_after = 0
+    for letter in letters:
+        glyph_name = glyph_name_for(letter)
+        before = len(compiled[letter])
+        after = size(glyph_name) + size(glyph_name + components.OUTLINE_SUFFIX)
+        total_before += before
+        total_after += after
+        lines.append(f"{letter}: {before} -> {after} bytes ({100 * (after - before) / before:+.0f}%)")
+    shared = [glyph_name for glyph_name in font.getGlyphOrder()
+              if glyph_name.startswith(components.BASE_GLYPH_PREFIX)]
+    shared_size = sum(size(glyph_name) for glyph_name in shared)
+    total_after += shared_size
+    lines.append(f"Shared base glyphs: {len(shared)}, {shared_size} bytes")
+    lines.append(f"Total: {total_before} -> {total_after} bytes "
+                 f"({100 * (total_after - total_before) / total_before:+.0f}%)")
+    return lines
+
+def compile_letter_glyphs(letters, jobs=1):
+    """Compile the glyphs for the given letters, yielding their glyf data in order
+
+    With more than one job the drawing and compiling is spread across a
+    process pool; results always come in the order of `letters`.
+    """
+    if jobs <= 1:
+        for letter in letters:
+            yield compile_letter_glyph(letter)
+        return
+    
+    with _process_pool(jobs) as executor:
+        yield from executor.map(compile_letter_glyph, letters)
+
+def iter_letter_glyph_data(letters, jobs=1, cache=None):
+    """Yield (letter, compiled glyf data) for the given letters, in order
+
+    Glyphs found in the cache are reused; the rest are drawn and compiled,
+    possibly in parallel, and added to the cache. Glyphs are yielded as
+    they are compiled, so they needn't all be held at once.
+    """
+    cached = {}
+    cache_keys = {}
+    if cache is not None:
+        for letter in letters:
+            cache_keys[letter] = glyph_cache_key(letter)
+            data = cache.get(cache_keys[letter])
+            if data is not None:
+                cached[letter] = data
+    
+    compiled = compile_letter_glyphs([letter for letter in letters if letter not in cached], jobs)
+    for letter in letters:
+        data = cached.pop(letter, None)
+        if data is None:
+            data = next(compiled)
+            if cache is not None:
+                cache.put(cache_keys[letter], data)
+        yield letter, data
+
+def build_letter_glyph_data(letters, jobs=1, cache=None):
+    """Return a dictionary of compiled glyf data for the given letters; see iter_letter_glyph_data()"""
+    return dict(iter_letter_glyph_data(letters, jobs, cache))
+
+def glyph_data_in_order(font):
+    """Return the compiled glyf data of every glyph in the font, in glyph order
+
+    Glyphs still holding the data they were read or built from are used as
+    they are; others, such as composite glyphs, are compiled.
+    """
+    glyf = font['glyf']
+    glyph_data = []
+    for glyph_name in font.getGlyphOrder():
+        glyph = glyf.glyphs[glyph_name]
+        glyph_data.append(glyph.data if hasattr(glyph, "data") else glyph.compile(glyf))
+    return glyph_data
+
+def finalize_font(font, glyph_data=None):
+    """Fill in the values that depend on the glyphs from the glyf data, in one pass
+
+    Each glyph's left side bearing is set to its xMin, and the head
+    bounding box, maxp glyph limits, hhea extents and OS/2 average width
+    and Windows ascent and descent are worked out by GlyphStats. This is
+    used instead of fontTools' recalculation when saving, which decompiles
+    every glyph in the font and leaves the rest as they are.
+    `glyph_data` is the result of glyph_data_in_order(), if already known.
+    """
+    hmtx = font['hmtx']
+    glyf = font['glyf']
+    if glyph_data is None:
+        glyph_data = glyph_data_in_order(font)
+    stats = GlyphStats()
+    for glyph_name, data in zip(font.getGlyphOrder(), glyph_data):
+        composite = None
+        if glyph_data_stats(data)[0] < 0:
+            # Composite glyphs are rare enough to leave to fontTools
+            glyph = glyf[glyph_name]
+            points, contours, depth = glyph.getCompositeMaxpValues(glyf)
+            composite = (points, contours, len(glyph.components), depth)
+        advance = hmtx[glyph_name][0]
+        hmtx[glyph_name] = (advance, stats.add(data, advance, composite=composite))
+    stats.apply(font)
+
+def encoded_font(font):
+    """Return a font to save in place of `font`, with the glyf and loca tables already encoded
+
+    The glyf records are joined and indexed by glyf_encoder, and the values
+    derived from them are filled in by finalize_font(), so saving the
+    returned font doesn't decompile or recompile any glyph. It shares every
+    other table with `font`.
+    """
+    glyph_data = glyph_data_in_order(font)
+    finalize_font(font, glyph_data)
+    glyf_data, loca_data, font['head'].indexToLocFormat = build_glyf_loca(glyph_data)
+    
+    encoded = TTFont(recalcBBoxes=False)
+    encoded.setGlyphOrder(font.getGlyphOrder())
+    for tag in font.keys():
+        if tag not in ('GlyphOrder', 'glyf', 'loca'):
+            encoded[tag] = font[tag]
+    encoded['glyf'] = DefaultTable('glyf')
+    encoded['glyf'].data = glyf_data
+    encoded['loca'] = DefaultTable('loca')
+    encoded['loca'].data = loca_data
+    return encoded
+
+def write_atomically(path, write):
+    """Write a file through `write`, called with the open binary file, so readers never see it partly written"""
+    directory = os.path.dirname(path) or "."
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w+b") as f:
+            write(f)
+        # mkstemp creates private files; use the permissions of a normal file
+        umask = os.umask(0)
+        os.umask(umask)
+        os.chmod(tmp_path, 0o666 & ~umask)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+def save_font(font, path):
+    """Save a font atomically, so readers never see a partly written file"""
+    write_atomically(path, font.save)
+
+def publish_web_fonts():
+    """Write the web font versions of the font, point the demo page at them, and report their sizes"""
+    paths = write_web_fonts(OUTPUT_FILE, save_font)
+    for flavor, path in paths.items():
+        print(f"Web font saved to {path}")
+    if "woff2" not in paths:
+        print("Brotli is not installed, so no WOFF2 font was written")
+    if os.path.exists(DEMO_FILE) and update_font_face(DEMO_FILE, font_face_paths(OUTPUT_FILE, paths), write_atomically):
+        print(f"Updated the fonts used by {DEMO_FILE}")
+    print("\n".join(size_report(OUTPUT_FILE, paths)))
+
+def publish_glyph_index():
+    """Write the index of the letters' glyphs next to the font, and report its sizes"""
+    for path in write_glyph_index(OUTPUT_FILE, LETTER_WORDS, glyph_name_for, write_atomically):
+        print(f"Glyph index saved to {path} ({os.path.getsize(path)} bytes)")
+
+def notdef_glyph_data():
+    """Return the compiled glyf data of the .notdef glyph, an empty square"""
+    return compile_outline(Outline([(100, 100), (900, 100), (900, 900), (100, 900)], [4]))
+
+def print_added_glyph(letter):
+    """Report a letter's glyph as added to the font"""
+    if letter in LETTER_SHAPES:
+        print(f"Added custom shape for '{letter}' (Unicode: {ord(letter)})")
+    else:
+        print(f"Added generic shape for '{letter}' (Unicode: {ord(letter)})")
+
+def write_letter_font(path, letters, jobs=1, cache=None):
+    """Draw the glyphs for the given letters and stream them into a new font file
+
+    Each glyph is spooled by a FontWriter as soon as it is compiled, so
+    only the glyphs being drawn are in memory at any time. The file is the
+    same as adding the glyphs with add_letter_glyphs_to_font() and saving
+    the font with encoded_font() and save_font().
+    """
+    # Spool next to the output rather than in the temporary directory,
+    # which may be kept in memory
+    with FontWriter(create_empty_font(), spool_dir=os.path.dirname(path) or ".") as writer:
+        writer.add_glyph('.notdef', notdef_glyph_data(), FONT_SIZE)
+        for letter, data in iter_letter_glyph_data(letters, jobs, cache):
+            print_added_glyph(letter)
+            writer.add_glyph(glyph_name_for(letter), data, FONT_SIZE, unicodes=[ord(letter)])
+        write_atomically(path, writer.write)
+
+def patch_font(path, letters, jobs=1, cache=None):
+    """Replace the glyphs of some letters in an existing font file
+
+    Only the glyf and hmtx entries of those letters are rebuilt, along with
+    the values derived from the glyphs by finalize_font(); every other
+    table is copied from the existing file unchanged.
+    """
+    font = TTFont(path, recalcBBoxes=False)
+    cmap = font.getBestCmap()
+    compiled = build_letter_glyph_data(letters, jobs, cache)
+    
+    for letter in letters:
+        glyph_name = cmap.get(ord(letter))
+        if glyph_name is None:
+            raise KeyError(f"'{letter}' is not mapped in {path}")
+        font['glyf'][glyph_name] = Glyph(compiled[letter])
+        font['hmtx'].metrics[glyph_name] = (FONT_SIZE, 0)
+        print(f"Replaced shape for '{letter}' (Unicode: {ord(letter)})")
     
+    finalize_font(font)
+    save_font(font, path)
+    return font
+
+def add_letter_glyphs_to_font(font, jobs=1, cache=None, share_components=False):
+    """Add glyphs to the font for each letter with shapes representing words
+
+    With share_components, shapes repeated within and across glyphs are
+    stored once in base glyphs that the letters use as components.
+    """
     # Set up a list for the glyph order
     glyph_order = ['.notdef']  # Start with .notdef
     
     # Build the full glyph order first
     for letter in string.ascii_lowercase:
-        unicode_value = ord(letter)
-        glyph_name = f"uni{unicode_value:04X}"
-        glyph_order.append(glyph_name)
+        glyph_order.append(glyph_name_for(letter))
     
     # Set the glyph order in the font first
     font.setGlyphOrder(glyph_order)
     
     # Create a simple .notdef glyph (empty square)
-    pen = TTGlyphPen(glyphSet=font.getGlyphSet())
-    flipped_pen = FlippedPen(pen, FONT_SIZE)
-    flipped_pen.moveTo((100, 100))
-    flipped_pen.lineTo((900, 100))
-    flipped_pen.lineTo((900, 900))
-    flipped_pen.lineTo((100, 900))
-    flipped_pen.closePath()
-    font['glyf']['.notdef'] = flipped_pen.glyph()
+    font['glyf']['.notdef'] = Glyph(notdef_glyph_data())
     font['hmtx'].metrics['.notdef'] = (FONT_SIZE, 0)
     
-    # Add glyphs for each lowercase letter
-    for i, letter in enumerate(string.ascii_lowercase):
+    letters = string.ascii_lowercase
+    compiled = build_letter_glyph_data(letters, jobs, cache)
+    glyphs = {glyph_name_for(letter): compiled[letter] for letter in letters}
+    if share_components:
+        glyphs = deduplicate(glyphs)
+        # The base glyphs go after the letters and aren't mapped to any
+        # character
+        for glyph_name, glyph in glyphs.items():
+            if glyph_name not in glyph_order:
+                glyph_order.append(glyph_name)
+                font['glyf'][glyph_name] = glyph
+                font['hmtx'].metrics[glyph_name] = (0, glyph.xMin)
+        font.setGlyphOrder(glyph_order)
+    else:
+        glyphs = {glyph_name: Glyph(data) for glyph_name, data in glyphs.items()}
+    
+    # Merge the glyphs into the font in alphabetical order so the output
+    # doesn't depend on the number of jobs or on what was cached
+    for letter in letters:
         unicode_value = ord(letter)
-        glyph_name = f"uni{unicode_value:04X}"
-        
-        # Create a glyph with a letter-specific shape
-        pen = TTGlyphPen(glyphSet=font.getGlyphSet())
-        flipped_pen = FlippedPen(pen, FONT_SIZE)
+        glyph_name = glyph_name_for(letter)
+        print_added_glyph(letter)
         
-        if letter in letter_shapes:
-            # Use a specific drawing function for this letter
-            letter_shapes[letter](flipped_pen)
-            print(f"Added custom shape for '{letter}' (Unicode: {unicode_value})")
-        else:
-            # For letters without specific shapes, create a simple generic shape
-            center_x, center_y = FONT_SIZE/2, FONT_SIZE/2
-            radius = FONT_SIZE * 0.4
-            
-            # Create a basic shape (circle with the letter inside)
-            flipped_pen.moveTo((center_x + radius, center_y))
-            segments = 24
-            for j in range(1, segments + 1):
-                angle = 2 * math.pi * j / segments
-                x = center_x + radius * math.cos(angle)
-                y = center_y + radius * math.sin(angle)
-                flipped_pen.lineTo((x, y))
-            flipped_pen.closePath()
-            
-            # Add letter identifier (simple approximation)
-            letter_lines = []
-            
-            if letter == 'i':
-                # i - vertical line with dot
-                letter_lines = [
-                    [(center_x, center_y - radius/2), (center_x, center_y + radius/2)],
-                    [(center_x - radius/5, center_y - radius*0.8), (center_x + radius/5, center_y - radius*0.8)]
-                ]
-            elif letter == 'j':
-                # j - hook with dot
-                letter_lines = [
-                    [(center_x, center_y - radius/2), (center_x, center_y + radius/2)],
-                    [(center_x, center_y + radius/2), (center_x - radius/3, center_y + radius/2 + radius/3)],
-                    [(center_x - radius/5, center_y - radius*0.8), (center_x + radius/5, center_y - radius*0.8)]
-                ]
-            elif letter == 'k':
-                # k - vertical with two diagonals
-                letter_lines = [
-                    [(center_x - radius/3, center_y - radius/2), (center_x - radius/3, center_y + radius/2)],
-                    [(center_x - radius/3, center_y), (center_x + radius/3, center_y - radius/2)],
-                    [(center_x - radius/3, center_y), (center_x + radius/3, center_y + radius/2)]
-                ]
-            elif letter == 'l':
-                # l - vertical line
-                letter_lines = [
-                    [(center_x, center_y - radius/2), (center_x, center_y + radius/2)]
-                ]
-            elif letter == 'm':
-                # m - simplified m
-                letter_lines = [
-                    [(center_x - radius/2, center_y + radius/2), (center_x - radius/2, center_y - radius/2)],
-                    [(center_x - radius/2, center_y - radius/2), (center_x, center_y + radius/4)],
-                    [(center_x, center_y + radius/4), (center_x + radius/2, center_y - radius/2)],
-                    [(center_x + radius/2, center_y - radius/2), (center_x + radius/2, center_y + radius/2)]
-                ]
-            elif letter == 'n':
-                # n - simplified n
-                letter_lines = [
-                    [(center_x - radius/3, center_y + radius/2), (center_x - radius/3, center_y - radius/2)],
-                    [(center_x - radius/3, center_y - radius/2), (center_x + radius/3, center_y + radius/2)],
-                    [(center_x + radius/3, center_y + radius/2), (center_x + radius/3, center_y - radius/2)]
-                ]
-            elif letter == 'o':
-                # o - inner circle
-                inner_radius = radius * 0.6
-                pen.moveTo((center_x + inner_radius, center_y))
-                for j in range(1, segments + 1):
-                    angle = 2 * math.pi * j / segments
-                    x = center_x + inner_radius * math.cos(angle)
-                    y = center_y + inner_radius * math.sin(angle)
-                    flipped_pen.lineTo((x, y))
-                pen.closePath()
-            elif letter == 'p':
-                # p - simplified p
-                letter_lines = [
-                    [(center_x - radius/3, center_y + radius/2), (center_x - radius/3, center_y - radius/2)],
-                    [(center_x - radius/3, center_y - radius/2), (center_x + radius/3, center_y - radius/2)],
-                    [(center_x + radius/3, center_y - radius/2), (center_x + radius/3, center_y)],
-                    [(center_x + radius/3, center_y), (center_x - radius/3, center_y)]
-                ]
-            elif letter == 'q':
-                # q - circle with tail
-                inner_radius = radius * 0.5
-                pen.moveTo((center_x + inner_radius, center_y))
-                for j in range(1, segments + 1):
-                    angle = 2 * math.pi * j / segments
-                    x = center_x + inner_radius * math.cos(angle)
-                    y = center_y + inner_radius * math.sin(angle)
-                    flipped_pen.lineTo((x, y))
-                pen.closePath()
-                
-                # Tail
-                pen.moveTo((center_x + inner_radius*0.7, center_y + inner_radius*0.7))
-                pen.lineTo((center_x + radius/2, center_y + radius/2))
-                pen.closePath()
-            elif letter == 'r':
-                # r - simplified r
-                letter_lines = [
-                    [(center_x - radius/3, center_y + radius/2), (center_x - radius/3, center_y - radius/2)],
-                    [(center_x - radius/3, center_y - radius/3), (center_x, center_y - radius/2)],
-                    [(center_x, center_y - radius/2), (center_x + radius/3, center_y - radius/3)]
-                ]
-            elif letter == 's':
-                # s - simplified s
-                letter_lines = [
-                    [(center_x + radius/3, center_y - radius/2), (center_x - radius/3, center_y - radius/2)],
-                    [(center_x - radius/3, center_y - radius/2), (center_x - radius/3, center_y)],
-                    [(center_x - radius/3, center_y), (center_x + radius/3, center_y)],
-                    [(center_x + radius/3, center_y), (center_x + radius/3, center_y + radius/2)],
-                    [(center_x + radius/3, center_y + radius/2), (center_x - radius/3, center_y + radius/2)]
-                ]
-            elif letter == 't':
-                # t - simplified t
-                letter_lines = [
-                    [(center_x, center_y - radius/2), (center_x, center_y + radius/2)],
-                    [(center_x - radius/3, center_y - radius/4), (center_x + radius/3, center_y - radius/4)]
-                ]
-            elif letter == 'v':
-                # v - simplified v
-                letter_lines = [
-                    [(center_x - radius/3, center_y - radius/2), (center_x, center_y + radius/2)],
-                    [(center_x, center_y + radius/2), (center_x + radius/3, center_y - radius/2)]
-                ]
-            elif letter == 'w':
-                # w - simplified w
-                letter_lines = [
-                    [(center_x - radius/2, center_y - radius/2), (center_x - radius/4, center_y + radius/2)],
-                    [(center_x - radius/4, center_y + radius/2), (center_x, center_y - radius/4)],
-                    [(center_x, center_y - radius/4), (center_x + radius/4, center_y + radius/2)],
-                    [(center_x + radius/4, center_y + radius/2), (center_x + radius/2, center_y - radius/2)]
-                ]
-            elif letter == 'x':
-                # x - simplified x
-                letter_lines = [
-                    [(center_x - radius/3, center_y - radius/2), (center_x + radius/3, center_y + radius/2)],
-                    [(center_x - radius/3, center_y + radius/2), (center_x + radius/3, center_y - radius/2)]
-                ]
-            elif letter == 'y':
-                # y - simplified y
-                letter_lines = [
-                    [(center_x - radius/3, center_y - radius/2), (center_x, center_y)],
-                    [(center_x, center_y), (center_x + radius/3, center_y - radius/2)],
-                    [(center_x, center_y), (center_x, center_y + radius/2)]
-                ]
-            elif letter == 'z':
-                # z - simplified z
-                letter_lines = [
-                    [(center_x - radius/3, center_y - radius/2), (center_x + radius/3, center_y - radius/2)],
-                    [(center_x + radius/3, center_y - radius/2), (center_x - radius/3, center_y + radius/2)],
-                    [(center_x - radius/3, center_y + radius/2), (center_x + radius/3, center_y + radius/2)]
-                ]
-            
-            # Draw letter lines
-            for line in letter_lines:
-                flipped_pen.moveTo(line[0])
-                flipped_pen.lineTo(line[1])
-                flipped_pen.closePath()
-                
-            print(f"Added generic shape for '{letter}' (Unicode: {unicode_value})")
-        
-        font['glyf'][glyph_name] = flipped_pen.glyph()
+        font['glyf'][glyph_name] = glyphs[glyph_name]
         font['hmtx'].metrics[glyph_name] = (FONT_SIZE, 0)
         
         # Map the Unicode character to this glyph
@@ -2060,53 +2102,182 @@ def add_letter_glyphs_to_font(font):
     
     return font
 
-def main():
-    print("Creating a phonics font with letter-specific shapes...")
+def parse_args(argv=None):
+    """Parse the command line options"""
+    parser = argparse.ArgumentParser(description="Generate the Phonics font")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="number of processes used to draw and compile glyphs (default: 1)")
+    parser.add_argument("--cache-dir", default=GLYPH_CACHE_DIR,
+                        help="directory of the compiled glyph cache (default: %(default)s)")
+    parser.add_argument("--cache-size", type=float, default=GLYPH_CACHE_SIZE,
+                        help="maximum size of the glyph cache in megabytes (default: %(default)s)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="rebuild every glyph without reading or writing the cache")
+    parser.add_argument("--curves", action="store_true",
+                        help="draw round shapes as quadratic curves instead of polygons")
+    parser.add_argument("--curve-tolerance", type=float, default=CURVE_TOLERANCE, metavar="UNITS",
+                        help="maximum distance in font units between a curve and the true shape (default: %(default)s)")
+    parser.add_argument("--flatness", type=float, metavar="UNITS",
+                        help="work out how many segments each curve needs so that none strays more than "
+                             "this many font units from the true curve, and report the point counts")
+    parser.add_argument("--simplify", type=float, metavar="UNITS",
+                        help="remove duplicate and collinear points, and points within this many font units "
+                             "of the simplified outline, and report the savings")
+    parser.add_argument("--remove-overlaps", action="store_true",
+                        help="merge overlapping contours so each glyph is outlined once; works on polygons, "
+                             "so it can't be used with --curves")
+    parser.add_argument("--components", action="store_true",
+                        help="move shapes repeated within and across glyphs into shared component glyphs, "
+                             "and report the sizes")
+    parser.add_argument("--line-width", type=float, default=stroke.LINE_WIDTH, metavar="UNITS",
+                        help="width in font units of line details such as whiskers and seams; "
+                             "0 leaves them as zero-area contours (default: %(default)s)")
+    parser.add_argument("--line-join", choices=stroke.JOINS, default=stroke.LINE_JOIN,
+                        help="how line details turn corners (default: %(default)s)")
+    parser.add_argument("--line-cap", choices=stroke.CAPS, default=stroke.LINE_CAP,
+                        help="how line details end (default: %(default)s)")
+    parser.add_argument("--images", default=IMAGE_SIZES, metavar="SIZES",
+                        help="comma-separated sizes in pixels to render the glyph outlines to PNG images at; "
+                             "the first size is written to images/<letter>.png and others to "
+                             "images/<size>/<letter>.png (default: %(default)s)")
+    parser.add_argument("--no-images", action="store_true", help="don't render the images")
+    parser.add_argument("--svg-precision", type=int, default=SVG_PRECISION, metavar="DIGITS",
+                        help="decimal places of the coordinates in the SVG files written to svg/<letter>.svg "
+                             "(default: %(default)s)")
+    parser.add_argument("--no-svg", action="store_true", help="don't write the SVG files")
+    parser.add_argument("--atlas", type=int, metavar="PIXELS",
+                        help="also pack every glyph, rendered at this many pixels per em, into one image "
+                             "with a JSON index in atlas/")
+    parser.add_argument("--atlas-padding", type=int, default=ATLAS_PADDING, metavar="PIXELS",
+                        help="empty pixels around each glyph in the atlas (default: %(default)s)")
+    parser.add_argument("--only", metavar="LETTERS",
+                        help="comma-separated letters to replace in the existing font instead of rebuilding it")
+    args = parser.parse_args(argv)
+    if args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+    if args.curve_tolerance <= 0:
+        parser.error("--curve-tolerance must be positive")
+    if args.flatness is not None and args.flatness <= 0:
+        parser.error("--flatness must be positive")
+    if args.simplify is not None and args.simplify < 0:
+        parser.error("--simplify must not be negative")
+    if args.line_width < 0:
+        parser.error("--line-width must not be negative")
+    if args.no_images:
+        args.images = None
+    else:
+        try:
+            args.images = [int(size) for size in args.images.split(",") if size.strip()]
+        except ValueError:
+            parser.error(f"--images expects comma-separated sizes in pixels, got '{args.images}'")
+        if not args.images or min(args.images) < 1:
+            parser.error("--images sizes must be positive")
+        # Keep the first size first and drop duplicates
+        args.images = list(dict.fromkeys(args.images))
+    if args.svg_precision < 0:
+        parser.error("--svg-precision must not be negative")
+    if args.no_svg:
+        args.svg_precision = None
+    if args.atlas is not None and args.atlas < 1:
+        parser.error("--atlas must be positive")
+    if args.atlas_padding < 0:
+        parser.error("--atlas-padding must not be negative")
+    if args.remove_overlaps and args.curves:
+        # The union works on polygons, so curved glyphs would be left as drawn
+        parser.error("--remove-overlaps merges polygons and can't be used with --curves")
+    if args.components and args.only is not None:
+        parser.error("--components needs a full build and can't be used with --only")
+    if args.only is not None:
+        letters = [letter.strip().lower() for letter in args.only.split(",") if letter.strip()]
+        for letter in letters:
+            if len(letter) != 1 or letter not in string.ascii_lowercase:
+                parser.error(f"--only expects letters a-z, got '{letter}'")
+        # Keep alphabetical order and drop duplicates
+        args.only = sorted(set(letters))
+    return args
+
+def main(argv=None):
+    args = parse_args(argv)
+    
+    apply_drawing_settings(args.curve_tolerance if args.curves else None, args.flatness,
+                           args.simplify, args.remove_overlaps,
+                           (args.line_width, args.line_join, args.line_cap))
+    
+    cache = None
+    if not args.no_cache:
+        cache = GlyphCache(args.cache_dir, int(args.cache_size * 1024 * 1024))
+    
+    if args.only:
+        # Patch the existing font in place rather than rebuilding it
+        if not os.path.exists(OUTPUT_FILE):
+            print(f"{OUTPUT_FILE} does not exist yet; run a full build first")
+            return
+        print(f"Updating {', '.join(args.only)} in {OUTPUT_FILE}...")
+        patch_font(OUTPUT_FILE, args.only, jobs=args.jobs, cache=cache)
+        print(f"Font saved to {OUTPUT_FILE}")
+        publish_web_fonts()
+        publish_glyph_index()
+        if args.images or args.svg_precision is not None:
+            regenerate_pictures(args.only, args.images or [], args.svg_precision, args.jobs)
+        if args.atlas:
+            # The atlas holds every letter, so it is packed again in full
+            write_atlas(args.atlas, args.atlas_padding, args.jobs)
+        if args.flatness is not None:
+            print("\n".join(point_count_report(args.only)))
+        if args.simplify is not None:
+            print("\n".join(simplify_report(args.only)))
+        if cache is not None:
+            print(cache.report())
+        return
     
-    # Create a basic font
-    font = create_empty_font()
+    print("Creating a phonics font with letter-specific shapes...")
     
-    # Add glyphs for each letter
-    font = add_letter_glyphs_to_font(font)
+    # Sharing components needs every glyph at once; otherwise each glyph
+    # is written out as soon as it is drawn
+    if args.components:
+        font = add_letter_glyphs_to_font(create_empty_font(), jobs=args.jobs, cache=cache,
+                                         share_components=True)
     
     # Save the font
     try:
-        font.save(OUTPUT_FILE)
+        if args.components:
+            save_font(encoded_font(font), OUTPUT_FILE)
+        else:
+            write_letter_font(OUTPUT_FILE, string.ascii_lowercase, jobs=args.jobs, cache=cache)
         print(f"Font saved to {OUTPUT_FILE}")
+        publish_web_fonts()
+        publish_glyph_index()
         print("You can now install this font on your Mac by:")
         print("1. Double-clicking the font file")
         print("2. Clicking 'Install Font' in the Font Book app")
         print("\nThis font contains shapes representing words for each letter:")
-        print("a - apple shape")
-        print("b - ball shape")
-        print("c - cat shape")
-        print("d - dog shape")
-        print("e - elephant shape")
-        print("f - fish shape")
-        print("g - giraffe shape")
-        print("h - house shape")
-        print("i - igloo shape")
-        print("j - jellyfish shape")
-        print("k - kite shape")
-        print("l - lion shape")
-        print("m - monkey shape")
-        print("n - nest shape")
-        print("o - octopus shape")
-        print("p - penguin shape")
-        print("q - queen shape")
-        print("r - rabbit shape")
-        print("s - snake shape")
-        print("t - tiger shape")
-        print("u - umbrella shape")
-        print("v - violin shape")
-        print("w - watermelon shape")
-        print("x - xylophone shape")
-        print("y - yacht shape")
-        print("z - zebra shape")
+        for letter, word in LETTER_WORDS.items():
+            print(f"{letter} - {word} shape")
     except Exception as e:
         print(f"Error saving font: {e}")
         import traceback
         traceback.print_exc()
+    
+    if args.images or args.svg_precision is not None:
+        regenerate_pictures(string.ascii_lowercase, args.images or [], args.svg_precision, args.jobs)
+    
+    if args.atlas:
+        write_atlas(args.atlas, args.atlas_padding, args.jobs)
+    
+    if args.flatness is not None:
+        print(f"\nPoints per glyph, fixed segment counts -> flatness {args.flatness}:")
+        print("\n".join(point_count_report(string.ascii_lowercase)))
+    
+    if args.simplify is not None:
+        print(f"\nSimplified glyphs with tolerance {args.simplify}:")
+        print("\n".join(simplify_report(string.ascii_lowercase)))
+    
+    if args.components:
+        print("\nGlyph sizes with shared components:")
+        print("\n".join(component_report(font, string.ascii_lowercase)))
+    
+    if cache is not None:
+        print(cache.report())
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
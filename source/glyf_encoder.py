@@ -0,0 +1,173 @@
+"""Direct encoding of TrueType glyf records and the loca table
+
+encode_glyph() takes a glyph's contours as arrays and packs the glyf
+record itself: the header with the bounding box, the contour end points,
+an empty instruction block, and the coordinates as deltas with run-length
+encoded flags. build_glyf_loca() joins the records of a font into the glyf
+table and builds the loca table that indexes it.
+
+The output is byte for byte what drawing the contours into fontTools'
+TTGlyphPen and compiling the glyph and the tables gives, which makes
+fontTools a ready check on this module, but nothing here goes through
+fontTools' Glyph objects.
+"""
+import struct
+import numpy as np
+
+GLYPH_HEADER = struct.Struct(">hhhhh")
+
+# Simple glyph flags
+FLAG_ON_CURVE = 0x01
+FLAG_X_SHORT = 0x02
+FLAG_Y_SHORT = 0x04
+FLAG_REPEAT = 0x08
+FLAG_X_SAME = 0x10
+FLAG_Y_SAME = 0x20
+
+# Runs of equal flags longer than this take more than one repeat entry
+MAX_REPEAT = 255
+# The short loca format stores offsets / 2 in 16 bits
+SHORT_LOCA_LIMIT = 0x20000
+
+def round_coordinates(points):
+    """Round coordinates half up to integers, like fontTools' otRound"""
+    return np.floor(np.asarray(points, dtype=np.float64) + 0.5).astype(np.int64)
+
+def start_on_curve(points, on_curve):
+    """Return a closed contour rotated to start at its first on-curve point, as spline() draws it"""
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    on_curve = np.asarray(on_curve, dtype=bool)
+    if on_curve.any() and not on_curve[0]:
+        first = int(np.argmax(on_curve))
+        points, on_curve = np.roll(points, -first, axis=0), np.roll(on_curve, -first)
+    return points, on_curve
+
+def prepare_contour(points, on_curve):
+    """Return a contour's points and flags as TTGlyphPen would store them, or None
+
+    The contour is started at its first on-curve point, a last point
+    repeating the first is dropped, and a contour of a single point isn't
+    drawn at all. A contour ending in control points is closed with a
+    curve back to its first point, so only a contour ending on the curve,
+    or one without on-curve points, can have its last point dropped.
+    """
+    points, on_curve = start_on_curve(points, on_curve)
+    if len(points) < 2:
+        return None
+    if (points[-1] == points[0]).all() and (on_curve[-1] or not on_curve.any()):
+        points, on_curve = points[:-1], on_curve[:-1]
+    return points, on_curve
+
+def _encode_axis(deltas, short_flag, same_flag):
+    """Return the flag bits and packed bytes of one coordinate of the deltas
+
+    A delta of 0 takes no bytes, one within 255 takes a byte holding its
+    magnitude, with the same flag giving its sign, and any other a signed
+    16-bit word.
+    """
+    zero = deltas == 0
+    short = ~zero & (np.abs(deltas) <= 255)
+    word = ~zero & ~short
+    flags = np.where(short, short_flag, 0) | np.where(zero | (short & (deltas > 0)), same_flag, 0)
+    # Every delta as two bytes, of which only the ones its format uses are kept
+    values = np.where(short, np.abs(deltas), deltas & 0xFFFF)
+    packed = np.column_stack((np.where(short, values, values >> 8), values & 0xFF)).astype(np.uint8)
+    used = np.column_stack((short | word, word))
+    return flags.astype(np.uint8), packed[used].tobytes()
+
+def _encode_flags(flags):
+    """Run-length encode the point flags
+
+    A flag repeated once more is written twice; a longer run is written
+    once with the repeat flag set, followed by the number of repeats.
+    """
+    if len(flags) == 0:
+        return b""
+    changes = np.flatnonzero(flags[1:] != flags[:-1]) + 1
+    starts = np.concatenate(([0], changes))
+    lengths = np.diff(np.concatenate((starts, [len(flags)])))
+    encoded = bytearray()
+    for flag, length in zip(flags[starts].tolist(), lengths.tolist()):
+        while length:
+            count = min(length, MAX_REPEAT + 1)
+            if count <= 2:
+                encoded += bytes((flag,)) * count
+            else:
+                encoded += bytes((flag | FLAG_REPEAT, count - 1))
+            length -= count
+    return bytes(encoded)
+
+def encode_glyph(contours):
+    """Return the glyf record of a simple glyph made of the given contours
+
+    `contours` holds (points, on_curve) pairs, with points as (n, 2)
+    arrays in font units, which are rounded to integers. A glyph without
+    contours is empty.
+    """
+    prepared = [contour for contour in (prepare_contour(points, on_curve) for points, on_curve in contours)
+                if contour is not None]
+    if not prepared:
+        return b""
+    points = round_coordinates(np.vstack([points for points, _ in prepared]))
+    on_curve = np.concatenate([on_curve for _, on_curve in prepared])
+    end_points = np.cumsum([len(contour_points) for contour_points, _ in prepared]) - 1
+
+    x_min, y_min = points.min(axis=0).tolist()
+    x_max, y_max = points.max(axis=0).tolist()
+    deltas = np.diff(points, axis=0, prepend=np.zeros((1, 2), dtype=np.int64))
+    x_flags, xs = _encode_axis(deltas[:, 0], FLAG_X_SHORT, FLAG_X_SAME)
+    y_flags, ys = _encode_axis(deltas[:, 1], FLAG_Y_SHORT, FLAG_Y_SAME)
+    flags = on_curve.astype(np.uint8) * FLAG_ON_CURVE | x_flags | y_flags
+    return b"".join((GLYPH_HEADER.pack(len(prepared), x_min, y_min, x_max, y_max),
+                     end_points.astype(">u2").tobytes(),
+                     b"\0\0",  # No instructions
+                     _encode_flags(flags), xs, ys))
+
+def glyph_data_stats(data):
+    """Return (contours, points, xMin, yMin, xMax, yMax) from compiled glyf data
+
+    Only the glyph header and contour end points are read, so this is much
+    cheaper than decompiling the glyph. Composite glyphs have -1 contours
+    and no points of their own.
+    """
+    if not data:
+        return 0, 0, 0, 0, 0, 0
+    num_contours, x_min, y_min, x_max, y_max = GLYPH_HEADER.unpack_from(data)
+    num_points = 0
+    if num_contours > 0:
+        last_end_offset = GLYPH_HEADER.size + 2 * (num_contours - 1)
+        num_points = struct.unpack_from(">H", data, last_end_offset)[0] + 1
+    return num_contours, num_points, x_min, y_min, x_max, y_max
+
+def glyf_locations(lengths):
+    """Return which glyf records get a padding byte and where each record starts
+
+    If the glyf table is small enough for the short loca format, which
+    needs even offsets, records of odd length are padded with a zero byte.
+    The locations have one more entry than `lengths`, the table's length.
+    """
+    lengths = np.asarray(lengths, dtype=np.int64)
+    padded = lengths % 2 == 1
+    if lengths.sum() + padded.sum() >= SHORT_LOCA_LIMIT:
+        padded[:] = False
+    return padded, np.concatenate(([0], np.cumsum(lengths + padded)))
+
+def encode_loca(locations):
+    """Return the loca table for the given locations and its format
+
+    The format is 0 for short offsets and 1 for long ones, as stored in
+    the head table's indexToLocFormat.
+    """
+    locations = np.asarray(locations, dtype=np.int64)
+    if locations[-1] < SHORT_LOCA_LIMIT and not (locations % 2).any():
+        return (locations // 2).astype(">u2").tobytes(), 0
+    return locations.astype(">u4").tobytes(), 1
+
+def build_glyf_loca(glyph_data):
+    """Return the glyf table, the loca table and its format for glyf records in glyph order"""
+    glyph_data = list(glyph_data)
+    padded, locations = glyf_locations([len(data) for data in glyph_data])
+    loca, index_to_loc_format = encode_loca(locations)
+    glyf = b"".join(data + b"\0" if pad else data for data, pad in zip(glyph_data, padded.tolist()))
+    # A glyf table with no data at all is given a zero byte, as fontTools does
+    return glyf or b"\0", loca, index_to_loc_format
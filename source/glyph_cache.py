@@ -0,0 +1,178 @@
+"""On-disk cache of compiled glyphs, keyed by the code that drew them"""
+import os
+import hashlib
+import inspect
+import tempfile
+
+# Module-level values hashed as constants
+CONSTANT_TYPES = (int, float, str, bytes, bool, tuple, type(None))
+
+def _global_names(code):
+    """Return the names a code object and the code nested in it may look up as globals"""
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if inspect.iscode(const):
+            names |= _global_names(const)
+    return names
+
+def _feed(digest, obj, seen):
+    """Add an object to a fingerprint digest
+
+    Functions bring in their default arguments, the values they close
+    over, and the functions, classes and constants of their own module
+    that they refer to by name, so changing a default, a helper or a
+    constant changes the fingerprint of every function using it. `seen`
+    holds the ids of the functions and classes already added.
+    """
+    if inspect.iscode(obj):
+        # Hash what the code does, not where it lives in the file, so moving
+        # a function around doesn't invalidate its cached glyphs
+        digest.update(b"code")
+        digest.update(obj.co_code)
+        digest.update(repr(obj.co_names).encode())
+        for const in obj.co_consts:
+            _feed(digest, const, seen)
+    elif inspect.isfunction(obj) or inspect.ismethod(obj):
+        function = getattr(obj, "__func__", obj)
+        if id(function) in seen:
+            digest.update(f"seen {function.__qualname__}".encode())
+        else:
+            seen.add(id(function))
+            _feed(digest, function.__code__, seen)
+            digest.update(b"defaults")
+            _feed(digest, function.__defaults__ or (), seen)
+            _feed(digest, sorted((function.__kwdefaults__ or {}).items()), seen)
+            for cell in function.__closure__ or ():
+                try:
+                    value = cell.cell_contents
+                except ValueError:
+                    digest.update(b"empty cell")
+                else:
+                    digest.update(b"cell")
+                    _feed(digest, value, seen)
+            for name in sorted(_global_names(function.__code__)):
+                value = function.__globals__.get(name)
+                if ((inspect.isfunction(value) or inspect.isclass(value))
+                        and value.__module__ == function.__module__):
+                    digest.update(f"global {name}".encode())
+                    _feed(digest, value, seen)
+                elif name.isupper() and isinstance(value, CONSTANT_TYPES):
+                    digest.update(f"global {name}".encode())
+                    _feed(digest, value, seen)
+    elif inspect.isclass(obj):
+        if id(obj) in seen:
+            digest.update(f"seen {obj.__qualname__}".encode())
+        else:
+            seen.add(id(obj))
+            digest.update(f"class {obj.__qualname__}".encode())
+            for name, value in sorted(vars(obj).items()):
+                if inspect.isfunction(value):
+                    digest.update(name.encode())
+                    _feed(digest, value, seen)
+    elif inspect.ismodule(obj):
+        # Every function and class defined in the module, and its constants
+        digest.update(f"module {obj.__name__}".encode())
+        for name, value in sorted(vars(obj).items()):
+            if (inspect.isfunction(value) or inspect.isclass(value)) and value.__module__ == obj.__name__:
+                digest.update(name.encode())
+                _feed(digest, value, seen)
+            elif name.isupper() and isinstance(value, CONSTANT_TYPES):
+                digest.update(name.encode())
+                _feed(digest, value, seen)
+    elif inspect.isbuiltin(obj):
+        # The repr of a builtin may hold its address, which changes every run
+        digest.update(f"builtin {getattr(obj, '__module__', None)}.{obj.__qualname__}".encode())
+    elif isinstance(obj, (tuple, list)):
+        digest.update(f"seq {len(obj)}".encode())
+        for item in obj:
+            _feed(digest, item, seen)
+    else:
+        digest.update(repr(obj).encode())
+    digest.update(b"\0")
+
+def fingerprint(*objects):
+    """Return a hex digest identifying functions, classes, modules and plain values"""
+    digest = hashlib.sha256()
+    seen = set()
+    for obj in objects:
+        _feed(digest, obj, seen)
+    return digest.hexdigest()
+
+class GlyphCache:
+    """A size-bounded, least-recently-used cache of compiled glyf data
+
+    Each entry is stored in its own file named after its key. The file
+    modification time records when the entry was last used, so eviction
+    removes the entries with the oldest times first.
+    """
+    def __init__(self, directory, max_size=64 * 1024 * 1024):
+        self.directory = directory
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+        # The limit may have been lowered since the cache was last used
+        self.evict()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.glyf")
+
+    def get(self, key):
+        """Return the cached data for a key, or None on a miss"""
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+
+        # Mark the entry as recently used
+        os.utime(path)
+        self.hits += 1
+        return data
+
+    def put(self, key, data):
+        """Store data for a key, then evict old entries if over the size limit"""
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, self._path(key))
+        finally:
+            # Left behind only if the write failed
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        self.evict()
+
+    def entries(self):
+        """Return (mtime, size, path) for each entry, oldest first"""
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".glyf"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+        entries.sort()
+        return entries
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits its size limit"""
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_size:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def report(self):
+        """Return a one-line summary of cache usage"""
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        lookups = self.hits + self.misses
+        rate = 100 * self.hits / lookups if lookups else 0
+        return (f"Glyph cache: {self.hits} hits, {self.misses} misses ({rate:.0f}% hit rate), "
+                f"{len(entries)} entries using {total / 1024:.1f} KB of {self.max_size / 1024:.0f} KB")
@@ -0,0 +1,159 @@
+"""Sidecar index of the letters' glyphs, for tools that don't parse the font
+
+The web app, the asset pipeline and tests want to know basic facts about
+each glyph: the word it pictures, its bounding box, how many points and
+contours it has, and whether it changed since the last build. The build
+writes these next to the TTF in two forms with the same content:
+
+Phonics.glyphs.json, for people and scripts:
+
+    {"font": "Phonics.ttf", "units_per_em": 1000, "glyphs": {"a": {
+        "word": "apple", "glyph": "uni0061", "glyph_id": 1, "advance": 1000,
+        "bbox": [x_min, y_min, x_max, y_max], "points": 42, "contours": 3,
+        "hash": "..."}, ...}}
+
+Phonics.glyphs.bin, a header, fixed-size little-endian records sorted by
+code point, then the UTF-8 words and glyph names the records point into.
+read_binary_index() reads it back into the "glyphs" dictionary above.
+
+The bounding box is the one in the glyph's header, in font units with y
+growing upwards. Points and contours count those of composite glyphs'
+components. The hash is a BLAKE2b digest of the decoded outline and the
+advance. It doesn't depend on where contours start or the order they
+come in, so it only changes when the glyph's shape does, whether or not
+the glyph is built from components. The font keeps no glyph names (its
+post table is format 3), so the names are the ones the build gives the
+glyphs.
+
+The glyphs are read with ttf_reader, without fontTools. Reading an index
+back needs only the standard library.
+"""
+import os
+import json
+import struct
+import hashlib
+
+# File header: magic, format version, units per em, number of records
+HEADER = struct.Struct("<4sHHI")
+MAGIC = b"PHGI"
+VERSION = 1
+# Code point, glyph id, advance, bounding box, points, contours, the
+# offset and length of the word and of the glyph name in the strings
+# after the records, and the hash
+RECORD = struct.Struct("<IHH4hIHIHIH16s")
+HASH_SIZE = 16
+
+def index_paths(ttf_path):
+    """Return the paths of the JSON and binary indexes written next to the TTF"""
+    base = os.path.splitext(ttf_path)[0]
+    return base + ".glyphs.json", base + ".glyphs.bin"
+
+def canonical_contour(points, on_curve):
+    """Return a contour's points and on-curve flags as (x, y, on) tuples, from the smallest rotation
+
+    The same closed contour can start at any of its points.
+    """
+    contour = [(x, y, int(on)) for (x, y), on in zip(points, on_curve)]
+    smallest = min(contour)
+    return min(contour[start:] + contour[:start] for start, point in enumerate(contour) if point == smallest)
+
+def outline_hash(glyph):
+    """Return the digest of a decoded glyph's outline and advance
+
+    Contours are hashed from their smallest rotation, and in sorted order,
+    since a composite glyph lists its components' contours in its own
+    order and components may start them at other points.
+    """
+    contours = []
+    start = 0
+    for end in glyph.ends:
+        contour = canonical_contour(glyph.points[start:end], glyph.on_curve[start:end])
+        contours.append(struct.pack(f"<I{3 * len(contour)}i", len(contour), *sum(contour, ())))
+        start = end
+    digest = hashlib.blake2b(b"".join(sorted(contours)), digest_size=HASH_SIZE)
+    digest.update(struct.pack("<H", glyph.advance))
+    return digest.digest()
+
+def glyph_entries(ttf_path, words, glyph_name):
+    """Return the font's units per em and the index entries of the characters in `words`
+
+    `words` maps each character to the word its glyph pictures, and
+    `glyph_name` returns the glyph name the build uses for a character.
+    """
+    # Imported here so that reading an index doesn't load NumPy
+    from ttf_reader import FontReader
+    entries = {}
+    with FontReader(ttf_path) as font:
+        for character in sorted(words):
+            glyph_id = font.glyph_id(character)
+            if glyph_id == 0:
+                raise KeyError(f"'{character}' is not mapped in {ttf_path}")
+            glyph = font.glyph(glyph_id)
+            entries[character] = {
+                "word": words[character],
+                "glyph": glyph_name(character),
+                "glyph_id": glyph_id,
+                "advance": glyph.advance,
+                "bbox": list(glyph.bounds),
+                "points": len(glyph.points),
+                "contours": len(glyph.ends),
+                "hash": outline_hash(glyph).hex(),
+            }
+        return font.units_per_em, entries
+
+def json_index(font_name, units_per_em, entries):
+    """Return the JSON index of the entries from glyph_entries(), one glyph to a line"""
+    glyphs = ",\n".join(f"  {json.dumps(character)}: {json.dumps(entry)}" for character, entry in entries.items())
+    return (f'{{"font": {json.dumps(font_name)}, "units_per_em": {units_per_em}, "glyphs": {{\n'
+            f"{glyphs}\n}}}}\n")
+
+def binary_index(units_per_em, entries):
+    """Return the binary index of the entries from glyph_entries()"""
+    records = []
+    strings = bytearray()
+    for character, entry in sorted(entries.items(), key=lambda item: ord(item[0])):
+        places = []
+        for text in (entry["word"], entry["glyph"]):
+            encoded = text.encode("utf-8")
+            places += [len(strings), len(encoded)]
+            strings += encoded
+        records.append(RECORD.pack(ord(character), entry["glyph_id"], entry["advance"], *entry["bbox"],
+                                   entry["points"], entry["contours"], *places, bytes.fromhex(entry["hash"])))
+    return HEADER.pack(MAGIC, VERSION, units_per_em, len(records)) + b"".join(records) + bytes(strings)
+
+def read_binary_index(path):
+    """Read a binary index, and return its units per em and entries by character"""
+    with open(path, "rb") as f:
+        data = f.read()
+    magic, version, units_per_em, count = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{path} isn't a glyph index of this version")
+    strings = HEADER.size + count * RECORD.size
+    entries = {}
+    for index in range(count):
+        (code, glyph_id, advance, x_min, y_min, x_max, y_max, points, contours,
+         word_at, word_length, name_at, name_length, digest) = RECORD.unpack_from(data, HEADER.size + index * RECORD.size)
+        entries[chr(code)] = {
+            "word": data[strings + word_at:strings + word_at + word_length].decode("utf-8"),
+            "glyph": data[strings + name_at:strings + name_at + name_length].decode("utf-8"),
+            "glyph_id": glyph_id,
+            "advance": advance,
+            "bbox": [x_min, y_min, x_max, y_max],
+            "points": points,
+            "contours": contours,
+            "hash": digest.hex(),
+        }
+    return units_per_em, entries
+
+def write_glyph_index(ttf_path, words, glyph_name, write):
+    """Write the JSON and binary indexes of the characters in `words` next to the TTF, and return their paths
+
+    `write` is called with a path and a function that writes the file's
+    contents to the open binary file, such as write_atomically().
+    """
+    units_per_em, entries = glyph_entries(ttf_path, words, glyph_name)
+    json_path, binary_path = index_paths(ttf_path)
+    write(json_path, lambda f: f.write(json_index(os.path.basename(ttf_path), units_per_em, entries).encode("utf-8")))
+    binary = binary_index(units_per_em, entries)
+    write(binary_path, lambda f: f.write(binary))
+    return json_path, binary_path
@@ -0,0 +1,169 @@
+"""Compact, array-backed outline representation for glyphs
+
+An Outline is recorded once by drawing into an OutlinePen and can then be
+replayed into any segment pen (TTGlyphPen, an SVG path, a rasterizer, ...)
+without running the drawing code again. Outlines serialize to a small
+binary format so they can be cached or sent between processes.
+"""
+import struct
+import numpy as np
+from primitives import spline
+
+# Serialized outline: magic, format version, number of points, number of contours
+OUTLINE_HEADER = struct.Struct("<4sHII")
+OUTLINE_MAGIC = b"PHOL"
+OUTLINE_VERSION = 2
+
+class Outline:
+    """The closed contours of one glyph
+
+    `points` is an (n, 2) float64 array holding the points of every contour
+    one after another, and `ends` holds the index one past the last point
+    of each contour, so contour i is points[ends[i - 1]:ends[i]].
+    `on_curve` flags each point; the others are quadratic control points,
+    as in the TrueType glyf table.
+    """
+    __slots__ = ("points", "ends", "on_curve")
+
+    def __init__(self, points=None, ends=None, on_curve=None):
+        self.points = np.zeros((0, 2)) if points is None else np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        self.ends = np.zeros(0, dtype=np.int32) if ends is None else np.asarray(ends, dtype=np.int32)
+        if on_curve is None:
+            self.on_curve = np.ones(len(self.points), dtype=bool)
+        else:
+            self.on_curve = np.asarray(on_curve, dtype=bool)
+
+    def __len__(self):
+        return len(self.ends)
+
+    def __eq__(self, other):
+        if not isinstance(other, Outline):
+            return NotImplemented
+        return (np.array_equal(self.points, other.points) and np.array_equal(self.ends, other.ends)
+                and np.array_equal(self.on_curve, other.on_curve))
+
+    def __repr__(self):
+        return f"<Outline {len(self.ends)} contours, {len(self.points)} points>"
+
+    def contours(self):
+        """Yield the points and on-curve flags of each contour as array views"""
+        start = 0
+        for end in self.ends.tolist():
+            yield self.points[start:end], self.on_curve[start:end]
+            start = end
+
+    def draw(self, pen):
+        """Replay the outline into a segment pen"""
+        polyline = getattr(pen, "polyline", None)
+        for contour, on_curve in self.contours():
+            if not on_curve.all():
+                spline(pen, contour, on_curve)
+            elif polyline is not None:
+                polyline(contour)
+            else:
+                points = contour.tolist()
+                pen.moveTo(tuple(points[0]))
+                for point in points[1:]:
+                    pen.lineTo(tuple(point))
+                pen.closePath()
+
+    def to_bytes(self):
+        """Serialize the outline to bytes"""
+        header = OUTLINE_HEADER.pack(OUTLINE_MAGIC, OUTLINE_VERSION, len(self.points), len(self.ends))
+        return (header + self.ends.astype("<i4").tobytes()
+                + self.on_curve.astype(np.uint8).tobytes()
+                + self.points.astype("<f8").tobytes())
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Deserialize an outline written by to_bytes()"""
+        magic, version, num_points, num_contours = OUTLINE_HEADER.unpack_from(data)
+        if magic != OUTLINE_MAGIC or version != OUTLINE_VERSION:
+            raise ValueError("not a serialized outline, or an unsupported version")
+        offset = OUTLINE_HEADER.size
+        ends = np.frombuffer(data, dtype="<i4", count=num_contours, offset=offset)
+        offset += 4 * num_contours
+        on_curve = np.frombuffer(data, dtype=np.uint8, count=num_points, offset=offset)
+        offset += num_points
+        points = np.frombuffer(data, dtype="<f8", count=2 * num_points, offset=offset)
+        return cls(points.reshape(-1, 2).copy(), ends.copy(), on_curve.astype(bool))
+
+class OutlinePen:
+    """A pen that records closed contours of lines and quadratic curves into an Outline"""
+    def __init__(self):
+        self._points = []
+        self._on_curve = []
+        self._ends = []
+        self._contour = None
+        self._flags = None
+
+    def moveTo(self, pt):
+        if self._contour is not None:
+            raise ValueError("moveTo() called before closing the previous contour")
+        self._contour = [pt]
+        self._flags = [True]
+
+    def lineTo(self, pt):
+        self._contour.append(pt)
+        self._flags.append(True)
+
+    def qCurveTo(self, *points):
+        # A contour of only off-curve points has no moveTo and ends with None
+        if self._contour is None:
+            self._contour = []
+            self._flags = []
+        for pt in points[:-1]:
+            self._contour.append(pt)
+            self._flags.append(False)
+        if points[-1] is not None:
+            self._contour.append(points[-1])
+            self._flags.append(True)
+
+    def closePath(self):
+        # Like TTGlyphPen, drop single points and a final point repeating the first
+        contour, flags = self._contour, self._flags
+        self._contour = self._flags = None
+        if len(contour) > 1 and tuple(contour[-1]) == tuple(contour[0]) and flags[-1] and flags[0]:
+            contour.pop()
+            flags.pop()
+        if len(contour) < 2:
+            return
+        self._points.extend(contour)
+        self._on_curve.extend(flags)
+        self._ends.append(len(self._points))
+
+    def endPath(self):
+        # TrueType has no open contours, so like TTGlyphPen treat it as closed
+        self.closePath()
+
+    def polyline(self, points, close=True):
+        """Record a whole contour given as an (n, 2) array, ending it like closePath() or endPath()"""
+        if self._contour is not None:
+            raise ValueError("polyline() called before closing the previous contour")
+        self._contour = [tuple(point) for point in np.asarray(points, dtype=np.float64).tolist()]
+        self._flags = [True] * len(self._contour)
+        if close:
+            self.closePath()
+        else:
+            self.endPath()
+
+    def outline(self):
+        """Return the recorded contours as an Outline"""
+        return Outline(self._points, self._ends, self._on_curve)
+
+class GlyphRecord:
+    """A glyph's identity and metrics together with its outline"""
+    __slots__ = ("letter", "name", "advance", "outline")
+
+    def __init__(self, letter, name, advance, outline):
+        self.letter = letter
+        self.name = name
+        self.advance = advance
+        self.outline = outline
+
+    @property
+    def unicode(self):
+        return ord(self.letter)
+
+    def __repr__(self):
+        return f"<GlyphRecord {self.letter!r} {self.name} {self.outline!r}>"
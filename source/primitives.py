@@ -0,0 +1,299 @@
+"""Vectorized geometry primitives for drawing glyph contours
+
+The *_points functions build a whole contour as an (n, 2) NumPy array in
+one step. The functions named after the shapes draw them on a pen as closed
+contours, so the draw_* functions don't need their own trig loops.
+
+Full ellipses start at angle 0 and don't repeat their first point at the
+end; the closing segment is implied by closePath().
+
+By default curves are drawn as polygons with the given number of segments.
+After set_flatness(), the number of segments is worked out from each
+curve's radius and sweep instead, so no segment strays further than the
+flatness (in font units) from the true curve. After set_curve_tolerance(),
+circles, ellipses and arcs are drawn as TrueType quadratic splines
+instead, with as few pieces as keep them within the tolerance of the true
+curve.
+"""
+import math
+from collections import namedtuple
+from functools import lru_cache
+import numpy as np
+
+# Maximum distance between a curve and its quadratic spline, or None to
+# draw curves as polygons
+CURVE_TOLERANCE = None
+
+# Maximum distance between a curve and the polygon drawn for it, or None
+# to use the segment counts given by the drawing code
+FLATNESS = None
+
+def set_curve_tolerance(tolerance):
+    """Draw curves as quadratic splines within `tolerance`, or as polygons if None"""
+    global CURVE_TOLERANCE
+    CURVE_TOLERANCE = tolerance
+
+def set_flatness(flatness):
+    """Choose polygon segment counts to stay within `flatness`, or use the given counts if None"""
+    global FLATNESS
+    FLATNESS = flatness
+
+# An elliptical arc from angle `start` sweeping `sweep` radians, drawn with
+# `segments` segments as a polygon
+Arc = namedtuple("Arc", "cx cy rx ry start sweep segments")
+
+@lru_cache(maxsize=None)
+def unit_circle(segments):
+    """Return (cos, sin) pairs for `segments` evenly spaced angles around a circle"""
+    angles = 2 * np.pi * np.arange(segments) / segments
+    table = np.column_stack((np.cos(angles), np.sin(angles)))
+    table.flags.writeable = False
+    return table
+
+@lru_cache(maxsize=None)
+def unit_arc(start, sweep, segments):
+    """Return (cos, sin) pairs for the segments + 1 angles along an arc"""
+    angles = start + sweep * np.arange(segments + 1) / segments
+    table = np.column_stack((np.cos(angles), np.sin(angles)))
+    table.flags.writeable = False
+    return table
+
+@lru_cache(maxsize=None)
+def unit_spline(start, sweep, pieces):
+    """Return the off-curve points of a quadratic spline along a unit circle arc
+
+    Each control point sits where the tangents at the ends of its piece
+    meet, so the midpoint of two neighbouring control points lies on the
+    circle and can be left implied.
+    """
+    half = sweep / pieces / 2
+    angles = start + half * (2 * np.arange(pieces) + 1)
+    table = np.column_stack((np.cos(angles), np.sin(angles))) / math.cos(half)
+    table.flags.writeable = False
+    return table
+
+def flat_segments(radius, sweep, segments, minimum=1):
+    """Return how many segments to draw an arc with
+
+    Without a flatness setting this is `segments`. Otherwise it is the
+    fewest segments whose chords stay within the flatness of the arc: a
+    chord spanning angle a is radius * (1 - cos(a/2)) from the arc.
+    """
+    if FLATNESS is None:
+        return segments
+    if FLATNESS >= radius:
+        return minimum
+    step = 2 * math.acos(1 - FLATNESS / radius)
+    return max(minimum, math.ceil(abs(sweep) / step - 1e-9))
+
+def quadratic_pieces(radius, sweep, tolerance, minimum=1):
+    """Return how many quadratic pieces keep an arc within the tolerance
+
+    A piece spanning angle a overshoots the circle by at most
+    radius * (1 - cos(a/2))**2 / (2 * cos(a/2)). No piece spans more than
+    a quarter turn.
+    """
+    pieces = max(minimum, math.ceil(abs(sweep) / (math.pi / 2) - 1e-9))
+    while True:
+        c = math.cos(sweep / pieces / 2)
+        if radius * (1 - c)**2 / (2 * c) <= tolerance:
+            return pieces
+        pieces += 1
+
+def rotate(points, angle):
+    """Rotate points around the origin by an angle in radians"""
+    c, s = math.cos(angle), math.sin(angle)
+    return points @ np.array([[c, s], [-s, c]])
+
+def circle_points(cx, cy, radius, segments):
+    """Return the corners of a regular polygon approximating a circle"""
+    return unit_circle(segments) * radius + (cx, cy)
+
+def ellipse_points(cx, cy, rx, ry, segments, rotation=0.0):
+    """Return the corners of a polygon approximating an ellipse
+
+    The ellipse is rotated around its center by `rotation` radians.
+    """
+    points = unit_circle(segments) * (rx, ry)
+    if rotation:
+        points = rotate(points, rotation)
+    return points + (cx, cy)
+
+def arc_points(cx, cy, rx, ry, start, sweep, segments):
+    """Return segments + 1 points along an elliptical arc, including both ends"""
+    return unit_arc(start, sweep, segments) * (rx, ry) + (cx, cy)
+
+def half_disc_points(cx, cy, rx, ry, segments, start=math.pi):
+    """Return the outline of half an ellipse; the straight side is implied
+
+    The default start angle gives the upper half in drawing coordinates,
+    where y grows downwards.
+    """
+    return arc_points(cx, cy, rx, ry, start, math.pi, segments)
+
+def spline_points(cx, cy, rx, ry, start, sweep, tolerance, rotation=0.0):
+    """Return the off-curve points of a quadratic spline along an elliptical arc
+
+    The ends of the arc are not included. An ellipse is an affine image of
+    a circle, so the tolerance is met by sizing the pieces for the larger
+    radius.
+    """
+    pieces = quadratic_pieces(max(abs(rx), abs(ry)), sweep, tolerance)
+    points = unit_spline(start, sweep, pieces) * (rx, ry)
+    if rotation:
+        points = rotate(points, rotation)
+    return points + (cx, cy)
+
+def quadratic_control(p0, t0, p1, t1):
+    """Return the control point of a quadratic from p0 to p1 with end tangents t0 and t1
+
+    Falls back to the midpoint, a straight piece, when the tangents don't
+    meet ahead of p0.
+    """
+    cross = t0[0] * t1[1] - t0[1] * t1[0]
+    dx, dy = p1[0] - p0[0], p1[1] - p0[1]
+    if abs(cross) > 1e-9:
+        s = (dx * t1[1] - dy * t1[0]) / cross
+        if s > 0:
+            return (p0[0] + s * t0[0], p0[1] + s * t0[1])
+    return (p0[0] + dx / 2, p0[1] + dy / 2)
+
+def rect_points(x0, y0, x1, y1):
+    """Return the corners of a rectangle, starting at (x0, y0) and moving along x first"""
+    return np.array([(x0, y0), (x1, y0), (x1, y1), (x0, y1)], dtype=float)
+
+def rounded_rect_points(x0, y0, x1, y1, radius, segments=4):
+    """Return the outline of a rectangle with rounded corners
+
+    Each corner is a quarter circle of `segments` segments. The outline runs
+    in the same direction as rect_points() for the same corners.
+    """
+    left, right = min(x0, x1), max(x0, x1)
+    top, bottom = min(y0, y1), max(y0, y1)
+    radius = min(radius, (right - left) / 2, (bottom - top) / 2)
+    centers = [(right - radius, top + radius), (right - radius, bottom - radius),
+               (left + radius, bottom - radius), (left + radius, top + radius)]
+    corners = [arc_points(x, y, radius, radius, -math.pi / 2 + i * math.pi / 2, math.pi / 2, segments)
+               for i, (x, y) in enumerate(centers)]
+    points = np.concatenate(corners)
+    # Match the direction of rect_points() when the corners are given mirrored
+    if (x1 < x0) != (y1 < y0):
+        points = points[::-1]
+    return points
+
+def polygon(pen, points):
+    """Draw points as one closed contour"""
+    if hasattr(pen, "polyline"):
+        # Pens that take whole contours get the array in one call
+        pen.polyline(points)
+        return
+    points = np.asarray(points, dtype=float).tolist()
+    pen.moveTo(tuple(points[0]))
+    for point in points[1:]:
+        pen.lineTo(tuple(point))
+    pen.closePath()
+
+def spline(pen, points, on_curve):
+    """Draw one closed TrueType spline
+
+    `on_curve` flags each point; off-curve points are quadratic control
+    points, with an on-curve point implied halfway between two of them.
+    """
+    points = [tuple(point) for point in np.asarray(points, dtype=float).tolist()]
+    on_curve = [bool(flag) for flag in on_curve]
+    if not any(on_curve):
+        pen.qCurveTo(*points, None)
+        pen.closePath()
+        return
+    
+    # Start the contour at an on-curve point
+    first = on_curve.index(True)
+    points = points[first:] + points[:first]
+    on_curve = on_curve[first:] + on_curve[:first]
+    
+    pen.moveTo(points[0])
+    controls = []
+    for point, on in zip(points[1:], on_curve[1:]):
+        if not on:
+            controls.append(point)
+        elif controls:
+            pen.qCurveTo(*controls, point)
+            controls = []
+        else:
+            pen.lineTo(point)
+    if controls:
+        pen.qCurveTo(*controls, points[0])
+    pen.closePath()
+
+def _flat_arc_points(cx, cy, rx, ry, start, sweep, segments):
+    segments = flat_segments(max(abs(rx), abs(ry)), sweep, segments)
+    return arc_points(cx, cy, rx, ry, start, sweep, segments)
+
+def contour(pen, *parts):
+    """Draw one closed contour made of corner points and elliptical arcs
+
+    Each part is either a sequence of (x, y) corners or an Arc, which
+    includes both of its ends.
+    """
+    if CURVE_TOLERANCE is None:
+        polygon(pen, np.vstack([_flat_arc_points(*part) if isinstance(part, Arc) else part
+                                for part in parts]))
+        return
+    
+    points, on_curve = [], []
+    for part in parts:
+        if isinstance(part, Arc):
+            cx, cy, rx, ry, start, sweep, _ = part
+            ends = arc_points(cx, cy, rx, ry, start, sweep, 1)
+            controls = spline_points(cx, cy, rx, ry, start, sweep, CURVE_TOLERANCE)
+            points += [ends[:1], controls, ends[1:]]
+            on_curve += [True] + [False] * len(controls) + [True]
+        else:
+            part = np.asarray(part, dtype=float).reshape(-1, 2)
+            points.append(part)
+            on_curve += [True] * len(part)
+    spline(pen, np.vstack(points), on_curve)
+
+def circle(pen, cx, cy, radius, segments):
+    """Draw a circle as a closed polygon or spline"""
+    ellipse(pen, cx, cy, radius, radius, segments)
+
+def ellipse(pen, cx, cy, rx, ry, segments, rotation=0.0):
+    """Draw an ellipse, optionally rotated, as a closed polygon or spline"""
+    if CURVE_TOLERANCE is None:
+        segments = flat_segments(max(abs(rx), abs(ry)), 2 * math.pi, segments, minimum=3)
+        polygon(pen, ellipse_points(cx, cy, rx, ry, segments, rotation))
+        return
+    # Only off-curve points; every on-curve point is implied
+    pieces = quadratic_pieces(max(abs(rx), abs(ry)), 2 * math.pi, CURVE_TOLERANCE, minimum=4)
+    points = unit_spline(0.0, 2 * math.pi, pieces) * (rx, ry)
+    if rotation:
+        points = rotate(points, rotation)
+    spline(pen, points + (cx, cy), [False] * pieces)
+
+def half_disc(pen, cx, cy, rx, ry, segments, start=math.pi):
+    """Draw half an ellipse closed by its diameter"""
+    contour(pen, Arc(cx, cy, rx, ry, start, math.pi, segments))
+
+def rect(pen, x0, y0, x1, y1):
+    """Draw a rectangle from (x0, y0), moving along x first"""
+    polygon(pen, rect_points(x0, y0, x1, y1))
+
+def rounded_rect(pen, x0, y0, x1, y1, radius, segments=4):
+    """Draw a rectangle with rounded corners"""
+    if CURVE_TOLERANCE is None:
+        segments = flat_segments(radius, math.pi / 2, segments)
+        polygon(pen, rounded_rect_points(x0, y0, x1, y1, radius, segments))
+        return
+    left, right = min(x0, x1), max(x0, x1)
+    top, bottom = min(y0, y1), max(y0, y1)
+    radius = min(radius, (right - left) / 2, (bottom - top) / 2)
+    centers = [(right - radius, top + radius), (right - radius, bottom - radius),
+               (left + radius, bottom - radius), (left + radius, top + radius)]
+    corners = [Arc(x, y, radius, radius, -math.pi / 2 + i * math.pi / 2, math.pi / 2, segments)
+               for i, (x, y) in enumerate(centers)]
+    # Match the direction of rect_points() when the corners are given mirrored
+    if (x1 < x0) != (y1 < y0):
+        corners = [Arc(x, y, rx, ry, start + sweep, -sweep, n)
+                   for x, y, rx, ry, start, sweep, n in reversed(corners)]
+    contour(pen, *corners)
@@ -0,0 +1,130 @@
+"""Scanline rasterizer for outlines, in NumPy
+
+Renders an Outline straight to an array of coverage values, without
+building a font or going through FreeType. Quadratic curves are first
+flattened into polygons. Every polygon edge is then intersected with
+several scanlines per row of pixels, all at once. Along each scanline
+the winding number is the running sum of the crossings' directions, and
+the line is inside wherever it is nonzero, the rule TrueType fills glyphs
+with. The parts of the line inside cover each pixel they pass by the
+exact length they overlap it, so edges are anti-aliased by their actual
+coverage across the line and by the share of scanlines down it.
+"""
+import numpy as np
+
+# Scanlines per row of pixels
+SUPERSAMPLE = 16
+# Greatest distance, in pixels, between a curve and the lines drawn for it
+FLATTEN_TOLERANCE = 0.05
+
+def flatten_contour(points, on_curve, tolerance=FLATTEN_TOLERANCE):
+    """Return a closed contour as a polygon, with its quadratic curves replaced by lines
+
+    Off-curve points are quadratic control points, with an on-curve point
+    implied halfway between two of them, as in an Outline. Each curve is
+    cut into enough lines that none strays more than `tolerance`, in the
+    units of the points, from it.
+    """
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    on_curve = np.asarray(on_curve, dtype=bool)
+    if on_curve.all():
+        return points
+    # Make the implied on-curve points explicit, so each control point
+    # lies between two on-curve points
+    implied = np.flatnonzero(~on_curve & ~np.roll(on_curve, -1))
+    midpoints = (points[implied] + points[(implied + 1) % len(points)]) / 2
+    points = np.insert(points, implied + 1, midpoints, axis=0)
+    on_curve = np.insert(on_curve, implied + 1, True)
+
+    count = len(points)
+    controls = np.flatnonzero(~on_curve)
+    before, control, after = points[controls - 1], points[controls], points[(controls + 1) % count]
+    # A quadratic cut into n equal steps strays at most |p0 - 2c + p1| / (8 n^2)
+    bend = np.hypot(*(before - 2 * control + after).T)
+    pieces = np.maximum(np.ceil(np.sqrt(bend / (8 * tolerance))), 1).astype(np.int64)
+
+    # Each on-curve point is kept; each control point becomes the points
+    # inside its curve, none if it is cut into a single line
+    steps = np.ones(count, dtype=np.int64)
+    steps[controls] = pieces - 1
+    source = np.repeat(np.arange(count), steps)
+    polygon = points[source]
+    curve = ~on_curve[source]
+    if curve.any():
+        step = np.arange(len(source)) - np.repeat(np.cumsum(steps) - steps, steps)
+        lookup = np.zeros(count, dtype=np.int64)
+        lookup[controls] = np.arange(len(controls))
+        curve_index = lookup[source[curve]]
+        t = ((step[curve] + 1) / pieces[curve_index])[:, np.newaxis]
+        polygon[curve] = ((1 - t) ** 2 * before[curve_index] + 2 * t * (1 - t) * control[curve_index]
+                          + t ** 2 * after[curve_index])
+    return polygon
+
+def coverage(polygons, width, height, supersample=SUPERSAMPLE):
+    """Return the (height, width) coverage, from 0 to 1, of closed polygons filled with the nonzero rule
+
+    The polygons' points are in pixels, with (0, 0) the top left corner of
+    the image.
+    """
+    rows = height * supersample
+    polygons = [polygon for polygon in polygons if len(polygon) > 1]
+    if not polygons:
+        return np.zeros((height, width))
+    starts = np.vstack(polygons)
+    ends = np.vstack([np.roll(polygon, -1, axis=0) for polygon in polygons])
+    x0, x1 = starts[:, 0], ends[:, 0]
+    y0, y1 = starts[:, 1] * supersample, ends[:, 1] * supersample
+
+    # Scanlines run through the middle of each row of samples, and an edge
+    # crosses the ones in [lower y, upper y), so horizontal edges cross
+    # none and edges meeting at a vertex don't both count it
+    first = np.clip(np.ceil(np.minimum(y0, y1) - 0.5), 0, rows).astype(np.int64)
+    last = np.clip(np.ceil(np.maximum(y0, y1) - 0.5), 0, rows).astype(np.int64)
+    crossings = last - first
+    edge = np.repeat(np.arange(len(crossings)), crossings)
+    row = first[edge] + np.arange(len(edge)) - np.repeat(np.cumsum(crossings) - crossings, crossings)
+    x = x0[edge] + (row + 0.5 - y0[edge]) * (x1[edge] - x0[edge]) / (y1[edge] - y0[edge])
+    direction = np.where(y1[edge] > y0[edge], 1, -1)
+
+    # Along each scanline the winding number changes by each crossing's
+    # direction, and comes back to zero at the end of the line, so a
+    # running sum over the crossings sorted by line and x gives it
+    # everywhere. The line is inside from where it leaves zero to where it
+    # returns.
+    order = np.lexsort((x, row))
+    row, x, direction = row[order], x[order], direction[order]
+    after = np.cumsum(direction)
+    before = after - direction
+    span_row = row[(before == 0) & (after != 0)]
+    span_start = np.clip(x[(before == 0) & (after != 0)], 0, width)
+    span_end = np.clip(x[(before != 0) & (after == 0)], 0, width)
+
+    # Each span covers its pixels exactly along the line. A difference
+    # array gets the share of the pixel each end of the span starts or
+    # stops covering, and of the next pixel the rest, so its running sum
+    # along a row is the coverage. The sum is linear, so the scanlines of a
+    # row of pixels share one row of the array.
+    pixel_row = span_row // supersample
+    indices, weights = [], []
+    for ends_x, sign in ((span_start, 1), (span_end, -1)):
+        whole = np.floor(ends_x)
+        part = ends_x - whole
+        index = pixel_row * (width + 2) + whole.astype(np.int64)
+        indices += [index, index + 1]
+        weights += [sign * (1 - part), sign * part]
+    area = np.bincount(np.concatenate(indices), np.concatenate(weights), minlength=height * (width + 2))
+    lines = np.cumsum(area.reshape(height, width + 2), axis=1)[:, :width]
+    return np.clip(lines / supersample, 0, 1)
+
+def render_outline(outline, size, view_box, supersample=SUPERSAMPLE):
+    """Return the (size, size) coverage of an Outline
+
+    `view_box` is the (left, top, width, height) of the outline's
+    coordinates shown, scaled to fit the image and centred in it.
+    """
+    left, top, view_width, view_height = view_box
+    side = max(view_width, view_height)
+    origin = np.array([left - (side - view_width) / 2, top - (side - view_height) / 2])
+    scale = size / side
+    polygons = [flatten_contour((points - origin) * scale, on_curve) for points, on_curve in outline.contours()]
+    return coverage(polygons, size, size, supersample)
@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+"""Asynchronous HTTP service that renders the letters' pictures and text
+
+Serves, over HTTP/1.1 with keep-alive:
+
+    /glyph/<letter>.png?size=500    a letter's picture, size x size pixels
+    /glyph/<letter>.svg             a letter's picture as an SVG path
+    /render?text=sam&size=64&width=400
+                                    text set in the font, wrapped to width
+    /font.ttf                       the font itself
+
+The server runs on asyncio and needs only the standard library besides
+the project's own modules. The letters' outlines are read from the
+served font once at startup, so the pictures always match /font.ttf, and
+their SVG documents are written then too. PNG rendering is CPU
+bound, so it runs in a process pool, and concurrent requests for the same
+image share one render. Every response carries an ETag worked out from
+the request and a hash of the font and outlines, so revalidations with
+If-None-Match are answered 304 Not Modified without rendering anything.
+
+Each worker caches the glyph bitmaps of the text it sets, unless
+--tile-cache gives them one shared cache in shared memory instead.
+
+Run it from the command line with --port, --font and --workers; see
+benchmarks/render_server.py for its latency under concurrent clients.
+"""
+import os
+import time
+import string
+import asyncio
+import hashlib
+import logging
+import threading
+import argparse
+import multiprocessing
+from io import BytesIO
+from http import HTTPStatus
+from urllib.parse import parse_qs, unquote, urlsplit
+from concurrent.futures import ProcessPoolExecutor
+from fontTools.ttLib import TTFont
+import generate_shapes as shapes
+from glyph_outline import Outline
+from subset_server import if_none_match
+from svg_export import SVG_PRECISION, svg_document
+from text_render import TextRenderer, font_outline
+from tile_cache import TILE_SIZE, SharedTileCache
+
+DEFAULT_FONT = shapes.OUTPUT_FILE
+DEFAULT_PORT = 8001
+GLYPH_SIZE = 500  # Pixels, as the images
+TEXT_SIZE = 64  # Pixels per em
+MAX_GLYPH_SIZE = 2048
+MAX_TEXT_SIZE = 512
+MAX_TEXT_LENGTH = 256
+MAX_WIDTH = 4096
+# Largest rendered text image, in pixels
+MAX_PIXELS = 16 * 1024 * 1024
+MAX_HEADER_SIZE = 16 * 1024
+# Seconds clients may use a response before revalidating it with its ETag
+MAX_AGE = 3600
+
+# Set in each worker process by _start_worker()
+_worker_outlines = None
+_worker_renderer = None
+
+def _exit_with(server_pid):
+    """Exit this worker once the server process is gone"""
+    while True:
+        time.sleep(1)
+        try:
+            os.kill(server_pid, 0)
+        except ProcessLookupError:
+            os._exit(0)
+
+def _start_worker(outline_data, font_path, tiles, server_pid):
+    global _worker_outlines, _worker_renderer
+    # Workers wait on a queue the server can't close if it is killed, so
+    # they watch for it to go away instead of outliving it
+    threading.Thread(target=_exit_with, args=(server_pid,), daemon=True).start()
+    # The font's creation date of zero makes fontTools warn as it loads it
+    logging.getLogger("fontTools.ttLib.tables._h_e_a_d").setLevel(logging.ERROR)
+    _worker_outlines = {letter: Outline.from_bytes(data) for letter, data in outline_data.items()}
+    _worker_renderer = TextRenderer(font_path, cache=tiles)
+
+def _png_bytes(image):
+    output = BytesIO()
+    image.save(output, "PNG")
+    return output.getvalue()
+
+def render_glyph_png(letter, size):
+    """Return a letter's picture as a PNG image, in a worker process"""
+    return _png_bytes(shapes.letter_image(_worker_outlines[letter], size))
+
+def render_text_png(text, size, width):
+    """Return text set in the font as a PNG image, in a worker process"""
+    return _png_bytes(_worker_renderer.render_text(text, size, width))
+
+class HTTPError(Exception):
+    """A request that is answered with an error status"""
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+def query_int(query, name, default, maximum):
+    """Return an integer query parameter between 1 and `maximum`, or the default if it is missing"""
+    values = query.get(name)
+    if not values:
+        return default
+    try:
+        value = int(values[-1])
+    except ValueError:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, f"{name} must be a whole number of pixels")
+    if not 1 <= value <= maximum:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, f"{name} must be between 1 and {maximum}")
+    return value
+
+class RenderServer:
+    """Renders and serves the letters' pictures, text and the font"""
+    def __init__(self, font_path=DEFAULT_FONT, workers=None, quiet=False, tile_cache_size=0,
+                 tile_size=TILE_SIZE * 1024):
+        with open(font_path, "rb") as f:
+            self.font = f.read()
+        outlines = font_letter_outlines(self.font)
+        outline_data = {letter: outline.to_bytes() for letter, outline in outlines.items()}
+        self.svgs = {letter: svg_document(outline, shapes.IMAGE_VIEW_BOX, shapes.SVG_SIZE,
+                                          shapes.IMAGE_COLOR, SVG_PRECISION).encode("utf-8")
+                     for letter, outline in outlines.items()}
+        # Every response is made from the font, so equal ETags mean equal bytes
+        self.version = hashlib.sha256(self.font).hexdigest()
+        # Lays out text here to check the size of images before rendering them
+        self.text = TextRenderer(font_path)
+        # Workers start as they are first needed, after the server listens.
+        # Forked from this process they would hold its listening socket open,
+        # and keep the port after it exits; started by a fork server they
+        # only have what they are given.
+        context = multiprocessing.get_context("forkserver")
+        # Without a shared tile cache each worker caches glyph bitmaps itself
+        self.tiles = (SharedTileCache.create(tile_cache_size, tile_size, context.Lock()) if tile_cache_size
+                      else None)
+        self.pool = ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_start_worker,
+                                        initargs=(outline_data, font_path, self.tiles, os.getpid()))
+        self.quiet = quiet
+        self.renders = 0
+        self.coalesced = 0
+        self._in_flight = {}
+
+    def etag(self, key):
+        """Return the ETag of the response to a request, without making the response"""
+        return f'"{hashlib.sha256(f"{self.version} {key!r}".encode("utf-8")).hexdigest()[:32]}"'
+
+    async def rendered(self, key, function, *args):
+        """Return function(*args) run in the process pool, sharing the run with concurrent requests for `key`"""
+        future = self._in_flight.get(key)
+        if future is None:
+            future = asyncio.get_running_loop().run_in_executor(self.pool, function, *args)
+            self._in_flight[key] = future
+            future.add_done_callback(lambda _: self._in_flight.pop(key, None))
+            self.renders += 1
+        else:
+            self.coalesced += 1
+        # A client going away mustn't cancel the render others wait for
+        return await asyncio.shield(future)
+
+    def route(self, path, query):
+        """Return the (key, content type, async function making the body) of a request"""
+        if path == "/font.ttf":
+            return ("font",), "font/ttf", None
+        if path == "/render":
+            if "text" not in query:
+                raise HTTPError(HTTPStatus.BAD_REQUEST, "Missing text parameter")
+            text = "\n".join(query["text"])
+            if len(text) > MAX_TEXT_LENGTH:
+                raise HTTPError(HTTPStatus.BAD_REQUEST, f"text must be at most {MAX_TEXT_LENGTH} characters")
+            size = query_int(query, "size", TEXT_SIZE, MAX_TEXT_SIZE)
+            width = query_int(query, "width", None, MAX_WIDTH)
+            (image_width, image_height), _ = self.text.layout(text, size, width)
+            if image_width * image_height > MAX_PIXELS:
+                raise HTTPError(HTTPStatus.BAD_REQUEST, f"The image would be {image_width}x{image_height} pixels, "
+                                                        f"more than {MAX_PIXELS} in all")
+            key = ("render", text, size, width)
+            return key, "image/png", lambda: self.rendered(key, render_text_png, text, size, width)
+        if path.startswith("/glyph/"):
+            name, _, extension = path[len("/glyph/"):].rpartition(".")
+            if name not in self.svgs or extension not in ("png", "svg"):
+                raise HTTPError(HTTPStatus.NOT_FOUND, "Glyphs are served as /glyph/<a-z>.png or .svg")
+            if extension == "svg":
+                return ("svg", name), "image/svg+xml", None
+            size = query_int(query, "size", GLYPH_SIZE, MAX_GLYPH_SIZE)
+            key = ("glyph", name, size)
+            return key, "image/png", lambda: self.rendered(key, render_glyph_png, name, size)
+        raise HTTPError(HTTPStatus.NOT_FOUND, "Only /glyph/<letter>.png, /glyph/<letter>.svg, /render "
+                                              "and /font.ttf are served")
+
+    async def respond(self, method, target, headers):
+        """Return the status, headers and body answering a request"""
+        if method not in ("GET", "HEAD"):
+            raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED, "Only GET and HEAD are supported")
+        url = urlsplit(target)
+        key, content_type, make = self.route(unquote(url.path), parse_qs(url.query, keep_blank_values=True))
+        etag = self.etag(key)
+        common = {"ETag": etag, "Cache-Control": f"public, max-age={MAX_AGE}", "Access-Control-Allow-Origin": "*"}
+        if etag in if_none_match(headers.get("if-none-match", "")):
+            return HTTPStatus.NOT_MODIFIED, common, b""
+        if make is not None:
+            body = await make()
+        elif key == ("font",):
+            body = self.font
+        else:
+            body = self.svgs[key[1]]
+        return HTTPStatus.OK, {**common, "Content-Type": content_type}, body
+
+    async def handle(self, reader, writer):
+        """Serve the requests of one connection until the client closes it"""
+        peer = writer.get_extra_info("peername")
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except asyncio.IncompleteReadError:
+                    break
+                except asyncio.LimitOverrunError:
+                    await self.send(writer, HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, {},
+                                    b"Request headers too large\n", close=True)
+                    break
+                start = time.perf_counter()
+                request_line, *header_lines = head.decode("latin-1").split("\r\n")[:-2]
+                try:
+                    method, target, version = request_line.split(" ")
+                except ValueError:
+                    await self.send(writer, HTTPStatus.BAD_REQUEST, {}, b"Malformed request line\n", close=True)
+                    break
+                headers = {}
+                for line in header_lines:
+                    name, _, value = line.partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                # Bodies are ignored, but must be read past
+                length = headers.get("content-length", "0")
+                if length.isdigit() and int(length):
+                    await reader.readexactly(int(length))
+                connection = headers.get("connection", "").lower()
+                close = connection == "close" or (version != "HTTP/1.1" and connection != "keep-alive")
+
+                try:
+                    status, response_headers, body = await self.respond(method, target, headers)
+                except HTTPError as error:
+                    status, response_headers, body = error.status, {}, f"{error}\n".encode("utf-8")
+                    if status == HTTPStatus.METHOD_NOT_ALLOWED:
+                        response_headers["Allow"] = "GET, HEAD"
+                except Exception:
+                    # Such as a worker process dying; the client still gets
+                    # an answer and the connection stays usable
+                    logging.exception("Error answering \"%s\"", request_line)
+                    status, response_headers, body = (HTTPStatus.INTERNAL_SERVER_ERROR, {},
+                                                      b"Internal server error\n")
+                await self.send(writer, status, response_headers, body, close, send_body=method != "HEAD")
+                if not self.quiet:
+                    print(f"{peer[0]} \"{request_line}\" {status.value} {len(body)} "
+                          f"{(time.perf_counter() - start) * 1000:.1f} ms")
+                if close:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def send(self, writer, status, headers, body, close=False, send_body=True):
+        """Write a response, with a plain text type for errors"""
+        headers = {"Content-Type": "text/plain; charset=utf-8", **headers}
+        if status == HTTPStatus.NOT_MODIFIED:
+            headers.pop("Content-Type")
+        else:
+            headers["Content-Length"] = str(len(body))
+        headers["Connection"] = "close" if close else "keep-alive"
+        lines = [f"HTTP/1.1 {status.value} {status.phrase}"] + [f"{name}: {value}" for name, value in headers.items()]
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+        if send_body and status != HTTPStatus.NOT_MODIFIED:
+            writer.write(body)
+        await writer.drain()
+
+    async def start(self, host="127.0.0.1", port=DEFAULT_PORT):
+        """Start listening, and return the asyncio server"""
+        return await asyncio.start_server(self.handle, host, port, limit=MAX_HEADER_SIZE)
+
+    def report(self):
+        """Return a one-line summary of renders"""
+        return f"Render server: {self.renders} renders, {self.coalesced} requests shared a render in progress"
+
+    def close(self):
+        self.pool.shutdown(cancel_futures=True)
+        if self.tiles is not None:
+            self.tiles.close()
+
+def font_letter_outlines(font_data):
+    """Return the outlines of the letters a-z the font has, by letter, in drawing coordinates"""
+    font = TTFont(BytesIO(font_data), lazy=True)
+    cmap = font.getBestCmap()
+    glyf = font["glyf"]
+    units_per_em = font["head"].unitsPerEm
+    outlines = {letter: font_outline(glyf, cmap[ord(letter)], units_per_em)
+                for letter in string.ascii_lowercase if ord(letter) in cmap}
+    font.close()
+    return outlines
+
+def parse_args(argv=None):
+    """Parse the command line options"""
+    parser = argparse.ArgumentParser(description="Serve rendered Phonics pictures, text and the font over HTTP")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on (default: %(default)s)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="port to listen on (default: %(default)s)")
+    parser.add_argument("--font", default=DEFAULT_FONT, help="font file to serve and set text in (default: %(default)s)")
+    parser.add_argument("--workers", type=int,
+                        help="rendering processes (default: the number of CPUs)")
+    parser.add_argument("--tile-cache", type=float, default=0, metavar="MEGABYTES",
+                        help="size of a glyph bitmap cache in shared memory used by all the workers, "
+                             "instead of one in each (default: %(default)s, one in each)")
+    parser.add_argument("--tile-size", type=int, default=TILE_SIZE, metavar="KILOBYTES",
+                        help="largest glyph bitmap kept in the shared cache (default: %(default)s)")
+    parser.add_argument("--quiet", action="store_true", help="don't log each request")
+    args = parser.parse_args(argv)
+    if args.workers is not None and args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.tile_cache < 0:
+        parser.error("--tile-cache must not be negative")
+    if args.tile_size < 1:
+        parser.error("--tile-size must be at least 1")
+    return args
+
+async def serve(args):
+    renderer = RenderServer(args.font, args.workers, args.quiet, int(args.tile_cache * 1024 * 1024),
+                            args.tile_size * 1024)
+    # The pool and tile cache are released however the server stops,
+    # including when it can't listen
+    try:
+        server = await renderer.start(args.host, args.port)
+        host, port = server.sockets[0].getsockname()[:2]
+        print(f"Serving renders at http://{host}:{port}/glyph/a.png?size={GLYPH_SIZE} and "
+              f"http://{host}:{port}/render?text=sam")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            print(renderer.report())
+            if renderer.tiles is not None:
+                print(renderer.tiles.report())
+    finally:
+        renderer.close()
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Removal of redundant points from glyph contours
+
+Contours are simplified in font units after rounding to integers, the same
+rounding TTGlyphPen applies, so duplicate and collinear points created by
+the rounding are caught too. Only straight runs between on-curve points
+are simplified; quadratic control points and the on-curve points next to
+them are kept as they are.
+"""
+import numpy as np
+from glyf_encoder import round_coordinates
+
+def segment_distances(points, a, b):
+    """Return the distance of each point from the line segment a-b"""
+    direction = b - a
+    length_squared = direction @ direction
+    if length_squared == 0:
+        nearest = np.broadcast_to(a, points.shape)
+    else:
+        t = np.clip((points - a) @ direction / length_squared, 0, 1)
+        nearest = a + t[:, np.newaxis] * direction
+    return np.hypot(*(points - nearest).T)
+
+def rdp_mask(points, tolerance):
+    """Return a mask of the points Ramer-Douglas-Peucker keeps from an open polyline
+
+    Both ends are always kept. Distances are measured to the segment rather
+    than the line through it, so a point where the outline turns back on
+    itself is never dropped.
+    """
+    keep = np.zeros(len(points), dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        distances = segment_distances(points[first + 1:last], points[first], points[last])
+        farthest = first + 1 + int(np.argmax(distances))
+        if distances[farthest - first - 1] > tolerance:
+            keep[farthest] = True
+            stack += [(first, farthest), (farthest, last)]
+    return keep
+
+def simplify_contour(points, on_curve, tolerance):
+    """Return the rounded points and on-curve flags of a closed contour with redundant points removed
+
+    On-curve points that repeat the one before them are dropped, then
+    on-curve points on straight runs that are within `tolerance` font
+    units of the simplified outline. A tolerance of 0 removes only
+    duplicate and exactly collinear points.
+    """
+    points = round_coordinates(points)
+    on_curve = np.asarray(on_curve, dtype=bool)
+
+    # Consecutive duplicates, including a last point repeating the first
+    repeated = on_curve & np.roll(on_curve, 1) & (points == np.roll(points, 1, axis=0)).all(axis=1)
+    if repeated.all():
+        repeated[0] = False
+    points, on_curve = points[~repeated], on_curve[~repeated]
+    count = len(points)
+    if count < 3:
+        return points, on_curve
+
+    # Points that must stay: control points and the ends of their curves
+    off_curve = ~on_curve
+    fixed = off_curve | np.roll(off_curve, 1) | np.roll(off_curve, -1)
+    if not fixed.any():
+        # A polygon: split it at its first point and the point farthest from it
+        fixed[0] = True
+        fixed[int(np.argmax(np.hypot(*(points - points[0]).T)))] = True
+
+    keep = fixed.copy()
+    anchors = np.flatnonzero(fixed)
+    for start, end in zip(anchors, np.roll(anchors, -1)):
+        span = (end - start) % count or count
+        if span < 2:
+            continue
+        run = (start + np.arange(span + 1)) % count
+        keep[run] |= rdp_mask(points[run], tolerance)
+    return points[keep], on_curve[keep]
@@ -0,0 +1,238 @@
+"""Stroke expansion: filled outlines for lines drawn with a width
+
+A TrueType glyph is only ever filled, so a contour that runs out along a
+line and back again covers no area and draws nothing. stroke() turns a
+polyline into the outline of the band of the given width around it, with
+mitered, round or beveled joins and butt, round or square caps. The
+offsets, turn angles and miter lengths of every vertex are worked out
+together with NumPy, and round joins and caps are left as arcs for
+contour(), so they follow the flatness and curve settings like any other
+round shape.
+
+Outlines run the same way as the shapes in primitives, so a stroke adds
+to the fill. line() draws the thin lines the draw_* functions use for
+details such as whiskers and seams, and winds them the other way, so
+where a line crosses a filled shape it is cut out of it and elsewhere it
+is filled.
+"""
+import math
+import numpy as np
+import primitives
+from primitives import Arc, contour, polygon, spline, quadratic_control
+
+JOINS = ("miter", "round", "bevel")
+CAPS = ("butt", "round", "square")
+
+# Width, join and cap of the lines drawn by line(); a width of 0 draws
+# them as zero-area contours
+LINE_WIDTH = 20
+LINE_JOIN = "round"
+LINE_CAP = "round"
+
+def set_line_style(width, join="round", cap="round"):
+    """Set how line() draws lines"""
+    global LINE_WIDTH, LINE_JOIN, LINE_CAP
+    if join not in JOINS:
+        raise ValueError(f"unknown join '{join}'")
+    if cap not in CAPS:
+        raise ValueError(f"unknown cap '{cap}'")
+    LINE_WIDTH, LINE_JOIN, LINE_CAP = width, join, cap
+
+def _cross(a, b):
+    return a[..., 0] * b[..., 1] - a[..., 1] * b[..., 0]
+
+def _arc(center, radius, start, sweep, segments):
+    """Return an Arc around a point, from the direction `start` turning by `sweep`"""
+    # Keep at least the segments per half turn a round cap gets
+    count = max(1, math.ceil(segments * abs(sweep) / math.pi - 1e-9))
+    return Arc(center[0], center[1], radius, radius, math.atan2(start[1], start[0]), sweep, count)
+
+def reverse_parts(parts):
+    """Return contour() parts that trace the same contour backwards"""
+    reversed_parts = []
+    for part in reversed(parts):
+        if isinstance(part, Arc):
+            cx, cy, rx, ry, start, sweep, segments = part
+            reversed_parts.append(Arc(cx, cy, rx, ry, start + sweep, -sweep, segments))
+        else:
+            reversed_parts.append(np.asarray(part, dtype=float).reshape(-1, 2)[::-1])
+    return reversed_parts
+
+def _joins(points, directions, normals, lengths, previous, following, half, side, join, miter_limit, segments):
+    """Return the parts one side of a stroke takes around each vertex
+
+    `previous` and `following` index the segments before and after each
+    vertex. On the outside of a turn the offset edges are joined as asked;
+    on the inside they are cut off where they meet, or, when that falls
+    beyond the end of a segment, taken back through the vertex so the
+    overlap still fills.
+    """
+    before, after = normals[previous] * side, normals[following] * side
+    turn = np.arctan2(_cross(directions[previous], directions[following]),
+                      (directions[previous] * directions[following]).sum(axis=1))
+    outer = side * turn > 0
+    straight = np.abs(turn) < 1e-9
+    # Where the offset edges meet, 1 / cos(turn / 2) half widths out
+    miter = points + half * (before + after) / (1 + np.cos(turn))[:, np.newaxis]
+    miter_ok = 1 / np.maximum(np.cos(turn / 2), 1e-12) <= miter_limit
+    cut_ok = half * np.abs(np.tan(turn / 2)) <= np.minimum(lengths[previous], lengths[following])
+    start_points, end_points = points + half * before, points + half * after
+
+    parts = []
+    for k in range(len(points)):
+        if straight[k]:
+            parts.append(end_points[k:k + 1])
+        elif not outer[k]:
+            if cut_ok[k]:
+                parts.append(miter[k:k + 1])
+            else:
+                parts.append(np.array((start_points[k], points[k], end_points[k])))
+        elif join == "round":
+            parts.append(_arc(points[k], half, before[k], turn[k], segments))
+        elif join == "miter" and miter_ok[k]:
+            parts.append(miter[k:k + 1])
+        else:
+            parts.append(np.array((start_points[k], end_points[k])))
+    return parts
+
+def _cap(point, direction, normal, half, cap, segments):
+    """Return the parts of the cap at the end of a stroke, from its +normal side to its -normal side"""
+    if cap == "round":
+        return [_arc(point, half, normal, math.pi, segments)]
+    if cap == "square":
+        point = point + half * direction
+    return [np.array((point + half * normal, point - half * normal))]
+
+def stroke_parts(points, width, join="miter", cap="butt", closed=False, miter_limit=4.0, segments=8):
+    """Return the contours outlining a polyline drawn `width` wide, as lists of contour() parts
+
+    An open polyline gives one contour. A closed one gives two: the
+    outside, and the inside running the other way. Round caps are drawn
+    with `segments` segments and round joins with proportionally fewer.
+    Miters longer than `miter_limit` half widths are beveled.
+    """
+    if join not in JOINS:
+        raise ValueError(f"unknown join '{join}'")
+    if cap not in CAPS:
+        raise ValueError(f"unknown cap '{cap}'")
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    # Repeated points have no direction to offset along
+    repeated = np.zeros(len(points), dtype=bool)
+    repeated[1:] = (points[1:] == points[:-1]).all(axis=1)
+    points = points[~repeated]
+    if closed and len(points) > 1 and (points[0] == points[-1]).all():
+        points = points[:-1]
+    if len(points) < (3 if closed else 2):
+        return []
+
+    half = width / 2
+    ends = np.roll(points, -1, axis=0) if closed else points[1:]
+    starts = points if closed else points[:-1]
+    vectors = ends - starts
+    lengths = np.hypot(vectors[:, 0], vectors[:, 1])
+    directions = vectors / lengths[:, np.newaxis]
+    # Pointing right of the direction of travel in drawing coordinates
+    normals = np.column_stack((directions[:, 1], -directions[:, 0]))
+
+    if closed:
+        following = np.arange(len(points))
+        previous = np.roll(following, 1)
+        vertices = points
+    else:
+        following = np.arange(1, len(points) - 1)
+        previous = following - 1
+        vertices = points[1:-1]
+    sides = [_joins(vertices, directions, normals, lengths, previous, following, half, side,
+                    join, miter_limit, segments) for side in (1, -1)]
+
+    if closed:
+        return [sides[0], reverse_parts(sides[1])]
+    return [_cap(points[0], -directions[0], -normals[0], half, cap, segments)
+            + sides[0]
+            + _cap(points[-1], directions[-1], normals[-1], half, cap, segments)
+            + reverse_parts(sides[1])]
+
+def stroke(pen, points, width, join="miter", cap="butt", closed=False, miter_limit=4.0, segments=8):
+    """Draw the outline of a polyline drawn `width` wide; see stroke_parts()"""
+    for parts in stroke_parts(points, width, join, cap, closed, miter_limit, segments):
+        contour(pen, *parts)
+
+def line(pen, points, width=None, closed=False):
+    """Draw a line detail through the given points
+
+    The line is stroked in the style set by set_line_style(), or `width`
+    wide, and wound against the filled shapes so it shows up on top of
+    them as a cut. With a width of 0 it is drawn as zero-area contours,
+    which render nothing.
+    """
+    width = LINE_WIDTH if width is None else width
+    if not width:
+        # Each segment as a contour of its own, which fills nothing
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        if closed:
+            points = np.vstack((points, points[:1]))
+        for segment in zip(points[:-1], points[1:]):
+            polygon(pen, np.array(segment))
+        return
+    # Lines are thin, so a few segments make a round end
+    for parts in stroke_parts(points, width, LINE_JOIN, LINE_CAP, closed, segments=4):
+        contour(pen, *reverse_parts(parts))
+
+def ribbon(pen, curve, tangent, width, segments):
+    """Draw a band of constant width along a parametric curve as one contour
+
+    `curve` and `tangent` map an array of parameters in [0, 1] to an (n, 2)
+    array of points and of tangent directions. As polygons, the curve is
+    split into `segments` pieces and the polyline is stroked with mitered
+    joins and butt ends. With a flatness setting or as splines, pieces are
+    halved until both edges of the band, straight or quadratic, are within
+    the flatness or tolerance.
+    """
+    if primitives.CURVE_TOLERANCE is None and primitives.FLATNESS is None:
+        stroke(pen, curve(np.arange(segments + 1) / segments), width)
+        return
+
+    def edges(t):
+        """Return the two edges of the band and its direction at parameters t"""
+        points, directions = curve(t), tangent(t)
+        length = np.hypot(directions[:, 0], directions[:, 1])
+        offset = np.column_stack((-directions[:, 1], directions[:, 0])) * (width / 2 / length)[:, np.newaxis]
+        return (points + offset).tolist(), (points - offset).tolist(), directions.tolist()
+
+    curved = primitives.CURVE_TOLERANCE is not None
+    tolerance = primitives.CURVE_TOLERANCE if curved else primitives.FLATNESS
+    # Don't let a piece get shorter than a polygon segment would be
+    shortest = 1 / segments
+    pieces = [(0.0, 1.0)]
+    # Where each piece starts, and its control points along each edge
+    starts, left, right = [], [], []
+    while pieces:
+        a, b = pieces.pop()
+        (left_a, left_m, left_b), (right_a, right_m, right_b), (dir_a, _, dir_b) = map(
+            list, edges(np.array([a, (a + b) / 2, b])))
+        if curved:
+            left_c = quadratic_control(left_a, dir_a, left_b, dir_b)
+            right_c = quadratic_control(right_a, dir_a, right_b, dir_b)
+        else:
+            left_c = ((left_a[0] + left_b[0]) / 2, (left_a[1] + left_b[1]) / 2)
+            right_c = ((right_a[0] + right_b[0]) / 2, (right_a[1] + right_b[1]) / 2)
+        error = max(math.dist(((p0[0] + 2 * c[0] + p1[0]) / 4, (p0[1] + 2 * c[1] + p1[1]) / 4), mid)
+                    for p0, c, p1, mid in ((left_a, left_c, left_b, left_m),
+                                           (right_a, right_c, right_b, right_m)))
+        if error > tolerance and b - a > shortest:
+            # Draw the first half first
+            pieces += [((a + b) / 2, b), (a, (a + b) / 2)]
+            continue
+        starts.append(a)
+        left += [left_a, left_c]
+        right += [right_a, right_c]
+
+    if not curved:
+        stroke(pen, curve(np.array(starts + [1.0])), width)
+        return
+    # Out along one edge and back along the other, starting and ending
+    # with the on-curve point at the start of each piece
+    (left_end,), (right_end,), _ = edges(np.array([1.0]))
+    points = right + [right_end, left_end] + left[::-1]
+    on_curve = [True, False] * len(starts) + [True, True] + [False, True] * len(starts)
+    spline(pen, points, on_curve)
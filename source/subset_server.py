@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""HTTP service that returns the font subset to the characters of a text
+
+A page that only shows a few words needs only their letters' glyphs, so
+rather than the whole font it can load
+
+    /subset?text=cat+dog&format=woff
+
+which answers with a font holding just the glyphs of the characters in
+`text` that the font maps. The format is ttf, woff or, when a Brotli
+module is installed, woff2; it defaults to woff. The font file is read
+once at startup. Subsets are kept in a size-bounded, least-recently-used
+cache keyed by character set and format, so texts with the same letters
+share an entry, and each response carries an ETag that lets clients
+revalidate it with If-None-Match.
+
+Run it from the command line with --port, --font and --cache-size; see
+benchmarks/subset_server.py for its throughput under concurrent clients.
+"""
+import os
+import hashlib
+import logging
+import argparse
+import threading
+from io import BytesIO
+from collections import OrderedDict
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+from fontTools import subset
+from fontTools.ttLib import TTFont
+from web_fonts import available_formats
+
+DEFAULT_FONT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Phonics.ttf")
+DEFAULT_PORT = 8000
+CACHE_SIZE = 16  # Megabytes
+DEFAULT_FORMAT = "woff"
+CONTENT_TYPES = {"ttf": "font/ttf", "woff": "font/woff", "woff2": "font/woff2"}
+# Seconds clients may use a subset before revalidating it with its ETag
+MAX_AGE = 3600
+
+def if_none_match(header):
+    """Return the ETags of an If-None-Match header, weak ones included"""
+    return {tag.strip().removeprefix("W/") for tag in header.split(",") if tag.strip()}
+
+class SubsetCache:
+    """A size-bounded, least-recently-used cache of subsets in memory, shared between threads"""
+    def __init__(self, max_size=CACHE_SIZE * 1024 * 1024):
+        self.max_size = max_size
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the cached (ETag, data) for a key, or None on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, etag, data):
+        """Store a subset, then evict old entries if over the size limit"""
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size -= len(old[1])
+            self._entries[key] = (etag, data)
+            self.size += len(data)
+            while self.size > self.max_size:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+
+    def report(self):
+        """Return a one-line summary of cache usage"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            rate = 100 * self.hits / lookups if lookups else 0
+            return (f"Subset cache: {self.hits} hits, {self.misses} misses ({rate:.0f}% hit rate), "
+                    f"{len(self._entries)} entries using {self.size / 1024:.1f} KB of {self.max_size / 1024:.0f} KB")
+
+class FontSubsetter:
+    """Subsets of one font file, which is read once"""
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self.data = f.read()
+        self.characters = frozenset(TTFont(BytesIO(self.data)).getBestCmap())
+        self.formats = available_formats(CONTENT_TYPES)
+
+    def characters_of(self, text):
+        """Return the characters of `text` that the font maps, sorted and without repeats"""
+        return "".join(sorted({character for character in text if ord(character) in self.characters}))
+
+    def subset(self, characters, flavor):
+        """Return the font, in the given format, with only the glyphs of `characters`"""
+        # The timestamps are kept as they are so the same subset always
+        # has the same bytes, and so the same ETag
+        font = TTFont(BytesIO(self.data), recalcTimestamp=False)
+        options = subset.Options()
+        options.flavor = None if flavor == "ttf" else flavor
+        options.notdef_outline = True
+        options.name_IDs = ["*"]
+        subsetter = subset.Subsetter(options)
+        subsetter.populate(unicodes=[ord(character) for character in characters])
+        subsetter.subset(font)
+        output = BytesIO()
+        subset.save_font(font, output, options)
+        return output.getvalue()
+
+class SubsetRequestHandler(BaseHTTPRequestHandler):
+    """Answer GET and HEAD requests for /subset"""
+    # Keep connections open between requests, and send each response
+    # without waiting for the client to acknowledge the headers
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self.respond(send_body=True)
+
+    def do_HEAD(self):
+        self.respond(send_body=False)
+
+    def respond(self, send_body):
+        url = urlsplit(self.path)
+        if url.path != "/subset":
+            self.send_error(HTTPStatus.NOT_FOUND, "Only /subset is served")
+            return
+        query = parse_qs(url.query, keep_blank_values=True)
+        if "text" not in query:
+            self.send_error(HTTPStatus.BAD_REQUEST, "Missing text parameter")
+            return
+        server = self.server
+        flavor = query.get("format", [DEFAULT_FORMAT])[-1].lower()
+        if flavor not in server.subsetter.formats:
+            self.send_error(HTTPStatus.BAD_REQUEST,
+                            f"Unsupported format '{flavor}', expected one of {', '.join(server.subsetter.formats)}")
+            return
+
+        characters = server.subsetter.characters_of("".join(query["text"]))
+        key = (characters, flavor)
+        entry = server.cache.get(key)
+        if entry is None:
+            data = server.subsetter.subset(characters, flavor)
+            entry = f'"{hashlib.sha256(data).hexdigest()[:32]}"', data
+            server.cache.put(key, *entry)
+        etag, data = entry
+
+        if etag in if_none_match(self.headers.get("If-None-Match", "")):
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_common_headers(etag)
+            self.end_headers()
+            return
+        self.send_response(HTTPStatus.OK)
+        self.send_common_headers(etag)
+        self.send_header("Content-Type", CONTENT_TYPES[flavor])
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        if send_body:
+            self.wfile.write(data)
+
+    def send_common_headers(self, etag):
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", f"public, max-age={MAX_AGE}")
+        # Fonts loaded by pages on other origins need this
+        self.send_header("Access-Control-Allow-Origin", "*")
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+class SubsetServer(ThreadingHTTPServer):
+    """A threaded HTTP server answering subset requests for one font"""
+    daemon_threads = True
+
+    def __init__(self, address, font_path=DEFAULT_FONT, cache_size=CACHE_SIZE * 1024 * 1024, quiet=False):
+        # The font's creation date of zero makes fontTools warn each time
+        # it reads the head table, which is once per subset
+        logging.getLogger("fontTools.ttLib.tables._h_e_a_d").setLevel(logging.ERROR)
+        self.subsetter = FontSubsetter(font_path)
+        self.cache = SubsetCache(cache_size)
+        self.quiet = quiet
+        super().__init__(address, SubsetRequestHandler)
+
+def parse_args(argv=None):
+    """Parse the command line options"""
+    parser = argparse.ArgumentParser(description="Serve subsets of the Phonics font over HTTP")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on (default: %(default)s)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="port to listen on (default: %(default)s)")
+    parser.add_argument("--font", default=DEFAULT_FONT, help="font file to subset (default: %(default)s)")
+    parser.add_argument("--cache-size", type=float, default=CACHE_SIZE,
+                        help="maximum size of the subset cache in megabytes (default: %(default)s)")
+    parser.add_argument("--quiet", action="store_true", help="don't log each request")
+    args = parser.parse_args(argv)
+    if args.cache_size < 0:
+        parser.error("--cache-size must not be negative")
+    return args
+
+def main(argv=None):
+    args = parse_args(argv)
+    server = SubsetServer((args.host, args.port), args.font, int(args.cache_size * 1024 * 1024), args.quiet)
+    host, port = server.server_address[:2]
+    print(f"Serving subsets of {args.font} at http://{host}:{port}/subset?text=cat+dog&format={DEFAULT_FORMAT}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(server.cache.report())
+
+if __name__ == "__main__":
+    main()
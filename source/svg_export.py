@@ -0,0 +1,40 @@
+"""Vector SVG export of glyph outlines
+
+An Outline is replayed into fontTools' SVGPathPen, which writes its lines
+and quadratic curves as path commands, with coordinates rounded to a set
+number of decimal places. The outline is in drawing coordinates, with y
+growing downwards like SVG's, so the path needs no transform.
+"""
+from fontTools.pens.svgPathPen import SVGPathPen
+
+# Decimal places kept in path coordinates; 0 rounds to whole font units,
+# as the font itself does
+SVG_PRECISION = 0
+
+def number_formatter(precision):
+    """Return a function writing a number with at most `precision` decimal places, and no trailing zeros"""
+    def format_number(value):
+        text = f"{value:.{precision}f}"
+        if "." in text:
+            text = text.rstrip("0").rstrip(".")
+        return "0" if text == "-0" else text
+    return format_number
+
+def svg_path_data(outline, precision=SVG_PRECISION):
+    """Return the d attribute of a path drawing an Outline"""
+    pen = SVGPathPen(None, ntos=number_formatter(precision))
+    outline.draw(pen)
+    return pen.getCommands()
+
+def svg_document(outline, view_box, size, color=(0, 0, 0), precision=SVG_PRECISION):
+    """Return an SVG document showing an Outline filled with a color
+
+    `view_box` is the (left, top, width, height) of the outline's
+    coordinates shown, and `size` the document's width and height in
+    pixels. The path is filled with the nonzero rule, as fonts are.
+    """
+    format_number = number_formatter(precision)
+    box = " ".join(format_number(value) for value in view_box)
+    fill = "#{:02x}{:02x}{:02x}".format(*color)
+    return (f'<svg xmlns="http://www.w3.org/2000/svg" width="{size}" height="{size}" viewBox="{box}">'
+            f'<path fill="{fill}" d="{svg_path_data(outline, precision)}"/></svg>\n')
@@ -0,0 +1,277 @@
+"""Rendering text in the Phonics font to images
+
+Loading the font through PIL's ImageFont rasterizes every glyph again on
+each call. A TextRenderer instead reads the font once, keeps its outlines,
+and caches each glyph's coverage by (glyph, size) in a size-bounded,
+least-recently-used cache, so rendering a word again only composites
+cached bitmaps with NumPy. The color is applied to the finished image.
+Text is laid out on fixed advances from hmtx, with greedy word wrapping
+to a width in pixels.
+
+    from text_render import render_text
+    render_text("sam sat on a mat", 64, width=400).save("sam.png")
+"""
+import os
+import math
+import threading
+import contextlib
+from collections import OrderedDict
+import numpy as np
+from PIL import Image
+from fontTools.ttLib import TTFont
+from glyph_outline import Outline
+from atlas import glyph_raster
+
+DEFAULT_FONT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Phonics.ttf")
+CACHE_SIZE = 32  # Megabytes
+DEFAULT_COLOR = (0, 0, 0)
+
+class BitmapCache:
+    """A size-bounded, least-recently-used cache of glyph bitmaps, shared between threads"""
+    def __init__(self, max_size=CACHE_SIZE * 1024 * 1024):
+        self.max_size = max_size
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the cached entry for a key, or None on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    @contextlib.contextmanager
+    def view(self, key):
+        """Yield the cached entry for a key, or None on a miss
+
+        Entries here are never changed once stored, so this is get() for
+        use in a with block, as with a shared tile cache.
+        """
+        yield self.get(key)
+
+    def put(self, key, bitmap, left, top):
+        """Store a bitmap and its offset, evict old entries if over the size limit, and return True"""
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size -= old[0].nbytes
+            self._entries[key] = (bitmap, left, top)
+            self.size += bitmap.nbytes
+            while self.size > self.max_size:
+                _, (evicted, _, _) = self._entries.popitem(last=False)
+                self.size -= evicted.nbytes
+            return True
+
+    def report(self):
+        """Return a one-line summary of cache usage"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            rate = 100 * self.hits / lookups if lookups else 0
+            return (f"Glyph bitmap cache: {self.hits} hits, {self.misses} misses ({rate:.0f}% hit rate), "
+                    f"{len(self._entries)} entries using {self.size / 1024:.1f} KB of {self.max_size / 1024:.0f} KB")
+
+def font_outline(glyf, glyph_name, units_per_em):
+    """Return a glyph of a glyf table as an Outline in drawing coordinates
+
+    Composite glyphs are flattened. Drawing coordinates have y growing
+    downwards with the baseline at y = units_per_em, as the draw_*
+    functions use.
+    """
+    coordinates, end_points, flags = glyf[glyph_name].getCoordinates(glyf)
+    points = np.array(coordinates, dtype=np.float64).reshape(-1, 2)
+    points[:, 1] = units_per_em - points[:, 1]
+    return Outline(points, np.asarray(end_points, dtype=np.int32) + 1, np.asarray(flags) & 1)
+
+def check_size(size, width):
+    """Raise ValueError unless the size and the width, if given, are positive"""
+    if size <= 0:
+        raise ValueError(f"size must be positive, got {size}")
+    if width is not None and width <= 0:
+        raise ValueError(f"width must be positive, got {width}")
+
+class TextRenderer:
+    """Lays out and renders text in one font, with its glyph rasters cached"""
+    def __init__(self, font_path=DEFAULT_FONT, cache_size=CACHE_SIZE * 1024 * 1024, cache=None):
+        font = TTFont(font_path, lazy=True)
+        self.units_per_em = font["head"].unitsPerEm
+        self.cmap = font.getBestCmap()
+        glyf = font["glyf"]
+        names = {".notdef", *self.cmap.values()}
+        self.advances = {name: font["hmtx"][name][0] for name in names}
+        self.outlines = {name: font_outline(glyf, name, self.units_per_em) for name in names}
+        # Lines are spaced so that no glyph reaches into the next, and
+        # padded on both sides by the most any glyph sticks out past its
+        # advance
+        head, hhea = font["head"], font["hhea"]
+        self.ascent = max(hhea.ascent, head.yMax)
+        self.descent = max(-hhea.descent, -head.yMin)
+        self.line_gap = hhea.lineGap
+        self.overhang = max(-head.xMin, max(head.xMax - advance for advance in self.advances.values()), 0)
+        self.margin = max(self.ascent - self.units_per_em, self.descent, self.overhang)
+        font.close()
+        # Renderers in several processes can share a tile_cache.SharedTileCache,
+        # with bitmaps too large for its slots kept by each process
+        self.cache = BitmapCache(cache_size) if cache is None else cache
+        self.fallback = None if cache is None else BitmapCache(cache_size)
+        self.rasterized = 0
+
+    def glyph_name(self, character):
+        """Return the glyph drawn for a character
+
+        The font only has lowercase letters, so other characters fall back
+        to their lowercase form and then to .notdef.
+        """
+        return self.cmap.get(ord(character)) or self.cmap.get(ord(character.lower()), ".notdef")
+
+    def glyph_bitmap(self, glyph_name, size):
+        """Return a glyph's coverage bitmap at `size` pixels per em, and its offset from the origin
+
+        The bitmap is 8-bit alpha, and the offset is that of its top left
+        corner, in pixels, with y growing upwards. Bitmaps are cached and
+        read-only.
+        """
+        entry = self.cache.get((glyph_name, size))
+        if entry is None:
+            entry = self._missing_bitmap(glyph_name, size)
+        return entry
+
+    @contextlib.contextmanager
+    def glyph_view(self, glyph_name, size):
+        """Yield what glyph_bitmap() returns, for use until the block ends
+
+        A bitmap in a shared tile cache is used in place rather than
+        copied, so it must not be kept after the block.
+        """
+        with self.cache.view((glyph_name, size)) as entry:
+            if entry is not None:
+                yield entry
+                return
+        yield self._missing_bitmap(glyph_name, size)
+
+    def _missing_bitmap(self, glyph_name, size):
+        """Return a bitmap missing from the cache, from the fallback cache or rasterized and cached"""
+        key = (glyph_name, size)
+        entry = None if self.fallback is None else self.fallback.get(key)
+        if entry is None:
+            coverage, left, top = glyph_raster(self.outlines[glyph_name], size, self.units_per_em, self.margin)
+            bitmap = np.rint(coverage * 255).astype(np.uint8)
+            bitmap.flags.writeable = False
+            entry = bitmap, left, top
+            self.rasterized += 1
+            if not self.cache.put(key, *entry) and self.fallback is not None:
+                self.fallback.put(key, *entry)
+        return entry
+
+    def wrap(self, text, size, width=None):
+        """Break text into lines of words that fit `width` pixels, and return them
+
+        Lines break at newlines and, with a width, between words; a word
+        too long for a line of its own is broken between letters. Runs of
+        spaces count as one.
+        """
+        check_size(size, width)
+        scale = size / self.units_per_em
+        space = self.advances.get(self.cmap.get(ord(" ")), self.units_per_em // 4)
+        available = None if width is None else (width - 2 * math.ceil(self.overhang * scale)) / scale
+        lines = []
+        for paragraph in text.split("\n"):
+            line, line_width = [], 0
+            for word in paragraph.split():
+                word_width = sum(self.advances[self.glyph_name(character)] for character in word)
+                if available is not None and line and line_width + space + word_width > available:
+                    lines.append(" ".join(line))
+                    line, line_width = [], 0
+                while available is not None and not line and word_width > available and len(word) > 1:
+                    # Break the word after as many letters as fit, at least one
+                    taken, used = 1, self.advances[self.glyph_name(word[0])]
+                    while taken < len(word) and used + self.advances[self.glyph_name(word[taken])] <= available:
+                        used += self.advances[self.glyph_name(word[taken])]
+                        taken += 1
+                    if taken == len(word):
+                        break
+                    lines.append(word[:taken])
+                    word = word[taken:]
+                    word_width -= used
+                line_width += word_width + (space if line else 0)
+                line.append(word)
+            lines.append(" ".join(line))
+        return lines
+
+    def layout(self, text, size, width=None):
+        """Return the image size and the (glyph name, x, baseline y) of each glyph drawn, in pixels
+
+        Glyph origins are rounded to whole pixels, so a glyph's bitmap is
+        the same wherever it is drawn. Without a width the image is as
+        wide as the longest line.
+        """
+        check_size(size, width)
+        scale = size / self.units_per_em
+        space = self.advances.get(self.cmap.get(ord(" ")), self.units_per_em // 4)
+        padding = math.ceil(self.overhang * scale)
+        line_height = (self.ascent + self.descent + self.line_gap) * scale
+        placed = []
+        widest = 0
+        lines = self.wrap(text, size, width)
+        for number, line in enumerate(lines):
+            baseline = round(self.ascent * scale + number * line_height)
+            pen = 0
+            for character in line:
+                if character == " ":
+                    pen += space
+                    continue
+                name = self.glyph_name(character)
+                placed.append((name, padding + round(pen * scale), baseline))
+                pen += self.advances[name]
+            widest = max(widest, pen)
+        if width is None:
+            width = math.ceil(widest * scale) + 2 * padding
+        return (width, math.ceil(len(lines) * line_height - self.line_gap * scale)), placed
+
+    def render_text(self, text, size, width=None, color=DEFAULT_COLOR):
+        """Return an RGBA image of text at `size` pixels per em, wrapped to `width` pixels if given"""
+        (image_width, image_height), placed = self.layout(text, size, width)
+        # All the glyphs are one color, so only their coverage needs
+        # compositing, in 8 bits and only where the glyphs are
+        alpha = np.zeros((image_height, image_width), dtype=np.uint8)
+        for name, x, baseline in placed:
+            with self.glyph_view(name, size) as (bitmap, left, top):
+                x0, y0 = x + left, baseline - top
+                # Clip the bitmap to the image
+                x1, y1 = min(x0 + bitmap.shape[1], image_width), min(y0 + bitmap.shape[0], image_height)
+                cx, cy = max(x0, 0), max(y0, 0)
+                if cx >= x1 or cy >= y1:
+                    continue
+                source = bitmap[cy - y0:y1 - y0, cx - x0:x1 - x0]
+                target = alpha[cy:y1, cx:x1]
+                if target.any():
+                    # Source over where glyphs overlap: what shows through
+                    # the source is scaled by its transparency
+                    below = target.astype(np.uint16) * (255 - source.astype(np.uint16))
+                    target[...] = source + (below + 127) // 255
+                else:
+                    target[...] = source
+        image = Image.new("RGBA", (image_width, image_height), color)
+        image.putalpha(Image.fromarray(alpha, "L"))
+        return image
+
+_default_renderer = None
+_default_lock = threading.Lock()
+
+def default_renderer():
+    """Return the TextRenderer of the built font, loading it on first use"""
+    global _default_renderer
+    with _default_lock:
+        if _default_renderer is None:
+            _default_renderer = TextRenderer()
+        return _default_renderer
+
+def render_text(text, size, width=None, color=DEFAULT_COLOR):
+    """Return an RGBA image of text in the built font at `size` pixels per em, wrapped to `width` pixels if given"""
+    return default_renderer().render_text(text, size, width, color)
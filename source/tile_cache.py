@@ -0,0 +1,273 @@
+"""Raster tile cache in shared memory, for several rendering processes
+
+Worker processes that each keep their own cache hold a copy of every
+glyph bitmap and each rasterize it again when they start. A
+SharedTileCache instead keeps the bitmaps in one
+multiprocessing.shared_memory segment that every worker attaches to, so
+a glyph is rasterized once for all of them and stored once.
+
+The segment holds a header, an index with one record per slot, and the
+slots themselves, all the same size. A tile is found by comparing a hash
+of its key with every record's at once. Writers take a lock shared by
+the processes, pick the least recently used slot, and publish through
+the record's sequence number: it is odd while the slot is being written
+and even once the tile is complete, so readers skip a slot being written
+and notice one rewritten while they looked it up.
+
+view() hands out a tile without copying it: a read-only NumPy view into
+the segment, valid until the with block ends. The slot is pinned for the
+block, under the lock, and writers never reuse a pinned slot. A process
+that dies inside the block leaves its slot pinned until the cache is
+created again. get() copies the tile out instead, for callers that keep
+it; it takes no pin, and checks the sequence number again after copying,
+so a tile is never returned torn or replaced by another while it was
+read. Both mark the tile used under the lock.
+
+The cache has the same get(), view() and put() as
+text_render.BitmapCache, so a TextRenderer can use either.
+"""
+import os
+import time
+import struct
+import hashlib
+import contextlib
+import multiprocessing
+from multiprocessing import shared_memory
+import numpy as np
+
+CACHE_SIZE = 32  # Megabytes
+TILE_SIZE = 64  # Kilobytes per slot, so 8-bit glyph bitmaps up to 256 pixels square
+
+# Segment header: magic, format version, number of slots, bytes per slot
+HEADER = struct.Struct("<4sIIQ")
+MAGIC = b"PHTC"
+VERSION = 2
+INDEX_DTYPE = np.dtype([
+    ("sequence", "<u8"),  # 0 while empty, odd while being written
+    ("key", "<u8", (2,)),
+    ("used", "<u8"),  # time.monotonic_ns() of the last use
+    ("pins", "<u4"),  # views of the tile in use, which keep it in its slot
+    ("ndim", "<u4"),
+    ("shape", "<u4", (3,)),
+    ("dtype", "S8"),
+    ("left", "<i4"),
+    ("top", "<i4"),
+])
+# Sections start on cache lines
+ALIGNMENT = 64
+
+def _aligned(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+def key_digest(key):
+    """Return the two 64-bit halves of a key's hash; keys are compared by their repr()"""
+    return np.frombuffer(hashlib.blake2b(repr(key).encode("utf-8"), digest_size=16).digest(), dtype="<u8")
+
+class SharedTileCache:
+    """A least-recently-used cache of NumPy tiles in shared memory, with offsets, shared between processes
+
+    Make one with create() in the parent process and pass it, or its
+    name and lock to attach(), to the workers when starting them.
+    """
+    def __init__(self, memory, lock, owner=False):
+        self._memory = memory
+        self._lock = lock
+        # Forked workers inherit the creator's cache as it is, so the
+        # creator is known by its process
+        self._creator = os.getpid() if owner else None
+        magic, version, self.slots, self.tile_size = HEADER.unpack_from(memory.buf)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"shared memory {memory.name} doesn't hold a tile cache of this version")
+        index_offset = _aligned(HEADER.size)
+        self._data_offset = _aligned(index_offset + self.slots * INDEX_DTYPE.itemsize)
+        self._index = np.ndarray(self.slots, dtype=INDEX_DTYPE, buffer=memory.buf, offset=index_offset)
+        self._sequence = self._index["sequence"]
+        self._keys = self._index["key"]
+        self._used = self._index["used"]
+        self._pins = self._index["pins"]
+        # The slots this process has found tiles in, by key, with the
+        # sequence numbers they were found at, to check they still hold them
+        self._slots = {}
+        # Counts for this process only
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.oversized = 0
+        self.pinned = 0
+
+    @classmethod
+    def create(cls, size=CACHE_SIZE * 1024 * 1024, tile_size=TILE_SIZE * 1024, lock=None):
+        """Create a cache of about `size` bytes in slots of `tile_size` bytes"""
+        slots = max(size // tile_size, 1)
+        index_offset = _aligned(HEADER.size)
+        total = _aligned(index_offset + slots * INDEX_DTYPE.itemsize) + slots * tile_size
+        memory = shared_memory.SharedMemory(create=True, size=total)
+        # New segments are zeroed, so every slot starts empty
+        HEADER.pack_into(memory.buf, 0, MAGIC, VERSION, slots, tile_size)
+        return cls(memory, multiprocessing.Lock() if lock is None else lock, owner=True)
+
+    @classmethod
+    def attach(cls, name, lock):
+        """Open the cache another process created, given its name and lock
+
+        The lock can only be passed to processes as they start, so they are
+        the creator's children. They share its resource tracker, which
+        removes the segment if the creator exits without doing so.
+        """
+        return cls(shared_memory.SharedMemory(name), lock)
+
+    def __reduce__(self):
+        # Passed to a new process, the cache is opened there by name; the
+        # lock can only be passed while starting the process
+        return SharedTileCache.attach, (self.name, self._lock)
+
+    @property
+    def name(self):
+        return self._memory.name
+
+    def _find(self, key):
+        """Return the slot holding a key's complete tile and the slot's sequence number, or None"""
+        found = self._slots.get(key)
+        if found is not None:
+            slot, sequence = found
+            if int(self._sequence[slot]) == sequence:
+                return found
+            del self._slots[key]
+        first, second = key_digest(key)
+        for slot in np.flatnonzero(self._keys[:, 0] == first).tolist():
+            sequence = int(self._sequence[slot])
+            if sequence == 0 or sequence & 1 or self._keys[slot, 1] != second:
+                continue
+            if len(self._slots) >= 2 * self.slots:
+                # Most are of evicted tiles by now
+                self._slots.clear()
+            self._slots[key] = slot, sequence
+            return slot, sequence
+        return None
+
+    def _tile(self, slot, record):
+        """Return a read-only view of the tile a slot's index record describes"""
+        shape = tuple(record["shape"][:record["ndim"]].tolist())
+        tile = np.ndarray(shape, dtype=np.dtype(record["dtype"].decode("ascii")), buffer=self._memory.buf,
+                          offset=self._data_offset + slot * self.tile_size)
+        tile.flags.writeable = False
+        return tile
+
+    def get(self, key):
+        """Return a copy of the cached (tile, left, top) for a key, or None on a miss
+
+        The tile is read-only. It is copied out of the shared memory, and
+        the slot's sequence number checked again after copying, so a tile
+        another process replaced meanwhile is never returned.
+        """
+        found = self._find(key)
+        if found is not None:
+            slot, sequence = found
+            record = self._index[slot].copy()
+            tile = self._tile(slot, record).copy()
+            with self._lock:
+                current = int(self._sequence[slot]) == sequence
+                if current:
+                    self._used[slot] = time.monotonic_ns()
+            if current:
+                tile.flags.writeable = False
+                self.hits += 1
+                return tile, int(record["left"]), int(record["top"])
+            # Rewritten while it was being copied
+            self._slots.pop(key, None)
+        self.misses += 1
+        return None
+
+    @contextlib.contextmanager
+    def view(self, key):
+        """Yield the cached (tile, left, top) for a key, with the tile viewed in place, or None on a miss
+
+        The tile is a read-only view of the shared memory, and only valid
+        until the block ends; copy it to keep it. Its slot is pinned until
+        then, so no process replaces it meanwhile.
+        """
+        found = self._find(key)
+        slot = None
+        if found is not None:
+            with self._lock:
+                if int(self._sequence[found[0]]) == found[1]:
+                    slot = found[0]
+                    self._pins[slot] += 1
+                    self._used[slot] = time.monotonic_ns()
+            if slot is None:
+                self._slots.pop(key, None)
+        if slot is None:
+            self.misses += 1
+            yield None
+            return
+        self.hits += 1
+        try:
+            record = self._index[slot].copy()
+            yield self._tile(slot, record), int(record["left"]), int(record["top"])
+        finally:
+            with self._lock:
+                self._pins[slot] -= 1
+
+    def put(self, key, tile, left=0, top=0):
+        """Copy a tile of up to three dimensions and its offset into the cache, and return whether it was stored
+
+        It isn't if it is too big for a slot, or every slot is pinned.
+        """
+        tile = np.ascontiguousarray(tile)
+        if tile.nbytes > self.tile_size or tile.ndim > 3:
+            self.oversized += 1
+            return False
+        digest = key_digest(key)
+        with self._lock:
+            for slot in np.flatnonzero(self._keys[:, 0] == digest[0]).tolist():
+                if self._keys[slot, 1] == digest[1] and self._sequence[slot]:
+                    self._used[slot] = time.monotonic_ns()
+                    return True
+            # Empty slots were never used, so they come first; pinned slots
+            # are in use and never replaced
+            slot = int(np.argmin(np.where(self._pins > 0, np.iinfo(np.uint64).max, self._used)))
+            if self._pins[slot]:
+                self.pinned += 1
+                return False
+            sequence = int(self._sequence[slot])
+            if sequence:
+                self.evictions += 1
+            self._sequence[slot] = sequence + 1
+            data = np.ndarray(tile.nbytes, dtype=np.uint8, buffer=self._memory.buf,
+                              offset=self._data_offset + slot * self.tile_size)
+            data[:] = tile.reshape(-1).view(np.uint8)
+            record = self._index[slot:slot + 1]
+            record["key"] = digest
+            record["ndim"] = tile.ndim
+            record["shape"] = tile.shape + (0,) * (3 - tile.ndim)
+            record["dtype"] = tile.dtype.str.encode("ascii")
+            record["left"] = left
+            record["top"] = top
+            record["used"] = time.monotonic_ns()
+            self._sequence[slot] = sequence + 2
+        return True
+
+    def stored(self):
+        """Return the number of tiles stored and the bytes they take"""
+        filled = np.flatnonzero(self._sequence)
+        shapes = self._index["shape"][filled].astype(np.int64)
+        ndims = self._index["ndim"][filled]
+        sizes = np.where(np.arange(3) < ndims[:, np.newaxis], shapes, 1).prod(axis=1)
+        itemsizes = np.array([np.dtype(code.decode("ascii")).itemsize for code in self._index["dtype"][filled]])
+        return len(filled), int((sizes * itemsizes).sum()) if len(filled) else 0
+
+    def report(self):
+        """Return a one-line summary of cache usage, with this process's hits and misses"""
+        lookups = self.hits + self.misses
+        rate = 100 * self.hits / lookups if lookups else 0
+        tiles, size = self.stored()
+        return (f"Shared tile cache {self.name}: {self.hits} hits, {self.misses} misses ({rate:.0f}% hit rate) here, "
+                f"{tiles} of {self.slots} slots using {size / 1024:.1f} KB of {self._memory.size / 1024:.0f} KB")
+
+    def close(self):
+        """Detach from the segment, and remove it if this process created it"""
+        self._index = self._sequence = self._keys = self._used = self._pins = None
+        self._slots.clear()
+        self._memory.close()
+        if self._creator == os.getpid():
+            self._memory.unlink()
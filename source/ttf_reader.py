@@ -0,0 +1,310 @@
+"""Lazy, memory-mapped reader for glyph outlines in a TrueType font
+
+Services that only need a few outlines pay for a full TTFont: importing
+fontTools and reading every table it touches. A FontReader maps the file
+into memory and reads only what a lookup needs. Opening it parses the
+table directory and a few header fields. The first character lookup
+reads the cmap format 4 subtable's segment arrays. After that each
+lookup reads two loca entries and decodes that one glyf record straight
+into tuples of points. Only the standard library is used, so a one-off
+lookup doesn't pay for importing NumPy; GlyphPoints.arrays() imports it
+for work on whole outlines.
+
+    with FontReader("Phonics.ttf") as font:
+        glyph = font.lookup("a")
+        glyph.points, glyph.on_curve, glyph.ends
+
+Points are in font units with y growing upwards, as in the font.
+"""
+import math
+import mmap
+import struct
+from bisect import bisect_left
+from collections import OrderedDict
+
+# glyf flags
+ON_CURVE = 0x01
+X_SHORT = 0x02
+Y_SHORT = 0x04
+REPEAT = 0x08
+X_SAME_OR_POSITIVE = 0x10
+Y_SAME_OR_POSITIVE = 0x20
+# Composite glyph flags
+ARG_1_AND_2_ARE_WORDS = 0x0001
+ARGS_ARE_XY_VALUES = 0x0002
+WE_HAVE_A_SCALE = 0x0008
+MORE_COMPONENTS = 0x0020
+WE_HAVE_AN_X_AND_Y_SCALE = 0x0040
+WE_HAVE_A_TWO_BY_TWO = 0x0080
+# Deepest nesting of composite glyphs followed
+MAX_COMPONENT_DEPTH = 8
+
+# Decoded glyphs a reader keeps for repeat lookups
+CACHE_SIZE = 256
+
+SFNT_VERSIONS = (b"\x00\x01\x00\x00", b"true")
+# Unicode BMP subtables, best first
+CMAP_SUBTABLES = ((3, 1), (0, 3), (0, 4), (0, 6), (0, 1), (0, 0))
+
+class GlyphPoints:
+    """The points of one decoded glyph
+
+    `points` is a tuple of every contour's (x, y) points one after
+    another, `on_curve` flags each, and `ends` holds the index one past
+    the last point of each contour, as in glyph_outline.Outline.
+    """
+    __slots__ = ("glyph_id", "points", "on_curve", "ends", "bounds", "advance")
+
+    def __init__(self, glyph_id, points, on_curve, ends, bounds, advance):
+        self.glyph_id = glyph_id
+        self.points = points
+        self.on_curve = on_curve
+        self.ends = ends
+        self.bounds = bounds
+        self.advance = advance
+
+    def __repr__(self):
+        return f"<GlyphPoints {self.glyph_id}: {len(self.ends)} contours, {len(self.points)} points>"
+
+    def arrays(self):
+        """Return the points, on-curve flags and contour ends as NumPy arrays, for work on whole outlines"""
+        # Imported here so that looking glyphs up doesn't load NumPy
+        import numpy as np
+        return (np.array(self.points, dtype=np.int32).reshape(-1, 2), np.array(self.on_curve, dtype=bool),
+                np.array(self.ends, dtype=np.int32))
+
+# Maps each flag byte to 1 if its repeat bit is set, else 0
+REPEATING_FLAGS = bytes(1 if flag & REPEAT else 0 for flag in range(256))
+
+def _flags(record, offset, count):
+    """Expand a simple glyph's `count` flags, and return them and the offset after them
+
+    Flags may say how often they repeat. The runs of flags between those
+    are found by searching the record with every byte mapped to whether
+    its repeat bit is set, and copied whole.
+    """
+    repeating = record.translate(REPEATING_FLAGS)
+    flags = bytearray()
+    while len(flags) < count:
+        at = repeating.find(1, offset, offset + count - len(flags))
+        if at < 0:
+            end = offset + count - len(flags)
+            flags += record[offset:end]
+            return flags, end
+        flags += record[offset:at]
+        flags += record[at:at + 1] * (record[at + 1] + 1)
+        offset = at + 2
+    return flags[:count], offset
+
+def _coordinates(record, flags, offset, short_bit, same_bit):
+    """Decode one axis of a simple glyph's coordinates, and return them and the offset after them"""
+    coordinates = []
+    value = 0
+    for flag in flags:
+        if flag & short_bit:
+            # A one-byte delta is positive with the same bit set
+            value += record[offset] if flag & same_bit else -record[offset]
+            offset += 1
+        elif not flag & same_bit:
+            # A signed 16-bit word; with the same bit and no short bit, the
+            # coordinate repeats the previous one
+            word = (record[offset] << 8) | record[offset + 1]
+            value += word - 0x10000 if word & 0x8000 else word
+            offset += 2
+        coordinates.append(value)
+    return coordinates, offset
+
+class FontReader:
+    """A TrueType font file mapped into memory, read one glyph at a time
+
+    The last `cache_size` glyphs decoded are kept and returned again by
+    repeat lookups. Their points are tuples, so they can't be changed.
+    """
+    def __init__(self, path, cache_size=CACHE_SIZE):
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self._tables = self._read_directory()
+            head = self._table(b"head")
+            self.units_per_em, = struct.unpack_from(">H", self._map, head + 18)
+            self._long_loca = struct.unpack_from(">h", self._map, head + 50)[0] == 1
+            self.num_glyphs, = struct.unpack_from(">H", self._map, self._table(b"maxp") + 4)
+            self._metric_count, = struct.unpack_from(">H", self._map, self._table(b"hhea") + 34)
+            self._hmtx = self._table(b"hmtx")
+            self._loca = self._table(b"loca")
+            self._glyf = self._table(b"glyf")
+        except Exception:
+            self._map.close()
+            raise
+        self._segments = None
+        self.cache_size = cache_size
+        self._glyphs = OrderedDict()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self._glyphs.clear()
+        self._map.close()
+
+    def _read_directory(self):
+        """Return the offset and length of each table by tag"""
+        version, count = struct.unpack_from(">4sH", self._map, 0)
+        if version not in SFNT_VERSIONS:
+            raise ValueError("not a TrueType font")
+        tables = {}
+        for index in range(count):
+            tag, _, offset, length = struct.unpack_from(">4sIII", self._map, 12 + 16 * index)
+            if offset + length > len(self._map):
+                raise ValueError(f"the {tag.decode('latin-1')} table runs past the end of the file")
+            tables[tag] = offset, length
+        return tables
+
+    def _table(self, tag):
+        if tag not in self._tables:
+            raise ValueError(f"the font has no {tag.decode('latin-1')} table")
+        return self._tables[tag][0]
+
+    def _read_cmap(self):
+        """Read the segment arrays of the best Unicode BMP subtable, which must be format 4"""
+        cmap = self._table(b"cmap")
+        count, = struct.unpack_from(">H", self._map, cmap + 2)
+        subtables = {}
+        for index in range(count):
+            platform, encoding, offset = struct.unpack_from(">HHI", self._map, cmap + 4 + 8 * index)
+            subtables[platform, encoding] = cmap + offset
+        for key in CMAP_SUBTABLES:
+            if key in subtables and struct.unpack_from(">H", self._map, subtables[key])[0] == 4:
+                subtable = subtables[key]
+                break
+        else:
+            raise ValueError("the font has no format 4 Unicode cmap subtable")
+        segments = struct.unpack_from(">H", self._map, subtable + 6)[0] // 2
+        arrays = subtable + 14
+        end = struct.unpack_from(f">{segments}H", self._map, arrays)
+        start = struct.unpack_from(f">{segments}H", self._map, arrays + 2 * segments + 2)
+        delta = struct.unpack_from(f">{segments}H", self._map, arrays + 4 * segments + 2)
+        range_offsets_at = arrays + 6 * segments + 2
+        range_offsets = struct.unpack_from(f">{segments}H", self._map, range_offsets_at)
+        return end, start, delta, range_offsets, range_offsets_at
+
+    def glyph_id(self, character):
+        """Return the glyph id a character maps to, 0 (.notdef) if it isn't mapped"""
+        if self._segments is None:
+            self._segments = self._read_cmap()
+        end, start, delta, range_offsets, range_offsets_at = self._segments
+        code = ord(character)
+        segment = bisect_left(end, code)
+        if segment == len(end) or start[segment] > code:
+            return 0
+        if range_offsets[segment] == 0:
+            return (code + delta[segment]) & 0xFFFF
+        # The range offset counts from its own place in the array
+        at = range_offsets_at + 2 * segment + range_offsets[segment] + 2 * (code - start[segment])
+        glyph, = struct.unpack_from(">H", self._map, at)
+        return (glyph + delta[segment]) & 0xFFFF if glyph else 0
+
+    def advance(self, glyph_id):
+        """Return a glyph's advance width from hmtx"""
+        index = min(glyph_id, self._metric_count - 1)
+        return struct.unpack_from(">H", self._map, self._hmtx + 4 * index)[0]
+
+    def _glyph_record(self, glyph_id):
+        """Return the offset and length of a glyph's glyf record"""
+        if not 0 <= glyph_id < self.num_glyphs:
+            raise IndexError(f"glyph id {glyph_id} is out of range")
+        if self._long_loca:
+            start, end = struct.unpack_from(">II", self._map, self._loca + 4 * glyph_id)
+        else:
+            start, end = struct.unpack_from(">HH", self._map, self._loca + 2 * glyph_id)
+            start, end = 2 * start, 2 * end
+        return self._glyf + start, end - start
+
+    def glyph(self, glyph_id):
+        """Return one glyph's points, decoding them unless they are cached"""
+        glyph = self._glyphs.get(glyph_id)
+        if glyph is not None:
+            self._glyphs.move_to_end(glyph_id)
+            return glyph
+        glyph = self._decode(glyph_id)
+        if self.cache_size > 0:
+            self._glyphs[glyph_id] = glyph
+            if len(self._glyphs) > self.cache_size:
+                self._glyphs.popitem(last=False)
+        return glyph
+
+    def _decode(self, glyph_id, depth=0):
+        """Decode one glyph's points, following the components of composite glyphs"""
+        advance = self.advance(glyph_id)
+        offset, length = self._glyph_record(glyph_id)
+        if length == 0:
+            return GlyphPoints(glyph_id, (), (), (), (0, 0, 0, 0), advance)
+        contours, *bounds = struct.unpack_from(">hhhhh", self._map, offset)
+        if contours < 0:
+            return self._composite(glyph_id, offset + 10, tuple(bounds), advance, depth)
+        record = self._map[offset:offset + length]
+        ends = tuple(end + 1 for end in struct.unpack_from(f">{contours}H", record, 10))
+        count = ends[-1] if contours else 0
+        instructions = 10 + 2 * contours
+        position = instructions + 2 + ((record[instructions] << 8) | record[instructions + 1])
+
+        flags, position = _flags(record, position, count)
+        # All the x coordinates come before the y coordinates
+        xs, position = _coordinates(record, flags, position, X_SHORT, X_SAME_OR_POSITIVE)
+        ys, position = _coordinates(record, flags, position, Y_SHORT, Y_SAME_OR_POSITIVE)
+        on_curve = tuple(flag & ON_CURVE != 0 for flag in flags)
+        return GlyphPoints(glyph_id, tuple(zip(xs, ys)), on_curve, ends, tuple(bounds), advance)
+
+    def _composite(self, glyph_id, offset, bounds, advance, depth):
+        """Decode a composite glyph into the points of its components, placed and scaled"""
+        if depth >= MAX_COMPONENT_DEPTH:
+            raise ValueError(f"glyph {glyph_id} nests components more than {MAX_COMPONENT_DEPTH} deep")
+        points, on_curve, ends = [], [], []
+        while True:
+            flags, component = struct.unpack_from(">HH", self._map, offset)
+            offset += 4
+            if not flags & ARGS_ARE_XY_VALUES:
+                raise ValueError(f"glyph {glyph_id} places a component by matching points, which isn't supported")
+            if flags & ARG_1_AND_2_ARE_WORDS:
+                dx, dy = struct.unpack_from(">hh", self._map, offset)
+                offset += 4
+            else:
+                dx, dy = struct.unpack_from(">bb", self._map, offset)
+                offset += 2
+            # Scales are 2.14 fixed point, as (xx, xy, yx, yy)
+            if flags & WE_HAVE_A_SCALE:
+                scale, = struct.unpack_from(">h", self._map, offset)
+                transform = (scale, 0, 0, scale)
+                offset += 2
+            elif flags & WE_HAVE_AN_X_AND_Y_SCALE:
+                x_scale, y_scale = struct.unpack_from(">hh", self._map, offset)
+                transform = (x_scale, 0, 0, y_scale)
+                offset += 4
+            elif flags & WE_HAVE_A_TWO_BY_TWO:
+                transform = struct.unpack_from(">hhhh", self._map, offset)
+                offset += 8
+            else:
+                transform = None
+
+            part = self._decode(component, depth + 1)
+            if transform is None:
+                placed = [(x + dx, y + dy) for x, y in part.points]
+            else:
+                # Rounded to whole units, as fontTools does
+                xx, xy, yx, yy = (value / 16384 for value in transform)
+                placed = [(math.floor(x * xx + y * yx + 0.5) + dx, math.floor(x * xy + y * yy + 0.5) + dy)
+                          for x, y in part.points]
+            total = len(points)
+            points += placed
+            on_curve += part.on_curve
+            ends += [end + total for end in part.ends]
+            if not flags & MORE_COMPONENTS:
+                break
+        return GlyphPoints(glyph_id, tuple(points), tuple(on_curve), tuple(ends), bounds, advance)
+
+    def lookup(self, character):
+        """Return the decoded glyph a character maps to"""
+        return self.glyph(self.glyph_id(character))
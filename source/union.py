@@ -0,0 +1,220 @@
+"""Overlap removal: the union of a glyph's polygon contours
+
+The glyphs are filled with the nonzero winding rule, so a point is inside
+a glyph when the contours wind around it a nonzero number of times. The
+union keeps exactly that area, outlined once: every edge is split where it
+meets another edge, the pieces with the filled area on one side and empty
+space on the other are kept, and those are joined back into loops. Holes
+made by contours winding the other way, like the cat's eyes, stay holes.
+
+Everything is done with NumPy on float coordinates. Points are snapped to
+a grid much finer than the font units the glyph is rounded to in the end,
+which merges the near misses floating point arithmetic leaves where edges
+almost coincide, such as the shared ends of the snake's body segments.
+"""
+import numpy as np
+from glyph_outline import Outline
+
+# Grid points are snapped to, in font units; corners closer than this to
+# an edge are taken to lie on it
+SNAP = 1 / 4096
+# How far from an edge the winding number is sampled on either side, at
+# most; pieces that are short or run close to another edge are sampled closer
+SAMPLE_OFFSET = 0.01
+# Edge parameters this close to an end don't split the edge
+PARAM_EPSILON = 1e-9
+# Loops with a smaller area, in square font units, vanish once rounded
+MIN_LOOP_AREA = 0.5
+
+def _cross(a, b):
+    return a[..., 0] * b[..., 1] - a[..., 1] * b[..., 0]
+
+def _snap(points):
+    return np.round(points / SNAP) * SNAP
+
+def winding_numbers(points, starts, ends):
+    """Return the winding number of the edges starts[i] -> ends[i] around each point"""
+    px, py = points[:, 0:1], points[:, 1:2]
+    ax, ay, bx, by = starts[:, 0], starts[:, 1], ends[:, 0], ends[:, 1]
+    side = (bx - ax) * (py - ay) - (by - ay) * (px - ax)
+    upward = (ay <= py) & (by > py) & (side > 0)
+    downward = (by <= py) & (ay > py) & (side < 0)
+    return upward.sum(axis=1) - downward.sum(axis=1)
+
+def distances_to_edges(points, starts, ends):
+    """Return the distance from each point to each edge starts[j] -> ends[j]"""
+    direction = ends - starts
+    length_squared = np.maximum((direction * direction).sum(axis=1), 1e-300)
+    relative = points[:, np.newaxis] - starts[np.newaxis, :]
+    t = np.clip((relative * direction).sum(axis=2) / length_squared, 0, 1)
+    nearest = starts + t[..., np.newaxis] * direction
+    return np.hypot(*np.moveaxis(points[:, np.newaxis] - nearest, 2, 0))
+
+def split_edges(starts, ends):
+    """Split edges wherever they cross another edge or another edge's end touches them
+
+    Returns the start and end points of the pieces.
+    """
+    direction = ends - starts
+    length_squared = (direction * direction).sum(axis=1)
+    splits = [[] for _ in range(len(starts))]
+
+    # Proper crossings: starts[i] + t * direction[i] == starts[j] + u * direction[j]
+    denominator = _cross(direction[:, np.newaxis], direction[np.newaxis, :])
+    offset = starts[np.newaxis, :] - starts[:, np.newaxis]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = _cross(offset, direction[np.newaxis, :]) / denominator
+        u = _cross(offset, direction[:, np.newaxis]) / denominator
+    crossing = ((np.abs(denominator) > 1e-12)
+                & (t > PARAM_EPSILON) & (t < 1 - PARAM_EPSILON)
+                & (u > -PARAM_EPSILON) & (u < 1 + PARAM_EPSILON))
+    for i, j in zip(*np.nonzero(crossing)):
+        point = starts[i] + t[i, j] * direction[i]
+        # A crossing next to a corner is that corner, found with less rounding error
+        corners = np.array((starts[i], ends[i], starts[j], ends[j]))
+        distance = np.hypot(*(corners - point).T)
+        nearest = int(np.argmin(distance))
+        if distance[nearest] < 4 * SNAP:
+            if nearest < 2:
+                continue
+            point = corners[nearest]
+        splits[i].append((t[i, j], point))
+
+    # Corners lying on an edge: T-junctions and edges that overlap along a line
+    relative = starts[np.newaxis, :] - starts[:, np.newaxis]
+    along = (relative * direction[:, np.newaxis]).sum(axis=2) / length_squared[:, np.newaxis]
+    distance = np.abs(_cross(direction[:, np.newaxis], relative)) / np.sqrt(length_squared)[:, np.newaxis]
+    touching = (distance < SNAP) & (along > PARAM_EPSILON) & (along < 1 - PARAM_EPSILON)
+    for i, k in zip(*np.nonzero(touching)):
+        splits[i].append((along[i, k], starts[k]))
+
+    piece_starts, piece_ends = [], []
+    for i, edge_splits in enumerate(splits):
+        edge_splits.sort(key=lambda split: split[0])
+        points = _snap(np.array([starts[i]] + [point for _, point in edge_splits] + [ends[i]]))
+        piece_starts.append(points[:-1])
+        piece_ends.append(points[1:])
+    piece_starts, piece_ends = np.vstack(piece_starts), np.vstack(piece_ends)
+    nonempty = (piece_starts != piece_ends).any(axis=1)
+    return piece_starts[nonempty], piece_ends[nonempty]
+
+def boundary_edges(starts, ends):
+    """Return the pieces of the edges that bound the filled area
+
+    Each piece is returned once, pointing so that the filled area is on its
+    left in drawing coordinates, which is clockwise around the filled area
+    once y is flipped into font coordinates.
+    """
+    piece_starts, piece_ends = split_edges(starts, ends)
+
+    # The same piece may come from several overlapping edges; keep one of each
+    a = np.round(piece_starts / SNAP).astype(np.int64)
+    b = np.round(piece_ends / SNAP).astype(np.int64)
+    a_first = (a[:, 0] < b[:, 0]) | ((a[:, 0] == b[:, 0]) & (a[:, 1] < b[:, 1]))
+    keys = np.where(a_first[:, np.newaxis], np.hstack((a, b)), np.hstack((b, a)))
+    _, unique = np.unique(keys, axis=0, return_index=True)
+    piece_starts, piece_ends = piece_starts[unique], piece_ends[unique]
+
+    direction = piece_ends - piece_starts
+    length = np.hypot(direction[:, 0], direction[:, 1])
+    middle = (piece_starts + piece_ends) / 2
+    # Sample closer than the nearest edge the piece isn't part of, so both
+    # samples fall in the faces next to the piece
+    distance = distances_to_edges(middle, starts, ends)
+    distance[distance < SNAP] = np.inf
+    clearance = distance.min(axis=1)
+    offset = np.minimum(np.minimum(SAMPLE_OFFSET, length / 8), clearance / 2) / length
+    normal = np.column_stack((-direction[:, 1], direction[:, 0])) * offset[:, np.newaxis]
+    left = winding_numbers(middle + normal, starts, ends) != 0
+    right = winding_numbers(middle - normal, starts, ends) != 0
+
+    boundary = left != right
+    flip = boundary & right
+    boundary_starts = np.where(flip[:, np.newaxis], piece_ends, piece_starts)[boundary]
+    boundary_ends = np.where(flip[:, np.newaxis], piece_starts, piece_ends)[boundary]
+    return boundary_starts, boundary_ends
+
+def link_loops(starts, ends):
+    """Join directed edges end to start into closed loops of points
+
+    An edge ending where no unused edge starts continues with the nearest
+    unused edge starting within a couple of grid steps. Raises ValueError
+    if the edges still don't close up.
+    """
+    start_keys = [tuple(key) for key in np.round(starts / SNAP).astype(np.int64).tolist()]
+    end_keys = [tuple(key) for key in np.round(ends / SNAP).astype(np.int64).tolist()]
+    outgoing = {}
+    for index, key in enumerate(start_keys):
+        outgoing.setdefault(key, []).append(index)
+
+    used = np.zeros(len(starts), dtype=bool)
+    loops = []
+    for first in range(len(starts)):
+        if used[first]:
+            continue
+        loop = []
+        index = first
+        while True:
+            used[index] = True
+            loop.append(index)
+            candidates = [edge for edge in outgoing.get(end_keys[index], []) if not used[edge] or edge == first]
+            if not candidates:
+                # Bridge a near miss
+                distance = np.hypot(*(starts - ends[index]).T)
+                distance[used & (np.arange(len(starts)) != first)] = np.inf
+                nearest = int(np.argmin(distance))
+                if distance[nearest] > 2 * SNAP:
+                    raise ValueError("overlap removal produced an open contour")
+                candidates = [nearest]
+            # Close the loop as soon as it gets back to where it started
+            if first in candidates:
+                break
+            index = candidates[0]
+        loops.append(starts[loop])
+    return loops
+
+def loop_area(loop):
+    """Return the signed area of a closed loop of points"""
+    return _cross(loop, np.roll(loop, -1, axis=0)).sum() / 2
+
+def drop_straight_points(loop):
+    """Remove points where a loop carries straight on"""
+    while len(loop) >= 3:
+        before = loop - np.roll(loop, 1, axis=0)
+        after = np.roll(loop, -1, axis=0) - loop
+        straight = (np.abs(_cross(before, after)) <= 1e-9 * np.hypot(*before.T) * np.hypot(*after.T)) \
+            & ((before * after).sum(axis=1) > 0)
+        if not straight.any():
+            break
+        loop = loop[~straight]
+    return loop
+
+def union_outline(outline):
+    """Return an outline covering the same area as `outline` with no overlapping contours
+
+    Outlines with quadratic curves are returned unchanged. So is an outline
+    whose union can't be traced, which only happens when rounding makes
+    pieces fail to meet.
+    """
+    if len(outline) == 0 or not outline.on_curve.all():
+        return outline
+
+    starts, ends = [], []
+    for contour, _ in outline.contours():
+        starts.append(contour)
+        ends.append(np.roll(contour, -1, axis=0))
+    starts, ends = _snap(np.vstack(starts)), _snap(np.vstack(ends))
+    nonempty = (starts != ends).any(axis=1)
+    starts, ends = starts[nonempty], ends[nonempty]
+    if len(starts) == 0:
+        return Outline()
+
+    try:
+        loops = link_loops(*boundary_edges(starts, ends))
+    except ValueError:
+        return outline
+    loops = [loop for loop in map(drop_straight_points, loops)
+             if len(loop) >= 3 and abs(loop_area(loop)) >= MIN_LOOP_AREA]
+    if not loops:
+        return Outline()
+    return Outline(np.vstack(loops), np.cumsum([len(loop) for loop in loops]))
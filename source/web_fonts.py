@@ -0,0 +1,94 @@
+"""Compressed web font versions of the TrueType font
+
+Browsers download the font for every page view, so alongside the TTF the
+build writes it as WOFF, whose tables are each compressed with zlib, and,
+when a Brotli module is installed, as WOFF2, which compresses the whole
+font with Brotli after transforming the glyf and loca tables into a more
+compact form. Both unpack to the same tables as the TTF.
+
+The demo page's @font-face rule lists the formats written next to the
+TTF, smallest first, so browsers fetch the first one they support. It
+never offers a file the build didn't write, which a browser would
+request and get a 404 for before moving on to the next in the list.
+"""
+import os
+import re
+from fontTools.ttLib import TTFont, woff2
+
+# Smallest first, the order the @font-face rule offers them in
+WEB_FONT_FORMATS = ("woff2", "woff")
+# The name CSS gives each format, the TTF included
+CSS_FORMATS = {"woff2": "woff2", "woff": "woff", "ttf": "truetype"}
+# The src descriptor of an @font-face rule, with the indentation before it
+FONT_FACE_SRC = re.compile(r"(@font-face\s*\{[^}]*?\n([ \t]*))src:[^;]*;")
+
+def available_formats(flavors=WEB_FONT_FORMATS):
+    """Return those of `flavors` that can be written here"""
+    # fontTools needs brotli or brotlicffi to write WOFF2
+    return tuple(flavor for flavor in flavors if flavor != "woff2" or woff2.haveBrotli)
+
+def web_font_path(ttf_path, flavor):
+    """Return the path of a web font written next to the TTF"""
+    return os.path.splitext(ttf_path)[0] + "." + flavor
+
+def write_web_fonts(ttf_path, save, flavors=None):
+    """Write the TTF at `ttf_path` in each web font format, and return their paths by format
+
+    `save` is called with a font and a path, such as save_font(). The
+    tables are copied from the TTF as they are, so the web fonts hold the
+    same data. A web font left over in a format that can't be written any
+    more is removed rather than left out of date.
+    """
+    if flavors is None:
+        flavors = available_formats()
+    paths = {}
+    for flavor in WEB_FONT_FORMATS:
+        path = web_font_path(ttf_path, flavor)
+        if flavor not in flavors:
+            if os.path.exists(path):
+                os.remove(path)
+            continue
+        # Tables that aren't loaded are copied without being decompiled
+        font = TTFont(ttf_path, recalcBBoxes=False, recalcTimestamp=False)
+        font.flavor = flavor
+        save(font, path)
+        font.close()
+        paths[flavor] = path
+    return paths
+
+def font_face_paths(ttf_path, paths):
+    """Return the paths of the fonts the @font-face rule offers, by format: the web fonts in `paths`, then the TTF"""
+    return {**paths, "ttf": ttf_path}
+
+def font_face_src(paths, indent=""):
+    """Return an @font-face src descriptor offering the fonts in `paths`, a dictionary by format
+
+    The URLs are the file names, for a page in the same directory.
+    """
+    sources = [f"url('{os.path.basename(path)}') format('{CSS_FORMATS[flavor]}')"
+               for flavor, path in paths.items()]
+    return "src: " + f",\n{indent}     ".join(sources) + ";"
+
+def update_font_face(html_path, paths, write):
+    """Point the @font-face rule of the page at `html_path` to the fonts in `paths`
+
+    `write` is called with a path and a function that writes the file's
+    contents to the open binary file, such as write_atomically(). The page
+    is only written if it changes. Returns whether it did.
+    """
+    with open(html_path, encoding="utf-8") as f:
+        html = f.read()
+    updated = FONT_FACE_SRC.sub(lambda match: match.group(1) + font_face_src(paths, match.group(2)), html, count=1)
+    if updated == html:
+        return False
+    write(html_path, lambda f: f.write(updated.encode("utf-8")))
+    return True
+
+def size_report(ttf_path, paths):
+    """Return lines comparing the size of the TTF with each web font in `paths`, a dictionary by format"""
+    ttf_size = os.path.getsize(ttf_path)
+    lines = [f"{os.path.basename(ttf_path):>14}: {ttf_size:>7} bytes"]
+    for path in paths.values():
+        size = os.path.getsize(path)
+        lines.append(f"{os.path.basename(path):>14}: {size:>7} bytes ({size / ttf_size:.0%} of the TTF)")
+    return lines
@@ -0,0 +1,53 @@
+"""Tests that glyph cache keys change with everything a glyph depends on"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "source"))
+from glyph_cache import GlyphCache, fingerprint
+
+def draw(pen, radius=10, *, start=0.0):
+    return pen, radius, start
+
+def make_drawing(width):
+    def draw_with_width(pen):
+        return pen, width
+    return draw_with_width
+
+def test_editing_a_default_misses(tmp_path):
+    cache = GlyphCache(str(tmp_path))
+    cache.put(fingerprint(draw), b"glyph")
+    assert cache.get(fingerprint(draw)) == b"glyph"
+    defaults = draw.__defaults__
+    draw.__defaults__ = (20,)
+    try:
+        assert cache.get(fingerprint(draw)) is None
+    finally:
+        draw.__defaults__ = defaults
+    assert (cache.hits, cache.misses) == (1, 1)
+
+def test_keyword_only_defaults_change_the_fingerprint():
+    before = fingerprint(draw)
+    kwdefaults = draw.__kwdefaults__
+    draw.__kwdefaults__ = {"start": 3.14}
+    try:
+        assert fingerprint(draw) != before
+    finally:
+        draw.__kwdefaults__ = kwdefaults
+    assert fingerprint(draw) == before
+
+def test_closed_over_values_change_the_fingerprint():
+    assert fingerprint(make_drawing(10)) == fingerprint(make_drawing(10))
+    assert fingerprint(make_drawing(10)) != fingerprint(make_drawing(20))
+
+def test_stroke_defaults_change_glyph_keys():
+    import stroke
+    import generate_shapes
+    before = generate_shapes.glyph_cache_key("k")
+    defaults = stroke.stroke_parts.__defaults__
+    stroke.stroke_parts.__defaults__ = tuple(value * 2 if isinstance(value, float) else value
+                                             for value in defaults)
+    try:
+        assert generate_shapes.glyph_cache_key("k") != before
+    finally:
+        stroke.stroke_parts.__defaults__ = defaults
+    assert generate_shapes.glyph_cache_key("k") == before